@@ -1,10 +1,18 @@
 """Agent modules for Financial Coach"""
 
-from agents.financial_coach import coach_graph, FinancialCoachState
-from agents.coaching_analyzer import coaching_analyzer
-
 __all__ = [
     'coach_graph',
     'FinancialCoachState',
     'coaching_analyzer',
 ]
+
+
+def __getattr__(name):
+    # Loaded on first access so importing a submodule does not pull in LangGraph
+    if name in ('coach_graph', 'FinancialCoachState'):
+        from agents import financial_coach
+        return getattr(financial_coach, name)
+    if name == 'coaching_analyzer':
+        from agents.coaching_analyzer import coaching_analyzer
+        return coaching_analyzer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,166 @@
+"""
+Array-backed building blocks for the coaching analyzer.
+
+Query rows are reduced once to a name column (integer codes into the list
+of distinct names) and an amount column (a NumPy array). Totals, shares,
+zone masks, transfer exclusion and savings are then array operations, and
+names are classified (by a KeywordMatcher or a lookup) once per distinct
+name instead of once per row. A ColumnarResult is used as-is, without
+building row dicts.
+
+Running totals use cumsum, which adds left to right like the builtin sum(),
+so totals match the per-row loops they replace to the last bit.
+"""
+
+
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from models.columnar import ColumnarResult, NULL_CODE
+from utils.keyword_matcher import KeywordMatcher
+from utils.row_stream import iter_rows
+
+
+class AmountFrame:
+    """Named amounts: codes into distinct names, plus one amount per row"""
+
+    __slots__ = ('codes', 'names', 'amounts', '_classes')
+
+    def __init__(self, codes: np.ndarray, names: List[str], amounts: np.ndarray):
+        self.codes = codes
+        self.names = names
+        self.amounts = amounts
+        self._classes: Dict[Callable[[str], int], np.ndarray] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable, name_key: str, amount_key: str,
+                  as_float: bool = False, skip_empty_names: bool = False) -> 'AmountFrame':
+        """
+        Read rows (a ColumnarResult, a list of rows, or an iterator of rows or
+        row batches) in a single pass
+
+        Rows without the name, or whose amount is not an int or float, are
+        skipped; with skip_empty_names, so are rows with an empty name.
+        """
+        if isinstance(rows, ColumnarResult):
+            return cls._from_columnar(rows, name_key, amount_key, as_float, skip_empty_names)
+
+        distinct: Dict[str, int] = {}
+        codes = []
+        amounts = []
+
+        for row in iter_rows(rows):
+            if not isinstance(row, dict) or name_key not in row:
+                continue
+
+            name = row[name_key]
+            amount = row.get(amount_key, 0)
+            if name is None or (skip_empty_names and not name) or not isinstance(amount, (int, float)):
+                continue
+
+            codes.append(distinct.setdefault(name, len(distinct)))
+            amounts.append(amount)
+
+        return cls(np.array(codes, dtype=np.int32), list(distinct), _amount_array(amounts, as_float))
+
+    @classmethod
+    def _from_columnar(cls, result: ColumnarResult, name_key: str, amount_key: str,
+                       as_float: bool, skip_empty_names: bool) -> 'AmountFrame':
+        if name_key not in result.columns or not result.is_categorical(name_key):
+            return cls(np.empty(0, dtype=np.int32), [], np.empty(0))
+
+        codes = result.codes(name_key)
+        names = result.categories(name_key)
+        keep = codes != NULL_CODE
+        if skip_empty_names:
+            empty = np.array([not name for name in names] + [True])
+            keep &= ~empty[codes]
+
+        amounts = result.columns.get(amount_key)
+        if amounts is None:
+            # A missing amount defaults to 0, as row.get(amount_key, 0) does
+            amounts = np.zeros(result.num_rows, dtype=np.int64)
+        elif result.is_categorical(amount_key) or amounts.dtype.kind == 'O':
+            # String codes are not dollars; keep the int and float values
+            # the list path keeps, and convert them the way it does
+            values = result.column(amount_key).tolist()
+            keep &= np.fromiter((isinstance(v, (int, float)) for v in values), dtype=bool, count=len(values))
+            kept = [v for v, k in zip(values, keep.tolist()) if k]
+            return cls(codes[keep], names, _amount_array(kept, as_float))
+        elif amounts.dtype.kind == 'b':
+            amounts = amounts.astype(np.int64)
+        elif amounts.dtype.kind == 'f':
+            keep &= ~np.isnan(amounts)
+
+        amounts = amounts[keep]
+        return cls(codes[keep], names, amounts.astype(np.float64) if as_float else amounts)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def take(self, indices: np.ndarray) -> 'AmountFrame':
+        """Frame with only the given rows, in the given order"""
+        frame = AmountFrame(self.codes[indices], self.names, self.amounts[indices])
+        frame._classes = self._classes
+        return frame
+
+    def name(self, index: int) -> str:
+        return self.names[self.codes[index]]
+
+    def name_bits(self, classify: Callable[[str], int]) -> np.ndarray:
+        """Per-row class bits, calling classify once per distinct name"""
+        bits = self._classes.get(classify)
+        if bits is None:
+            bits = np.fromiter((classify(name) for name in self.names), dtype=np.int64, count=len(self.names))
+            self._classes[classify] = bits
+
+        return bits[self.codes] if len(bits) else np.zeros(len(self.codes), dtype=np.int64)
+
+    def class_mask(self, matcher: KeywordMatcher, name: str,
+                   classify: Optional[Callable[[str], int]] = None) -> np.ndarray:
+        """Rows whose name falls in the matcher's class (classify defaults to the matcher's own)"""
+        return (self.name_bits(classify or matcher.classify_bits) & matcher.bits[name]) != 0
+
+    def records(self, indices: np.ndarray, **columns: np.ndarray) -> List[Dict[str, Any]]:
+        """[{'name', 'amount', **columns}] for the given rows, in order"""
+        names = [self.names[code] for code in self.codes[indices].tolist()]
+        amounts = self.amounts[indices].tolist()
+        if not columns:
+            return [{'name': name, 'amount': amount} for name, amount in zip(names, amounts)]
+
+        extra = [(key, values[indices].tolist()) for key, values in columns.items()]
+        records = []
+        for i, (name, amount) in enumerate(zip(names, amounts)):
+            record = {'name': name, 'amount': amount}
+            for key, values in extra:
+                record[key] = values[i]
+            records.append(record)
+        return records
+
+
+def _amount_array(amounts: List[Any], as_float: bool) -> np.ndarray:
+    """Amounts as float64, or as int64 when every amount is an int (so sums stay ints)"""
+    if as_float:
+        return np.array(amounts, dtype=np.float64)
+
+    array = np.array(amounts)
+    if array.dtype.kind == 'b':
+        return array.astype(np.int64)
+    if array.dtype.kind not in 'iuf':
+        return np.array(amounts, dtype=np.float64)
+    return array
+
+
+def running_total(values: np.ndarray):
+    """Left-to-right sum with the same rounding as sum(); 0 when empty"""
+    if values.size == 0:
+        return 0
+
+    total = np.cumsum(values)[-1]
+    return total.item() if isinstance(total, np.generic) else total
+
+
+def descending(values: np.ndarray) -> np.ndarray:
+    """Indices that sort values high to low, keeping ties in their original order"""
+    return np.argsort(-values, kind='stable')
@@ -0,0 +1,57 @@
+"""
+Per-session resources for the financial coach graph.
+
+A CoachContext bundles what one session's graph runs touch: its memory
+manager and the coaching analyzer. Nodes find it in
+config['configurable']['coach_context'] and fall back to the process
+default (the module-level singletons) when none is passed, so the CLI keeps
+working unchanged.
+
+A context's attributes are set once at construction and, by convention,
+never reassigned (nothing enforces it), so nodes read them without locking. The memory manager guards its own
+writes and the analyzer is stateless. The Snow Leopard client is not part
+of a context: it is shared process-wide and created under a lock in
+tools.snowleopard_tool.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from agents.coaching_analyzer import CoachingAnalyzer, coaching_analyzer
+from utils.memory_manager import MemoryManager, memory_manager
+
+logger = logging.getLogger(__name__)
+
+
+class CoachContext:
+    """Bundle of one session's memory and analyzer, set once at construction"""
+
+    __slots__ = ('session_id', 'memory', 'analyzer')
+
+    def __init__(self, session_id: str, memory: MemoryManager, analyzer: CoachingAnalyzer):
+        self.session_id = session_id
+        self.memory = memory
+        self.analyzer = analyzer
+
+    @classmethod
+    def for_session(cls, session_id: str) -> 'CoachContext':
+        """New context with its own memory; the analyzer is shared"""
+        return cls(session_id, MemoryManager(memory_type='state'), coaching_analyzer)
+
+    def as_config(self) -> Dict[str, Any]:
+        """LangGraph config that hands this context to the graph's nodes"""
+        return {'configurable': {'coach_context': self}}
+
+
+_default_context = CoachContext('default', memory_manager, coaching_analyzer)
+
+
+def default_context() -> CoachContext:
+    """Context backed by the module-level singletons, for single-user callers"""
+    return _default_context
+
+
+def context_from_config(config: Optional[Dict[str, Any]]) -> CoachContext:
+    """Get the context passed to a graph run, or the default one"""
+    configurable = (config or {}).get('configurable') or {}
+    return configurable.get('coach_context') or _default_context
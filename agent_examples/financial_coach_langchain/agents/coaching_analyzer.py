@@ -4,11 +4,109 @@ Transforms raw financial data into coaching insights, recommendations, and engag
 """
 
 import logging
-from typing import Dict, List, Any, Optional
-from statistics import mean
+from typing import Callable, Dict, List, Iterable, Optional
+
+import numpy as np
+
+from agents.analysis_engine import AmountFrame, descending, running_total
+from agents.trend_engine import SeriesTrend, TrendEngine
+from tools.merchant_index import get_merchant_index, merchant_key
+from utils.keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
+# Query wording -> analysis, checked in this order
+QUERY_TYPES = KeywordMatcher({
+    'merchant': ('merchant', 'where', 'most at', 'spent the most'),
+    'category': ('category', 'categories', 'spending by'),
+    'trend': ('trend', 'over time', 'month', 'week'),
+})
+
+# Category names that are money moving between accounts, not spending
+CATEGORY_TRANSFERS = ('paycheck', 'credit card', 'payment', 'transfer', 'deposit')
+
+# (keywords, share that could be saved, opportunity, action) - first match wins
+CATEGORY_RED_RULES = (
+    (('mortgage', 'rent'), 0.05,  # 5% with refinancing
+     'Refinancing or renegotiating lease', "Could save ${savings:,.0f}/month with refinancing"),
+    (('home improvement', 'renovation'), 0.50,  # 50% if deferred
+     'Defer non-essential projects', "Deferring 50% could save ${savings:,.0f}/month"),
+)
+CATEGORY_YELLOW_RULES = (
+    (('restaurant', 'dining', 'food & dining', 'fast food'), 0.30,  # 30% with meal prep
+     'Meal prep and home cooking', "Meal prep 2x/week could save ${savings:,.0f}/month"),
+    (('gas', 'fuel', 'auto'), 0.20,  # 20% with optimization
+     'Carpooling, EV, or route optimization', "Optimization could save ${savings:,.0f}/month"),
+    (('shopping',), 0.15,
+     'Budget discipline or list-based shopping', "Impulse control could save ${savings:,.0f}/month"),
+)
+
+MERCHANT_TRANSFERS = ('paycheck', 'credit card', 'mortgage payment', 'payment')
+MERCHANT_GROUPS = {
+    'restaurants': ('restaurant', 'dining', 'bar', 'cafe', 'coffee', 'pizza', 'burger', 'tacos', 'sushi'),
+    'fuel': ('gas', 'shell', 'bp', 'exxon', 'chevron', 'valero', 'conoco', 'quiktrip'),
+    'groceries': ('grocery', 'trader', 'whole foods', 'safeway', 'walmart', 'kroger', 'instacart'),
+    'entertainment': ('netflix', 'spotify', 'movie', 'theater', 'hulu', 'disney'),
+}
+
+CATEGORY_MATCHER = KeywordMatcher({
+    'transfers': CATEGORY_TRANSFERS,
+    **{f'rule_{i}': keywords for i, (keywords, _, _, _) in enumerate(CATEGORY_RED_RULES + CATEGORY_YELLOW_RULES)},
+})
+MERCHANT_MATCHER = KeywordMatcher({'transfers': MERCHANT_TRANSFERS, **MERCHANT_GROUPS})
+
+# The same classes keyed on a merchant's category from the local database,
+# in the same order so the bits line up with MERCHANT_MATCHER's. Mortgage
+# counts as a transfer, as the merchant rule's 'mortgage payment' does.
+MERCHANT_CATEGORY_MATCHER = KeywordMatcher({
+    'transfers': ('paycheck', 'credit card', 'mortgage', 'transfer', 'deposit'),
+    'restaurants': ('restaurant', 'dining', 'fast food', 'coffee', 'bars'),
+    'fuel': ('fuel',),
+    'groceries': ('groceries', 'grocery'),
+    'entertainment': ('entertainment', 'movies', 'music', 'television'),
+})
+
+MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December')
+
+# A slope under this share of the average per period counts as flat
+FLAT_TREND_SHARE = 0.01
+
+# A calendar month this many times the average counts as a seasonal peak
+SEASONAL_PEAK_RATIO = 1.25
+
+# A jump is only called a spike when it is also at least this big, in
+# dollars and as a share of the average period (a $2 price rise is not)
+SPIKE_MIN_AMOUNT = 50
+SPIKE_MIN_SHARE = 0.25
+
+# Buckets must span this many years before a year-over-year comparison is offered
+YEAR_OVER_YEAR_MIN_YEARS = 2
+
+
+def _trend_direction(slope: Optional[float], average: float) -> str:
+    if slope is None or abs(slope) <= abs(average) * FLAT_TREND_SHARE:
+        return 'flat'
+    return 'up' if slope > 0 else 'down'
+
+
+def _has_spike(series: SeriesTrend) -> bool:
+    """Whether the largest increase stands out from the noise and is big enough to matter"""
+    increase = series.max_increase
+    if increase is None or increase <= 2 * series.stdev:
+        return False
+    return increase >= SPIKE_MIN_AMOUNT and increase >= SPIKE_MIN_SHARE * abs(series.mean)
+
+
+def _seasonal_peak(series: SeriesTrend):
+    """(month name, ratio) of the strongest calendar month if it stands out, else None"""
+    seasonality = series.seasonality()
+    if not seasonality:
+        return None
+    
+    month, ratio = max(seasonality.items(), key=lambda item: item[1])
+    return (MONTH_NAMES[month], ratio) if ratio >= SEASONAL_PEAK_RATIO else None
+
 
 class CoachingAnalyzer:
     """Analyzes financial data and generates coaching insights"""
@@ -16,12 +114,13 @@ class CoachingAnalyzer:
     def __init__(self):
         self.logger = logger
     
-    def analyze(self, rows: List[Dict], query: str, analysis_context: Optional[Dict] = None) -> Dict:
+    def analyze(self, rows: Iterable, query: str, analysis_context: Optional[Dict] = None) -> Dict:
         """
         Route to appropriate analyzer based on query type
         
         Args:
-            rows: Raw data from Snow Leopard
+            rows: Raw data from Snow Leopard - a list of rows, or an iterator
+                of rows or row batches (consumed once)
             query: Original user query
             analysis_context: Additional context about the query
         
@@ -29,149 +128,92 @@ class CoachingAnalyzer:
             Dict with insights, recommendations, opportunities, follow-ups
         """
         
-        if not rows or not isinstance(rows, list):
+        if not rows or isinstance(rows, (str, dict)):
             return self._empty_coaching()
         
-        query_lower = query.lower()
-        
         # Determine query type
-        if any(word in query_lower for word in ['merchant', 'where', 'most at', 'spent the most']):
+        query_type = QUERY_TYPES.first_match(query)
+        
+        if query_type == 'merchant':
             return self.analyze_spending_by_merchant(rows)
         
-        elif any(word in query_lower for word in ['category', 'categories', 'spending by']):
+        elif query_type == 'category':
             return self.analyze_spending_by_category(rows)
         
-        elif any(word in query_lower for word in ['trend', 'over time', 'month', 'week']):
+        elif query_type == 'trend':
             return self.analyze_trends(rows)
         
         else:
             return self.generate_general_insights(rows)
 
 
-    def analyze_spending_by_category(self, rows: List[Dict]) -> Dict:
+    def analyze_spending_by_category(self, rows: Iterable) -> Dict:
         """
         Analyze spending by category and provide coaching
         Returns Red/Yellow/Green zones with recommendations
         """
-        if not rows or not isinstance(rows, list):
+        if not rows or isinstance(rows, (str, dict)):
             return self._empty_coaching()
         
         # Extract category data
-        categories = []
-        total_spending = 0
-        
-        for row in rows:
-            if not isinstance(row, dict):
-                continue
-            
-            # Get category name and amount
-            category_name = row.get('category_name', '')
-            amount = row.get('total_spending', 0)
-            
-            if not category_name or not isinstance(amount, (int, float)):
-                continue
-            
-            categories.append({
-                'name': category_name,
-                'amount': float(amount)
-            })
-            total_spending += float(amount)
-        
-        if not categories or total_spending == 0:
+        frame = AmountFrame.from_rows(rows, 'category_name', 'total_spending', as_float=True, skip_empty_names=True)
+        if not len(frame):
             return self._empty_coaching()
         
-        # Calculate percentages
-        categories_with_pct = []
-        for cat in categories:
-            pct = (cat['amount'] / total_spending * 100) if total_spending > 0 else 0
-            categories_with_pct.append({
-                'name': cat['name'],
-                'amount': cat['amount'],
-                'percentage': pct
-            })
+        total_spending = running_total(frame.amounts)
+        if total_spending == 0:
+            return self._empty_coaching()
         
-        # Sort by amount descending
-        categories_with_pct.sort(key=lambda x: x['amount'], reverse=True)
+        # Sort by amount descending and calculate percentages
+        ranked = frame.take(descending(frame.amounts))
+        amounts = ranked.amounts
+        percentages = amounts / total_spending * 100 if total_spending > 0 else np.zeros(len(amounts))
         
         # Identify zones: Red (>10%), Yellow (3-10%), Green (<3%)
-        red_zones = [c for c in categories_with_pct if c['percentage'] > 10]
-        yellow_zones = [c for c in categories_with_pct if 3 <= c['percentage'] <= 10]
-        green_zones = [c for c in categories_with_pct if c['percentage'] < 3]
+        red = percentages > 10
+        yellow = (percentages >= 3) & (percentages <= 10)
+        red_zones = ranked.records(np.flatnonzero(red), percentage=percentages)
+        yellow_zones = ranked.records(np.flatnonzero(yellow), percentage=percentages)
+        green_zones = ranked.records(np.flatnonzero(percentages < 3), percentage=percentages)
         
         # Filter out transfers for "real spending"
-        transfers = ['paycheck', 'credit card', 'payment', 'transfer', 'deposit']
-        real_categories = [c for c in categories_with_pct
-                        if not any(t in c['name'].lower() for t in transfers)]
-        real_spending = sum(c['amount'] for c in real_categories)
+        real = ~ranked.class_mask(CATEGORY_MATCHER, 'transfers')
+        real_spending = running_total(amounts[real])
         
-        # Generate opportunities
-        opportunities = []
+        # Match each red/yellow category to the first rule for its zone (-1 = none)
+        rules = CATEGORY_RED_RULES + CATEGORY_YELLOW_RULES
+        rule_index = np.full(len(ranked), -1)
+        for i in range(len(rules)):
+            zone = red if i < len(CATEGORY_RED_RULES) else yellow
+            rule_index[zone & (rule_index == -1) & ranked.class_mask(CATEGORY_MATCHER, f'rule_{i}')] = i
         
-        for cat in red_zones:
-            cat_lower = cat['name'].lower()
-            
-            if 'mortgage' in cat_lower or 'rent' in cat_lower:
-                savings = cat['amount'] * 0.05  # 5% with refinancing
-                opportunities.append({
-                    'category': cat['name'],
-                    'amount': cat['amount'],
-                    'percentage': cat['percentage'],
-                    'opportunity': 'Refinancing or renegotiating lease',
-                    'potential_savings': savings,
-                    'action': f"Could save ${savings:,.0f}/month with refinancing"
-                })
-            elif 'home improvement' in cat_lower or 'renovation' in cat_lower:
-                savings = cat['amount'] * 0.50  # 50% if deferred
-                opportunities.append({
-                    'category': cat['name'],
-                    'amount': cat['amount'],
-                    'percentage': cat['percentage'],
-                    'opportunity': 'Defer non-essential projects',
-                    'potential_savings': savings,
-                    'action': f"Deferring 50% could save ${savings:,.0f}/month"
-                })
-        
-        for cat in yellow_zones:
-            cat_lower = cat['name'].lower()
-            
-            if any(word in cat_lower for word in ['restaurant', 'dining', 'food & dining', 'fast food']):
-                savings = cat['amount'] * 0.30  # 30% with meal prep
-                opportunities.append({
-                    'category': cat['name'],
-                    'amount': cat['amount'],
-                    'percentage': cat['percentage'],
-                    'opportunity': 'Meal prep and home cooking',
-                    'potential_savings': savings,
-                    'action': f"Meal prep 2x/week could save ${savings:,.0f}/month"
-                })
-            elif any(word in cat_lower for word in ['gas', 'fuel', 'auto']):
-                savings = cat['amount'] * 0.20  # 20% with optimization
-                opportunities.append({
-                    'category': cat['name'],
-                    'amount': cat['amount'],
-                    'percentage': cat['percentage'],
-                    'opportunity': 'Carpooling, EV, or route optimization',
-                    'potential_savings': savings,
-                    'action': f"Optimization could save ${savings:,.0f}/month"
-                })
-            elif 'shopping' in cat_lower:
-                savings = cat['amount'] * 0.15
-                opportunities.append({
-                    'category': cat['name'],
-                    'amount': cat['amount'],
-                    'percentage': cat['percentage'],
-                    'opportunity': 'Budget discipline or list-based shopping',
-                    'potential_savings': savings,
-                    'action': f"Impulse control could save ${savings:,.0f}/month"
-                })
-        
-        # Sort opportunities by potential savings
-        opportunities.sort(key=lambda x: x['potential_savings'], reverse=True)
+        # Rule -1 picks the trailing 0.0, so unmatched categories save nothing
+        factors = np.array([factor for _, factor, _, _ in rules] + [0.0])
+        savings = amounts * factors[rule_index]
+        
+        # Generate opportunities, red zones first, sorted by potential savings
+        matched = rule_index >= 0
+        candidates = np.concatenate([np.flatnonzero(red & matched), np.flatnonzero(yellow & matched)])
+        candidates = candidates[descending(savings[candidates])]
+        
+        opportunities = []
+        for cat, index in zip(ranked.records(candidates, percentage=percentages), candidates.tolist()):
+            _, _, opportunity, action = rules[rule_index[index]]
+            potential_savings = savings[index].item()
+            opportunities.append({
+                'category': cat['name'],
+                'amount': cat['amount'],
+                'percentage': cat['percentage'],
+                'opportunity': opportunity,
+                'potential_savings': potential_savings,
+                'action': action.format(savings=potential_savings)
+            })
+        total_opportunity = running_total(savings[candidates])
         
         # Generate insights
         insights = []
         
-        if real_categories:
+        if real.any():
             insights.append(f"💰 Real Monthly Spending: ${real_spending:,.0f} (excluding transfers)")
         
         if red_zones:
@@ -179,7 +221,6 @@ class CoachingAnalyzer:
             insights.append(f"🔴 Highest Expense: {top_red['name']} @ ${top_red['amount']:,.0f} ({top_red['percentage']:.1f}% of total)")
 
         if opportunities:
-            total_opportunity = sum(o['potential_savings'] for o in opportunities)
             insights.append(f"💡 Found {len(opportunities)} optimization opportunities totaling ${total_opportunity:,.0f}/month savings")
 
         if yellow_zones:
@@ -224,66 +265,47 @@ class CoachingAnalyzer:
             'insights': insights,
             'recommendations': recommendations,
             'follow_up_questions': follow_ups,
-            'total_opportunity': sum(o['potential_savings'] for o in opportunities) if opportunities else 0
+            'total_opportunity': total_opportunity
         }
 
     
-    def analyze_spending_by_merchant(self, rows: List[Dict]) -> Dict:
+    def analyze_spending_by_merchant(self, rows: Iterable) -> Dict:
         """
         Analyze spending by merchant and provide coaching
+        Rows are read in a single pass; each distinct merchant is classified
+        once, by its category in the local database when it has one.
         """
         
-        # Extract merchant data
-        merchants = []
-        total_spending = 0
+        frame = AmountFrame.from_rows(rows, 'merchant_name', 'total_spent')
+        if not len(frame):
+            return self._empty_coaching()
         
-        for row in rows:
-            if not isinstance(row, dict):
-                continue
-            
-            if 'merchant_name' not in row:
-                continue
-            
-            amount = row.get('total_spent', 0)
-            if isinstance(amount, (int, float)):
-                merchants.append({
-                    'name': row['merchant_name'],
-                    'amount': amount
-                })
-                total_spending += amount
-        
-        if not merchants or total_spending == 0:
+        total_spending = running_total(frame.amounts)
+        if total_spending == 0:
             return self._empty_coaching()
         
+        classify = self._merchant_classifier()
+        
         # Filter out transfers
-        transfers = ['paycheck', 'credit card', 'mortgage payment', 'payment']
-        real_merchants = [m for m in merchants 
-                         if not any(t in m['name'].lower() for t in transfers)]
-        real_spending = sum(m['amount'] for m in real_merchants)
+        real = ~frame.class_mask(MERCHANT_MATCHER, 'transfers', classify)
+        real_spending = running_total(frame.amounts[real])
         
         # Categorize merchants
-        restaurants = [m for m in real_merchants if any(
-            x in m['name'].lower() for x in ['restaurant', 'dining', 'bar', 'cafe', 'coffee', 'pizza', 'burger', 'tacos', 'sushi']
-        )]
-        
-        fuel = [m for m in real_merchants if any(
-            x in m['name'].lower() for x in ['gas', 'shell', 'bp', 'exxon', 'chevron', 'valero', 'conoco', 'quiktrip']
-        )]
-        
-        groceries = [m for m in real_merchants if any(
-            x in m['name'].lower() for x in ['grocery', 'trader', 'whole foods', 'safeway', 'walmart', 'kroger', 'instacart']
-        )]
-        
-        entertainment = [m for m in real_merchants if any(
-            x in m['name'].lower() for x in ['netflix', 'spotify', 'movie', 'theater', 'hulu', 'disney']
-        )]
+        groups = {group: np.flatnonzero(real & frame.class_mask(MERCHANT_MATCHER, group, classify))
+                  for group in MERCHANT_GROUPS}
+        restaurants = frame.records(groups['restaurants'])
+        fuel = frame.records(groups['fuel'])
+        groceries = frame.records(groups['groceries'])
+        entertainment = frame.records(groups['entertainment'])
+        
+        restaurant_total = running_total(frame.amounts[groups['restaurants']])
+        grocery_total = running_total(frame.amounts[groups['groceries']])
+        fuel_total = running_total(frame.amounts[groups['fuel']])
+        ent_total = running_total(frame.amounts[groups['entertainment']])
         
         # Generate insights
         insights = []
         
-        restaurant_total = sum(m['amount'] for m in restaurants)
-        grocery_total = sum(m['amount'] for m in groceries)
-        
         insights.append(f"💰 Real Spending (excluding transfers): ${real_spending:,.0f}")
         
         if restaurants:
@@ -293,14 +315,12 @@ class CoachingAnalyzer:
                 insights.append(f"   Ratio to groceries: {ratio:.1f}:1 (eating out {ratio:.1f}x more than buying groceries)")
         
         if fuel:
-            fuel_total = sum(m['amount'] for m in fuel)
             insights.append(f"⛽ Fuel: ${fuel_total:,.0f} across {len(fuel)} stations")
         
         if groceries:
             insights.append(f"🛒 Groceries: ${grocery_total:,.0f} (good control)")
         
         if entertainment:
-            ent_total = sum(m['amount'] for m in entertainment)
             insights.append(f"🎬 Entertainment: ${ent_total:,.0f}/month (subscriptions)")
         
         # Generate opportunities
@@ -317,7 +337,6 @@ class CoachingAnalyzer:
             })
         
         if fuel:
-            fuel_total = sum(m['amount'] for m in fuel)
             savings = fuel_total * 0.20
             opportunities.append({
                 'category': 'Fuel',
@@ -328,7 +347,6 @@ class CoachingAnalyzer:
             })
         
         if entertainment:
-            ent_total = sum(m['amount'] for m in entertainment)
             savings = ent_total * 0.30  # Cancel unused subscriptions
             opportunities.append({
                 'category': 'Entertainment',
@@ -342,7 +360,7 @@ class CoachingAnalyzer:
         recommendations = []
 
         if restaurants:
-            top_restaurant = max(restaurants, key=lambda x: x['amount'])
+            top_restaurant = restaurants[int(np.argmax(frame.amounts[groups['restaurants']]))]
             recommendations.append(f"Your top restaurant is {top_restaurant['name']} (${top_restaurant['amount']:,.0f}). Consider cooking that cuisine at home.")
 
         if opportunities:
@@ -371,19 +389,165 @@ class CoachingAnalyzer:
             'total_opportunity': sum(o['potential_savings'] for o in opportunities) if opportunities else 0
         }
     
-    def analyze_trends(self, rows: List[Dict]) -> Dict:
-        """Analyze spending trends over time"""
+    def _merchant_classifier(self) -> Callable[[str], int]:
+        """
+        Classify a merchant by its category in the local database when known,
+        falling back to keywords in its name
+        """
+        index = get_merchant_index()
+        categories = index.snapshot() if index else None
+        if not categories:
+            return MERCHANT_MATCHER.classify_bits
+        
+        def classify(name: str) -> int:
+            category = categories.get(merchant_key(name))
+            if category is None:
+                return MERCHANT_MATCHER.classify_bits(name)
+            return MERCHANT_CATEGORY_MATCHER.classify_bits(category)
+        
+        return classify
+    
+    def analyze_trends(self, rows: Iterable) -> Dict:
+        """
+        Analyze spending trends over time
+        Rows are time buckets (e.g. vw_monthly_spending), read in one pass;
+        with a category column each category is its own series.
+        """
+        
+        engine = TrendEngine().consume(rows)
+        if not engine.series:
+            insights = [
+                "📊 Trend analysis available with date-based queries",
+                "Try: 'Show my spending trend over last 3 months' or 'How much did I spend last month?'"
+            ]
+            
+            return {
+                'type': 'trends',
+                'insights': insights,
+                'recommendations': ["Provide date range for trend analysis"],
+                'follow_up_questions': ["Which time period would you like to analyze?"]
+            }
+        
+        if len(engine.series) == 1:
+            return self._single_series_trend(next(iter(engine.series.values())))
+        return self._multi_series_trend(engine.series)
+    
+    def _single_series_trend(self, series: SeriesTrend) -> Dict:
+        """Coaching for one spending series (e.g. total spending per month)"""
         
-        insights = [
-            "📊 Trend analysis available with date-based queries",
-            "Try: 'Show my spending trend over last 3 months' or 'How much did I spend last month?'"
-        ]
+        insights = []
+        recommendations = []
+        follow_ups = []
+        
+        slope = series.slope
+        direction = _trend_direction(slope, series.mean)
+        
+        if direction == 'up':
+            insights.append(f"📈 Spending is trending up about ${slope:,.0f} per period ({series.earliest_period} to {series.latest_period})")
+        elif direction == 'down':
+            insights.append(f"📉 Spending is trending down about ${-slope:,.0f} per period ({series.earliest_period} to {series.latest_period})")
+        else:
+            insights.append(f"➡️  Spending is roughly flat over {series.count} periods (avg ${series.mean:,.0f})")
+        
+        if series.latest_delta is not None:
+            previous = series.latest_value - series.latest_delta
+            change_pct = f" ({series.latest_delta / previous * 100:+.1f}%)" if previous else ""
+            insights.append(f"📅 {series.latest_period}: ${series.latest_value:,.0f}, {'+' if series.latest_delta >= 0 else '-'}${abs(series.latest_delta):,.0f} vs {series.previous_period}{change_pct}")
+        
+        rolling = series.rolling_mean
+        if rolling is not None and series.count > series.window:
+            insights.append(f"🔁 {series.window}-period average: ${rolling:,.0f} vs ${series.mean:,.0f} overall")
+        
+        if series.savings_rate is not None:
+            latest = series.latest_savings_rate
+            latest_text = f"; {latest * 100:.1f}% in {series.latest_period}" if latest is not None else ""
+            insights.append(f"💰 Savings rate: {series.savings_rate * 100:.1f}% of income{latest_text}")
+        
+        spike = _has_spike(series)
+        if spike:
+            insights.append(f"⚠️  Biggest jump: {series.max_increase_period} (+${series.max_increase:,.0f} vs the period before)")
+        
+        peak = _seasonal_peak(series)
+        if peak:
+            insights.append(f"🗓️  Spending tends to peak in {peak[0]} ({peak[1]:.1f}x a typical month)")
+        
+        # Recommendations
+        if rolling is not None and series.latest_value > rolling * 1.1:
+            recommendations.append(f"{series.latest_period} ran {(series.latest_value / rolling - 1) * 100:.0f}% above your {series.window}-period average (${rolling:,.0f}). Review what changed.")
+        
+        if direction == 'up':
+            recommendations.append(f"Set a monthly cap around ${rolling or series.mean:,.0f} to stop the upward trend.")
+        
+        if series.savings_rate is not None and series.savings_rate < 0.20:
+            recommendations.append(f"Aim to save at least 20% of income; you're at {series.savings_rate * 100:.1f}%.")
+        
+        if spike:
+            recommendations.append(f"Check whether the {series.max_increase_period} spike was a one-time expense.")
+        
+        # Follow-ups
+        if spike:
+            follow_ups.append(f"Which categories drove the spike in {series.max_increase_period}?")
+        follow_ups.append("Should we set a monthly spending cap?")
+        years = series.years
+        if years is not None and years >= YEAR_OVER_YEAR_MIN_YEARS:
+            follow_ups.append("Want to compare this year to last year?")
+        else:
+            follow_ups.append("Which categories are growing fastest?")
         
         return {
             'type': 'trends',
+            'series': [series.summary()],
             'insights': insights,
-            'recommendations': ["Provide date range for trend analysis"],
-            'follow_up_questions': ["Which time period would you like to analyze?"]
+            'recommendations': recommendations,
+            'follow_up_questions': follow_ups,
+            'opportunities': []
+        }
+    
+    def _multi_series_trend(self, series: Dict[str, SeriesTrend]) -> Dict:
+        """Coaching across several series (e.g. spending per category per month)"""
+        
+        # Transfers (paychecks, card payments) move money around; they are not spending trends
+        trending = [s for s in series.values()
+                    if s.slope is not None and not CATEGORY_MATCHER.matches(s.name, 'transfers')]
+        rising = sorted((s for s in trending if _trend_direction(s.slope, s.mean) == 'up'),
+                        key=lambda s: s.slope, reverse=True)
+        falling = sorted((s for s in trending if _trend_direction(s.slope, s.mean) == 'down'),
+                         key=lambda s: s.slope)
+        
+        insights = [f"📊 Tracked {len(series)} series over up to {max(s.count for s in series.values())} periods"]
+        
+        if rising:
+            top = ", ".join(f"{s.name} (+${s.slope:,.0f}/period)" for s in rising[:3])
+            insights.append(f"📈 Growing fastest: {top}")
+        
+        if falling:
+            top = ", ".join(f"{s.name} (-${-s.slope:,.0f}/period)" for s in falling[:3])
+            insights.append(f"📉 Shrinking: {top}")
+        
+        jumps = [s for s in trending if s.latest_delta is not None and s.latest_delta > 0]
+        if jumps:
+            biggest = max(jumps, key=lambda s: s.latest_delta)
+            insights.append(f"📅 Biggest latest increase: {biggest.name}, +${biggest.latest_delta:,.0f} in {biggest.latest_period}")
+        
+        recommendations = []
+        if rising:
+            top = rising[0]
+            recommendations.append(f"{top.name} is growing fastest; cap it near its {top.window}-period average of ${top.rolling_mean:,.0f}.")
+        if len(rising) > 1:
+            recommendations.append(f"Keep an eye on {rising[1].name}, which is also trending up.")
+        
+        follow_ups = []
+        if rising:
+            follow_ups.append(f"Want to see {rising[0].name} month by month?")
+        follow_ups.append("Should we set a budget for the categories that are growing?")
+        
+        return {
+            'type': 'trends',
+            'series': [s.summary() for s in series.values()],
+            'insights': insights,
+            'recommendations': recommendations,
+            'follow_up_questions': follow_ups,
+            'opportunities': []
         }
     
     def generate_general_insights(self, rows: List[Dict]) -> Dict:
@@ -2,26 +2,40 @@
 Financial Coach Agent - LangGraph Implementation
 
 Multi-node agent that:
-1. Enriches user queries with context
-2. Queries Snow Leopard for financial data
+0. Routes canned questions to precomputed local views
+1. Enriches user queries with context and, in parallel,
+2. Queries Snow Leopard (or the routed local view) for financial data
 3. Analyzes data and generates coaching insights
 4. Formats response with recommendations
 """
 
+import asyncio
 import logging
 import os
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langgraph.graph import StateGraph, START, END
 from pydantic import BaseModel, Field
 
-from tools.snowleopard_tool import query_snowleopard
-from agents.coaching_analyzer import coaching_analyzer
-from utils.memory_manager import memory_manager
+from tools.snowleopard_tool import query_snowleopard, query_snowleopard_async
+from agents.coach_context import context_from_config
+from agents.intent_router import local_intent, query_local_view
+from utils.keyword_matcher import KeywordMatcher
+from utils.result_store import detach_rows, release_rows, resolve_rows
+from utils.session_store import get_session_store
 
 logger = logging.getLogger(__name__)
 
+# Query wording flags set by enrich_query_node
+QUERY_CONTEXT = KeywordMatcher({
+    'has_date': ('month', 'week', 'year', 'quarter', 'last'),
+    'has_category': ('category', 'categories', 'spending'),
+    'has_merchant': ('merchant', 'where', 'store', 'restaurant'),
+})
+
 # ===== STATE DEFINITION =====
 
 class FinancialCoachState(BaseModel):
@@ -30,12 +44,16 @@ class FinancialCoachState(BaseModel):
     conversation_turn: int = Field(default=0, description="Conversation turn number")
     messages: list = Field(default_factory=list, description="Conversation history")
 
+    # Routing, decided once per turn by route_intent_node
+    canned_intent: Optional[str] = Field(default=None, description="Canned intent answered from a local view, if any")
+
     # Query enrichment
     enriched_query: str = Field(default="", description="Enriched version of query")
     analysis_context: Dict[str, Any] = Field(default_factory=dict, description="Query context")
 
     # Snow Leopard response
-    snowleopard_response: Dict[str, Any] = Field(default_factory=dict, description="Raw response from Snow Leopard SDK")
+    # Rows live in utils.result_store; this carries the handle and summary stats
+    snowleopard_response: Dict[str, Any] = Field(default_factory=dict, description="Snow Leopard response with a result handle instead of rows")
 
     # Coaching insights
     coaching_insights: Dict[str, Any] = Field(default_factory=dict, description="Coaching analysis and recommendations")
@@ -48,6 +66,25 @@ class FinancialCoachState(BaseModel):
 
 # ===== NODE DEFINITIONS =====
 
+def _use_columnar_rows() -> bool:
+    """Whether nodes should carry rows as a ColumnarResult (SNOWLEOPARD_COLUMNAR_ROWS)"""
+    return os.getenv('SNOWLEOPARD_COLUMNAR_ROWS', 'False').lower() == 'true'
+
+
+def route_intent_node(state: FinancialCoachState) -> Dict:
+    """
+    Node 0: Decide once per turn whether a local view answers the query
+    Enrichment and retrieval both read the result from state
+    """
+    intent = local_intent(state.current_query)
+    if intent:
+        logger.info(f"[Turn {state.conversation_turn}] Routed to local view: {intent}")
+
+    return {
+        'canned_intent': intent
+    }
+
+
 def enrich_query_node(state: FinancialCoachState) -> Dict:
     """
     Node 1: Enrich the user query with context
@@ -55,13 +92,8 @@ def enrich_query_node(state: FinancialCoachState) -> Dict:
     """
     logger.info(f"[Turn {state.conversation_turn}] Enriching query: {state.current_query}")
 
-    query = state.current_query.lower()
-    context = {
-        'has_date': any(word in query for word in ['month', 'week', 'year', 'quarter', 'last']),
-        'has_category': any(word in query for word in ['category', 'categories', 'spending']),
-        'has_merchant': any(word in query for word in ['merchant', 'where', 'store', 'restaurant']),
-        'query_type': 'unknown'
-    }
+    context = {flag: QUERY_CONTEXT.matches(state.current_query, flag) for flag in QUERY_CONTEXT.class_names}
+    context['query_type'] = 'unknown'
 
     # Determine query type
     if context['has_category']:
@@ -71,6 +103,9 @@ def enrich_query_node(state: FinancialCoachState) -> Dict:
     elif context['has_date']:
         context['query_type'] = 'trend_analysis'
 
+    # High-confidence canned intent, answerable from a local view
+    context['canned_intent'] = state.canned_intent
+
     return {
         'enriched_query': state.current_query,
         'analysis_context': context
@@ -85,10 +120,10 @@ def query_snowleopard_node(state: FinancialCoachState) -> Dict:
     logger.info(f"[Turn {state.conversation_turn}] Querying with Snow Leopard")
 
     # Query Snow Leopard
-    response = query_snowleopard(state.current_query)
+    response = detach_rows(query_snowleopard(state.current_query, columnar=_use_columnar_rows()))
 
     if response.get('success'):
-        logger.info(f"✓ Snow Leopard returned {len(response.get('rows', []))} rows in {response.get('execution_time_ms')}ms")
+        logger.info(f"✓ Snow Leopard returned {response.get('rows_returned', 0)} rows in {response.get('execution_time_ms')}ms")
     else:
         logger.warning(f"⚠️ Snow Leopard query failed: {response.get('error')}")
 
@@ -97,7 +132,72 @@ def query_snowleopard_node(state: FinancialCoachState) -> Dict:
     }
 
 
-def analyze_and_coach_node(state: FinancialCoachState) -> Dict:
+async def aquery_snowleopard_node(state: FinancialCoachState) -> Dict:
+    """
+    Node 2 (async): Query Snow Leopard for financial data
+    Used when the graph runs through ainvoke; awaits the pooled async client
+    """
+    logger.info(f"[Turn {state.conversation_turn}] Querying with Snow Leopard (async)")
+
+    response = detach_rows(await query_snowleopard_async(state.current_query, columnar=_use_columnar_rows()))
+
+    if response.get('success'):
+        logger.info(f"✓ Snow Leopard returned {response.get('rows_returned', 0)} rows in {response.get('execution_time_ms')}ms")
+    else:
+        logger.warning(f"⚠️ Snow Leopard query failed: {response.get('error')}")
+
+    return {
+        'snowleopard_response': response
+    }
+
+
+def query_local_view_node(state: FinancialCoachState) -> Dict:
+    """
+    Node 2 (local): Answer a canned intent from a precomputed local view
+    Falls back to Snow Leopard if the view cannot be read
+    """
+    intent = state.canned_intent
+    logger.info(f"[Turn {state.conversation_turn}] Answering {intent} from local view")
+
+    response = query_local_view(intent)
+
+    if not response.get('success'):
+        logger.warning("⚠️ Local view failed, falling back to Snow Leopard")
+        response = query_snowleopard(state.current_query, columnar=_use_columnar_rows())
+
+    return {
+        'snowleopard_response': detach_rows(response)
+    }
+
+
+async def aquery_local_view_node(state: FinancialCoachState) -> Dict:
+    """
+    Node 2 (local, async): Answer a canned intent from a precomputed local view
+    Reads the view off the event loop and falls back to the async Snow Leopard client
+    """
+    intent = state.canned_intent
+    logger.info(f"[Turn {state.conversation_turn}] Answering {intent} from local view (async)")
+
+    response = await asyncio.to_thread(query_local_view, intent)
+
+    if not response.get('success'):
+        logger.warning("⚠️ Local view failed, falling back to Snow Leopard")
+        response = await query_snowleopard_async(state.current_query, columnar=_use_columnar_rows())
+
+    return {
+        'snowleopard_response': detach_rows(response)
+    }
+
+
+def route_query(state: FinancialCoachState) -> str:
+    """Send canned intents to the local views and everything else to Snow Leopard"""
+    if state.canned_intent:
+        return "query_local_view"
+
+    return "query_snowleopard"
+
+
+def analyze_and_coach_node(state: FinancialCoachState, config: RunnableConfig = None) -> Dict:
     """
     Node 3: Analyze financial data and generate coaching insights
     Transforms raw Snow Leopard SDK response into:
@@ -114,14 +214,24 @@ def analyze_and_coach_node(state: FinancialCoachState) -> Dict:
         logger.warning("Skipping coaching analysis - no successful data")
         return {'coaching_insights': {}}
 
-    rows = response.get('rows', [])
-
-    # Use coaching analyzer
-    coaching_insights = coaching_analyzer.analyze(
-        rows=rows,
-        query=state.current_query,
-        analysis_context=state.analysis_context
-    )
+    try:
+        rows = resolve_rows(response)
+        if rows is None:
+            return {
+                'coaching_insights': {},
+                'snowleopard_response': {**response, 'success': False,
+                                         'error': "Query result expired before it could be analyzed; please ask again"}
+            }
+
+        # Use the session's coaching analyzer
+        coaching_insights = context_from_config(config).analyzer.analyze(
+            rows=rows,
+            query=state.current_query,
+            analysis_context=state.analysis_context
+        )
+    finally:
+        # Nothing after this node reads the rows
+        release_rows(response)
 
     if coaching_insights.get('insights'):
         logger.info(f"✓ Generated {len(coaching_insights.get('insights', []))} insights")
@@ -131,76 +241,95 @@ def analyze_and_coach_node(state: FinancialCoachState) -> Dict:
     }
 
 
-def format_response_node(state: FinancialCoachState) -> Dict:
-    """
-    Node 4: Format response with coaching insights
-    Combines raw data with coaching to create engaging, actionable response
-    """
-    logger.info(f"[Turn {state.conversation_turn}] Formatting response")
+def _header_lines() -> List[str]:
+    return [
+        "",
+        "🤖 ╔" + "═" * 58 + "╗",
+        "   ║           💡 FINANCIAL COACHING INSIGHTS                 ║",
+        "   ╚" + "═" * 58 + "╝",
+        "",
+    ]
 
-    response_data = state.snowleopard_response
-    coaching = state.coaching_insights
-
-    # Build formatted response
-    lines = []
 
-    # Add section header
-    lines.append("")
-    lines.append("🤖 ╔" + "═" * 58 + "╗")
-    lines.append("   ║           💡 FINANCIAL COACHING INSIGHTS                 ║")
-    lines.append("   ╚" + "═" * 58 + "╝")
-    lines.append("")
+def format_response_sections(response_data: Dict, coaching: Dict) -> List[Tuple[str, List[str]]]:
+    """
+    Build the response body as ordered (section name, lines) pairs
+    Empty sections are left out; the header is built separately by _header_lines
+    """
+    sections = []
 
     # Add coaching insights
     if coaching.get('insights'):
-        lines.append("📊 YOUR SPENDING ANALYSIS")
-        lines.append("─" * 62)
+        lines = ["📊 YOUR SPENDING ANALYSIS", "─" * 62]
         for insight in coaching['insights']:
             lines.append(f"  {insight}")
         lines.append("")
+        sections.append(('insights', lines))
 
     # Add recommendations
     if coaching.get('recommendations'):
-        lines.append("💡 RECOMMENDATIONS FOR YOU")
-        lines.append("─" * 62)
+        lines = ["💡 RECOMMENDATIONS FOR YOU", "─" * 62]
         for i, rec in enumerate(coaching['recommendations'], 1):
             # Wrap long text
             lines.append(f"  {i}. {rec}")
         lines.append("")
+        sections.append(('recommendations', lines))
 
     # Add follow-up questions
     if coaching.get('follow_up_questions'):
-        lines.append("❓ LET'S DIVE DEEPER")
-        lines.append("─" * 62)
+        lines = ["❓ LET'S DIVE DEEPER", "─" * 62]
         for i, q in enumerate(coaching['follow_up_questions'], 1):
             lines.append(f"  {i}. {q}")
         lines.append("")
+        sections.append(('follow_up_questions', lines))
 
     # Add total opportunity (savings potential)
     if coaching.get('total_opportunity', 0) > 0:
-        lines.append("🎯 YOUR SAVINGS OPPORTUNITY")
-        lines.append("─" * 62)
-        lines.append(f"  💰 Total Potential Savings: ${coaching['total_opportunity']:,.0f}/month")
-        lines.append("")
+        sections.append(('total_opportunity', [
+            "🎯 YOUR SAVINGS OPPORTUNITY",
+            "─" * 62,
+            f"  💰 Total Potential Savings: ${coaching['total_opportunity']:,.0f}/month",
+            "",
+        ]))
 
     # Add execution metrics
     execution_time = response_data.get('execution_time_ms')
     if execution_time:
-        lines.append("⏱️  QUERY PERFORMANCE")
-        lines.append("─" * 62)
-        lines.append(f"  Executed in {execution_time:.0f}ms")
-        lines.append("")
+        sections.append(('performance', [
+            "⏱️  QUERY PERFORMANCE",
+            "─" * 62,
+            f"  Executed in {execution_time:.0f}ms",
+            "",
+        ]))
 
     # Add SQL if in debug mode
     if os.getenv('DEBUG', 'False').lower() == 'true':
         if response_data.get('sql'):
-            lines.append("📋 GENERATED SQL")
-            lines.append("─" * 62)
+            lines = ["📋 GENERATED SQL", "─" * 62]
             # Format SQL with indentation
             sql_lines = response_data['sql'].split('\n')
             for sql_line in sql_lines:
                 lines.append(f"  {sql_line}")
             lines.append("")
+            sections.append(('sql', lines))
+
+    return sections
+
+
+def format_response_node(state: FinancialCoachState, config: RunnableConfig = None) -> Dict:
+    """
+    Node 4: Format response with coaching insights
+    Combines raw data with coaching to create engaging, actionable response
+    """
+    logger.info(f"[Turn {state.conversation_turn}] Formatting response")
+
+    response_data = state.snowleopard_response
+    coaching = state.coaching_insights
+
+    # Build formatted response
+    lines = _header_lines()
+    for _, section_lines in format_response_sections(response_data, coaching):
+        lines.extend(section_lines)
 
     formatted_response = "\n".join(lines)
 
@@ -218,8 +347,9 @@ def format_response_node(state: FinancialCoachState) -> Dict:
     })
 
     # Add to memory
-    if memory_manager and memory_manager.initialized:
-        memory_manager.add_message(
+    memory = context_from_config(config).memory
+    if memory and memory.initialized:
+        memory.add_message(
             query=state.current_query,
             response=formatted_response,
             metadata=state.analysis_context
@@ -245,15 +375,26 @@ def create_financial_coach_graph():
     workflow = StateGraph(FinancialCoachState)
 
     # Add nodes
+    workflow.add_node("route", route_intent_node)
     workflow.add_node("enrich", enrich_query_node)
-    workflow.add_node("query_snowleopard", query_snowleopard_node)
+    # invoke() runs the blocking node, ainvoke() awaits the async one
+    workflow.add_node("query_snowleopard", RunnableLambda(
+        query_snowleopard_node, afunc=aquery_snowleopard_node, name="query_snowleopard"
+    ))
+    workflow.add_node("query_local_view", RunnableLambda(
+        query_local_view_node, afunc=aquery_local_view_node, name="query_local_view"
+    ))
     workflow.add_node("analyze_and_coach", analyze_and_coach_node)
     workflow.add_node("format_response", format_response_node)
 
     # Define edges
-    workflow.add_edge(START, "enrich")
-    workflow.add_edge("enrich", "query_snowleopard")
-    workflow.add_edge("query_snowleopard", "analyze_and_coach")
+    # Retrieval only needs the query and its route, so it runs alongside
+    # enrichment and both branches join before analysis
+    workflow.add_edge(START, "route")
+    workflow.add_edge("route", "enrich")
+    workflow.add_conditional_edges("route", route_query, ["query_local_view", "query_snowleopard"])
+    workflow.add_edge(["enrich", "query_local_view"], "analyze_and_coach")
+    workflow.add_edge(["enrich", "query_snowleopard"], "analyze_and_coach")
     workflow.add_edge("analyze_and_coach", "format_response")
     workflow.add_edge("format_response", END)
 
@@ -264,34 +405,173 @@ def create_financial_coach_graph():
     return app
 
 
-# Create the agent graph
-coach_graph = create_financial_coach_graph()
+# The agent graph is compiled on first use, not at import
+_coach_graph = None
+_coach_graph_lock = threading.Lock()
+
+
+def get_coach_graph():
+    """Compile the agent graph once and return the cached instance"""
+    global _coach_graph
+
+    graph = _coach_graph
+    if graph is not None:
+        return graph
+
+    with _coach_graph_lock:
+        if _coach_graph is None:
+            _coach_graph = create_financial_coach_graph()
+
+    return _coach_graph
+
+
+def __getattr__(name):
+    # Keep `from agents.financial_coach import coach_graph` working
+    if name == 'coach_graph':
+        return get_coach_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ===== APPLICATION BUILDERS =====
 
 def build_financial_coach_app():
     """Build and return the financial coach application"""
-    return coach_graph
+    return get_coach_graph()
 
 
-def invoke_financial_coach(app, user_query: str, session_id: str, conversation_turn: int):
-    """Invoke the financial coach with a user query"""
-    logger.info(f"Invoking financial coach: {user_query}")
+def _initial_state(user_query: str, conversation_turn: int, session_id: str = None) -> FinancialCoachState:
+    """Start a turn from the session's retained messages, if a session store is configured"""
+    store = get_session_store()
+    messages = store.load(session_id)['messages'] if store and session_id else []
 
-    # Create initial state
-    initial_state = FinancialCoachState(
+    return FinancialCoachState(
         current_query=user_query,
         conversation_turn=conversation_turn,
-        messages=[]
+        messages=messages
     )
 
+
+def _save_turn(session_id: str, initial_state: FinancialCoachState, result) -> None:
+    """Append only the messages this turn added to the session store"""
+    store = get_session_store()
+    if not store or not session_id or not result:
+        return
+
+    new_messages = result.get('messages', [])[len(initial_state.messages):]
+    store.append(session_id, new_messages)
+
+
+def invoke_financial_coach(app, user_query: str, session_id: str, conversation_turn: int,
+                           config: Optional[Dict[str, Any]] = None):
+    """Invoke the financial coach with a user query (config is passed through to LangGraph, e.g. callbacks)"""
+    logger.info(f"Invoking financial coach: {user_query}")
+
     # Invoke the graph
-    result = app.invoke(initial_state)
+    initial_state = _initial_state(user_query, conversation_turn, session_id)
+    result = app.invoke(initial_state, config=config)
+    _save_turn(session_id, initial_state, result)
     
-    logger.info(f"Financial coach invoked with result: {result}")
+    logger.info(f"Financial coach finished turn {conversation_turn} "
+                f"({result.get('snowleopard_response', {}).get('rows_returned', 0)} rows)")
+
+    return _result_to_dict(result, conversation_turn)
+
+
+async def ainvoke_financial_coach(app, user_query: str, session_id: str, conversation_turn: int,
+                                  config: Optional[Dict[str, Any]] = None):
+    """Invoke the financial coach from async code, awaiting Snow Leopard instead of blocking"""
+    logger.info(f"Invoking financial coach (async): {user_query}")
+
+    initial_state = await asyncio.to_thread(_initial_state, user_query, conversation_turn, session_id)
+    result = await app.ainvoke(initial_state, config=config)
+    await asyncio.to_thread(_save_turn, session_id, initial_state, result)
+
+    logger.info(f"Financial coach finished turn {conversation_turn} "
+                f"({result.get('snowleopard_response', {}).get('rows_returned', 0)} rows)")
+
+    return _result_to_dict(result, conversation_turn)
+
+
+class _StreamTranslator:
+    """Turns LangGraph stream chunks into response events for the CLI or an HTTP front end"""
+
+    def __init__(self, conversation_turn: int):
+        self.conversation_turn = conversation_turn
+        self.snowleopard_response: Dict[str, Any] = {}
+        self.result = None
+
+    def start(self) -> Dict[str, Any]:
+        return {'event': 'section', 'name': 'header', 'text': "\n".join(_header_lines())}
+
+    def translate(self, mode: str, chunk) -> List[Dict[str, Any]]:
+        if mode == "values":
+            self.result = chunk
+            return []
+
+        events = []
+        for node, update in chunk.items():
+            update = update or {}
+
+            if 'snowleopard_response' in update:
+                self.snowleopard_response = update['snowleopard_response']
+                events.append({'event': 'data', 'node': node, 'response': self.snowleopard_response})
+
+            # Every body section is known once analysis finishes; send them
+            # before format_response runs
+            if node == "analyze_and_coach":
+                for name, lines in format_response_sections(self.snowleopard_response,
+                                                             update.get('coaching_insights', {})):
+                    events.append({'event': 'section', 'name': name, 'text': "\n".join(lines)})
+
+        return events
+
+    def done(self) -> Dict[str, Any]:
+        return {'event': 'done', 'result': _result_to_dict(self.result or {}, self.conversation_turn)}
+
+
+def stream_financial_coach(app, user_query: str, session_id: str, conversation_turn: int,
+                           config: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the financial coach's response section by section
+
+    Yields events in order:
+        {'event': 'section', 'name': 'header', 'text': ...} immediately
+        {'event': 'data', 'node': ..., 'response': ...} when retrieval finishes
+        {'event': 'section', 'name': ..., 'text': ...} for each response section
+        {'event': 'done', 'result': ...} with the same dict invoke_financial_coach returns
+    """
+    logger.info(f"Streaming financial coach: {user_query}")
+
+    translator = _StreamTranslator(conversation_turn)
+    yield translator.start()
+
+    initial_state = _initial_state(user_query, conversation_turn, session_id)
+    for mode, chunk in app.stream(initial_state, config=config, stream_mode=["updates", "values"]):
+        yield from translator.translate(mode, chunk)
+
+    _save_turn(session_id, initial_state, translator.result)
+    yield translator.done()
+
+
+async def astream_financial_coach(app, user_query: str, session_id: str, conversation_turn: int,
+                                  config: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Async version of stream_financial_coach, built on astream"""
+    logger.info(f"Streaming financial coach (async): {user_query}")
+
+    translator = _StreamTranslator(conversation_turn)
+    yield translator.start()
+
+    initial_state = await asyncio.to_thread(_initial_state, user_query, conversation_turn, session_id)
+    async for mode, chunk in app.astream(initial_state, config=config, stream_mode=["updates", "values"]):
+        for event in translator.translate(mode, chunk):
+            yield event
+
+    await asyncio.to_thread(_save_turn, session_id, initial_state, translator.result)
+    yield translator.done()
+
 
-    # Convert result to dict for JSON serialization
+def _result_to_dict(result, conversation_turn: int) -> Dict:
+    """Convert graph output to dict for JSON serialization"""
     return {
         'current_query': result.get('current_query', ''),
         'enriched_query': result.get('enriched_query', ''),
@@ -0,0 +1,141 @@
+"""
+Intent Router - answers canned questions from precomputed local views
+
+Most questions are one of a few canned intents (spending by category, top
+merchants, monthly trend). data/transform_personal_finance.py already
+materializes those as views, so when a question clearly matches one of them
+it is answered from the local database and never leaves the box. Anything
+ambiguous or filtered (a month, a merchant, a category, a comparison) still
+goes to Snow Leopard: a question is only routed when every word in it is
+part of the canned phrasing or filler, and it names no merchant or category
+from the local database.
+"""
+
+import logging
+import re
+import time
+from typing import Dict, Any, Optional
+
+from tools.local_sql import get_local_sql
+from tools.merchant_index import get_merchant_index
+from utils.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+# Columns are aliased to the names CoachingAnalyzer reads
+INTENT_VIEWS = {
+    'category_analysis': (
+        "SELECT category_name, total_spent AS total_spending, transaction_count, avg_transaction "
+        "FROM vw_spending_by_category"
+    ),
+    'merchant_analysis': (
+        "SELECT merchant_name, category_name, total_spent, frequency "
+        "FROM vw_top_merchants"
+    ),
+    'trend_analysis': (
+        "SELECT month, total_expenses, total_income, transaction_count "
+        "FROM vw_monthly_spending"
+    ),
+}
+
+# Phrasings that map to exactly one view
+CANNED_PHRASES = {
+    'category_analysis': [
+        'spending by category', 'by category', 'categories',
+        'biggest expense category', 'biggest expenses', 'break down my spending',
+    ],
+    'merchant_analysis': [
+        'which merchants', 'top merchants', 'top spending merchants',
+        'spent the most at', 'spend the most at', 'where did i spend the most',
+    ],
+    'trend_analysis': [
+        'spending trends', 'spending trend', 'monthly spending', 'over time',
+    ],
+}
+
+_CANNED_MATCHER = KeywordMatcher(CANNED_PHRASES)
+
+# Words that do not narrow a canned question. Any other word (a month, a
+# number, "last", a merchant, a category, "income") makes the canned view
+# the wrong answer.
+_FILLER_WORDS = frozenset(
+    'a all am an and are at can did do does give has have how i is look me much my of on '
+    'overall please see show spend spending spent tell the what whats where which you your '
+    'break breakdown changed down expense expenses money'.split()
+)
+
+_CANNED_WORDS = frozenset(word for phrases in CANNED_PHRASES.values() for phrase in phrases for word in phrase.split())
+
+_ALLOWED_WORDS = _FILLER_WORDS | _CANNED_WORDS
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _has_extra_terms(text: str) -> bool:
+    """Whether the lowercased query has words beyond the canned phrasing and filler"""
+    return any(word not in _ALLOWED_WORDS for word in _WORD.findall(text.replace("'", "")))
+
+
+def route_intent(query: str) -> Optional[str]:
+    """
+    Classify a query into a canned intent with high confidence
+
+    Returns:
+        The intent name when exactly one intent matches and the query has no
+        other terms, otherwise None
+    """
+    text = query.lower()
+
+    matches = _CANNED_MATCHER.classify(text)
+    if len(matches) != 1 or _has_extra_terms(text):
+        return None
+
+    # Merchant and category names made only of allowed words still filter
+    index = get_merchant_index()
+    if index is not None and index.mentions(text):
+        return None
+
+    return next(iter(matches))
+
+
+def local_intent(query: str) -> Optional[str]:
+    """The canned intent to answer from a local view, or None if there is none or no local database"""
+    if get_local_sql() is None:
+        return None
+    return route_intent(query)
+
+
+def query_local_view(intent: str) -> Dict[str, Any]:
+    """Answer a canned intent from its view, in the same shape as query_snowleopard"""
+    start_time = time.time()
+    sql = INTENT_VIEWS[intent]
+
+    try:
+        local = get_local_sql()
+        if local is None:
+            raise ValueError("SNOWLEOPARD_LOCAL_DB not set")
+
+        rows = local.execute(sql)
+        logger.info(f"[IntentRouter] ✓ Answered {intent} from local view ({len(rows)} rows)")
+
+        return {
+            'success': True,
+            'rows': rows,
+            'sql': sql,
+            'execution_time_ms': round((time.time() - start_time) * 1000, 2),
+            'cached': False,
+            'source': 'local_view',
+            'message': ''
+        }
+
+    except Exception as e:
+        logger.error(f"[IntentRouter] ❌ Local view failed: {str(e)}")
+        return {
+            'success': False,
+            'error': str(e),
+            'rows': [],
+            'sql': sql,
+            'execution_time_ms': 0,
+            'cached': False,
+            'source': 'local_view'
+        }
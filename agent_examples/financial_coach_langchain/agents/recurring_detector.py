@@ -0,0 +1,253 @@
+"""
+Recurring-charge (subscription) detection over transaction streams.
+
+Transactions are hash-bucketed by (user, merchant, approximate amount), then
+each bucket's dates are sorted and the gaps between them checked against
+known cadences (weekly, biweekly, monthly, quarterly, annual). Work is a
+dict insert per transaction plus one sort per bucket, so a run is
+O(n log n), and a stream sorted by user only ever holds one user's
+transactions.
+
+Amount buckets are logarithmic, so "approximately the same amount" means
+the same within a relative tolerance at any price level. Each amount goes
+into two bucket grids offset by half a bucket, and a bucket is twice the
+tolerance wide: two charges within the tolerance are at most half a
+bucket apart, so they share a bucket on at least one grid even when they
+straddle a boundary. A bucket can also hold charges up to twice the
+tolerance apart. A merchant with no steady-amount series (a utility bill
+that varies month to month) is checked once more across all its amounts.
+"""
+
+
+import math
+from collections import defaultdict
+from datetime import date
+from itertools import groupby
+from statistics import median
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_AMOUNT_TOLERANCE = 0.10
+
+# Average days in a month, so cadences convert to a monthly cost
+DAYS_PER_MONTH = 365.25 / 12
+
+# name -> (nominal days, allowed gap range in days, minimum charges)
+CADENCES = {
+    'weekly': (7, (6, 8), 4),
+    'biweekly': (14, (12, 16), 3),
+    'monthly': (DAYS_PER_MONTH, (26, 35), 3),
+    'quarterly': (365.25 / 4, (85, 98), 4),
+    'annual': (365.25, (350, 380), 3),
+}
+
+# Share of gaps that must fall in the cadence's range
+MIN_REGULARITY = 0.75
+
+# A series is still active if its last charge is at most this many cadences old
+ACTIVE_WITHIN_PERIODS = 1.5
+
+
+def to_ordinal(value: Any) -> Optional[int]:
+    """Day number of a date, or of an ISO date string ('2019-09-30...'); None if unparseable"""
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str) and len(value) >= 10:
+        try:
+            return date.fromisoformat(value[:10]).toordinal()
+        except ValueError:
+            return None
+    return None
+
+
+def classify_cadence(ordinals: List[int]) -> Optional[Tuple[str, float]]:
+    """
+    (cadence name, regularity) for sorted charge dates, or None
+
+    Same-day duplicates are ignored. The cadence is the one whose gap range
+    holds the median gap; regularity is the share of gaps in that range.
+    """
+    days = [d for i, d in enumerate(ordinals) if i == 0 or d != ordinals[i - 1]]
+    if len(days) < 2:
+        return None
+
+    gaps = [b - a for a, b in zip(days, days[1:])]
+    typical = median(gaps)
+
+    for name, (_, (low, high), min_charges) in CADENCES.items():
+        if low <= typical <= high:
+            if len(days) < min_charges:
+                return None
+            regularity = sum(1 for gap in gaps if low <= gap <= high) / len(gaps)
+            return (name, regularity) if regularity >= MIN_REGULARITY else None
+
+    return None
+
+
+class RecurringChargeDetector:
+    """Finds recurring charges per user and merchant and prices them per month"""
+
+    def __init__(self, amount_tolerance: float = DEFAULT_AMOUNT_TOLERANCE, as_of: Optional[int] = None):
+        """
+        Args:
+            amount_tolerance: Relative difference under which two charges count
+                as the same amount
+            as_of: Day ordinal that "still active" is measured against
+                (default: each user's latest transaction)
+        """
+        self.amount_tolerance = amount_tolerance
+        self.as_of = as_of
+        # Half a bucket is the tolerance, see the module docstring
+        self._log_step = 2 * math.log1p(amount_tolerance)
+        self.users = 0
+        self.transactions = 0
+        self.skipped = 0
+
+    def _buckets(self, amount: float) -> Tuple[int, int]:
+        """The amount's bucket on each of the two half-offset grids"""
+        position = math.log(amount) / self._log_step
+        return math.floor(position), math.floor(position + 0.5)
+
+    def detect_user(self, user_id: Any, transactions: Iterable[Tuple[str, Any, float]]) -> List[Dict[str, Any]]:
+        """
+        Recurring charges for one user
+
+        Args:
+            transactions: (merchant, date, amount) tuples in any order; dates
+                are datetime.date or ISO strings, amounts are positive debits
+        """
+        buckets: Dict[Tuple[str, int, int], List[Tuple[int, float]]] = defaultdict(list)
+        by_merchant: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        latest = None
+
+        for merchant, when, amount in transactions:
+            day = to_ordinal(when)
+            if day is None or not merchant or not isinstance(amount, (int, float)) or amount <= 0:
+                self.skipped += 1
+                continue
+
+            self.transactions += 1
+            charge = (day, float(amount))
+            for grid, bucket in enumerate(self._buckets(amount)):
+                buckets[(merchant, grid, bucket)].append(charge)
+            by_merchant[merchant].append(charge)
+            latest = day if latest is None or day > latest else latest
+
+        self.users += 1
+        as_of = self.as_of if self.as_of is not None else latest
+
+        found: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for (merchant, _, _), charges in buckets.items():
+            charge = self._series(user_id, merchant, charges, as_of, amount_varies=False)
+            if charge and not self._duplicate(charge, found[merchant]):
+                found[merchant].append(charge)
+
+        # Bills whose amount moves around: one more look across all amounts
+        for merchant, charges in by_merchant.items():
+            if not found.get(merchant):
+                charge = self._series(user_id, merchant, charges, as_of, amount_varies=True)
+                if charge:
+                    found[merchant].append(charge)
+
+        results = [charge for charges in found.values() for charge in self._drop_coincidences(charges)]
+        results.sort(key=lambda c: c['monthly_cost'], reverse=True)
+        return results
+
+    def _series(self, user_id: Any, merchant: str, charges: List[Tuple[int, float]],
+                as_of: Optional[int], amount_varies: bool) -> Optional[Dict[str, Any]]:
+        """Describe one bucket's charges as a recurring series, or None if they are not periodic"""
+        if len(charges) < 2:
+            return None
+
+        charges.sort()
+        days = [day for day, _ in charges]
+        cadence = classify_cadence(days)
+        if cadence is None:
+            return None
+
+        name, regularity = cadence
+        period_days = CADENCES[name][0]
+        amounts = [amount for _, amount in charges]
+        typical_amount = median(amounts)
+
+        return {
+            'user_id': user_id,
+            'merchant': merchant,
+            'cadence': name,
+            'typical_amount': round(typical_amount, 2),
+            'min_amount': min(amounts),
+            'max_amount': max(amounts),
+            'amount_varies': amount_varies,
+            'monthly_cost': round(typical_amount * DAYS_PER_MONTH / period_days, 2),
+            'charges': len(charges),
+            'regularity': round(regularity, 2),
+            'first_charge': date.fromordinal(days[0]).isoformat(),
+            'last_charge': date.fromordinal(days[-1]).isoformat(),
+            'active': as_of is None or as_of - days[-1] <= ACTIVE_WITHIN_PERIODS * period_days,
+        }
+
+    def _duplicate(self, charge: Dict[str, Any], accepted: List[Dict[str, Any]]) -> bool:
+        """
+        Whether the same series was already found on the other grid
+
+        A series from one grid and from the other overlap in time and amount;
+        keep whichever covers more charges.
+        """
+        for i, other in enumerate(accepted):
+            same_amount = abs(charge['typical_amount'] - other['typical_amount']) <= \
+                self.amount_tolerance * max(charge['typical_amount'], other['typical_amount'])
+            overlaps = charge['first_charge'] <= other['last_charge'] and other['first_charge'] <= charge['last_charge']
+            if charge['cadence'] == other['cadence'] and same_amount and overlaps:
+                if charge['charges'] > other['charges']:
+                    accepted[i] = charge
+                return True
+        return False
+
+    @staticmethod
+    def _drop_coincidences(charges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Drop a merchant's series that overlap one of its more frequent series
+
+        A bill charged every month will now and then repeat an amount a year
+        later; that is the monthly bill, not a second, annual charge.
+        """
+        def overlaps(a, b):
+            return a['first_charge'] <= b['last_charge'] and b['first_charge'] <= a['last_charge']
+
+        return [
+            charge for charge in charges
+            if not any(CADENCES[other['cadence']][0] < CADENCES[charge['cadence']][0] and overlaps(charge, other)
+                       for other in charges)
+        ]
+
+    def detect_stream(self, rows: Iterable[Tuple[Any, str, Any, float]]) -> Iterator[Dict[str, Any]]:
+        """
+        Recurring charges for a stream of (user_id, merchant, date, amount)
+        rows sorted (or at least grouped) by user_id, one user at a time
+        """
+        for user_id, user_rows in groupby(rows, key=lambda row: row[0]):
+            yield from self.detect_user(user_id, ((merchant, when, amount) for _, merchant, when, amount in user_rows))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'users': self.users,
+            'transactions': self.transactions,
+            'skipped': self.skipped,
+            'amount_tolerance': self.amount_tolerance,
+        }
+
+
+def summarize_recurring(charges: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totals over detected charges; only active series count toward the monthly cost"""
+    active = [c for c in charges if c['active']]
+    by_cadence: Dict[str, int] = defaultdict(int)
+    for charge in active:
+        by_cadence[charge['cadence']] += 1
+
+    return {
+        'recurring_charges': len(charges),
+        'active': len(active),
+        'ended': len(charges) - len(active),
+        'users_with_recurring': len({c['user_id'] for c in charges}),
+        'active_monthly_cost': round(sum(c['monthly_cost'] for c in active), 2),
+        'by_cadence': dict(by_cadence),
+    }
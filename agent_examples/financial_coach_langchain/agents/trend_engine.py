@@ -0,0 +1,349 @@
+"""
+Single-pass trend statistics over time-bucketed rows.
+
+Rows such as vw_monthly_spending's (month, total_expenses, total_income) are
+read once. Each series keeps a fixed set of running sums, so memory per
+series is constant however many buckets it has:
+
+- month-over-month deltas, the latest one and the largest increase
+- a rolling mean of the newest buckets
+- a least-squares slope (spend change per bucket)
+- calendar-month seasonality
+- savings rate, when the rows carry income
+
+Rows may arrive oldest-first or newest-first (the views order by month
+DESC); the direction is detected per series and deltas always mean newer
+minus older. Rows with one series per category (a category_name column)
+are tracked as separate series.
+"""
+
+
+import math
+import re
+from collections import deque
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from utils.row_stream import iter_rows
+
+DEFAULT_WINDOW = 3
+
+PERIOD_KEYS = ('month', 'period', 'week', 'date', 'transaction_month', 'year')
+EXPENSE_KEYS = ('total_expenses', 'total_spent', 'total_spending', 'amount', 'total')
+INCOME_KEYS = ('total_income', 'income')
+SERIES_KEYS = ('category_name', 'merchant_name')
+
+TOTAL_SERIES = 'Total'
+
+# Buckets per year for each period label kind, so spans convert to years
+BUCKETS_PER_YEAR = {'day': 365.25, 'week': 365.25 / 7, 'month': 12, 'year': 1}
+
+_MONTH = re.compile(r'^(\d{4})-(\d{2})$')
+_DAY = re.compile(r'^(\d{4})-(\d{2})-(\d{2})')
+_WEEK = re.compile(r'^(\d{4})-W(\d{2})$')
+_YEAR = re.compile(r'^(\d{4})$')
+
+
+@lru_cache(maxsize=65536)
+def parse_period(value: Any) -> Optional[Tuple[int, Optional[int], Optional[str]]]:
+    """
+    Turn a bucket label into (ordinal, calendar month index or None, bucket kind)
+
+    Ordinals are consecutive for consecutive buckets of the same size
+    ('2019-01' and '2019-02' differ by 1, as do '2020-W53' and '2021-W01').
+    The kind is 'day', 'week', 'month' or 'year', or None for a bare integer.
+    Returns None for labels that are not a month, day, ISO week or year.
+    Memoized: every series repeats the same labels.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value, None, None
+    if not isinstance(value, str):
+        return None
+
+    value = value.strip()
+    match = _MONTH.match(value)
+    if match:
+        year, month = int(match.group(1)), int(match.group(2))
+        return year * 12 + month - 1, month - 1, 'month'
+
+    match = _DAY.match(value)
+    if match:
+        try:
+            day = date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            return None
+        return day.toordinal(), day.month - 1, 'day'
+
+    match = _WEEK.match(value)
+    if match:
+        try:
+            monday = date.fromisocalendar(int(match.group(1)), int(match.group(2)), 1)
+        except ValueError:
+            return None
+        return monday.toordinal() // 7, None, 'week'
+
+    match = _YEAR.match(value)
+    if match:
+        return int(match.group(1)), None, 'year'
+
+    return None
+
+
+class SeriesTrend:
+    """Running trend statistics for one series, updated one bucket at a time"""
+
+    __slots__ = (
+        'name', 'window', 'unit', 'count', 'total', '_mean', '_m2',
+        'earliest_period', 'latest_period', 'latest_value', '_latest_ord', '_earliest_ord',
+        '_prev_ord', '_prev_value', '_prev_period', 'direction', 'ordered',
+        'latest_delta', 'previous_period', '_latest_delta_ord',
+        'max_increase', 'max_increase_period', '_recent',
+        '_x0', '_sx', '_sy', '_sxx', '_sxy',
+        '_season_sum', '_season_count',
+        'income_total', 'expense_total_with_income', 'latest_income',
+    )
+
+    def __init__(self, name: str, window: int = DEFAULT_WINDOW, unit: Optional[str] = None):
+        self.name = name
+        self.window = window
+        self.unit = unit
+        self.count = 0
+        self.total = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+        self.earliest_period = None
+        self.latest_period = None
+        self.latest_value = None
+        self._latest_ord = None
+        self._earliest_ord = None
+
+        self._prev_ord = None
+        self._prev_value = None
+        self._prev_period = None
+        self.direction = 0
+        self.ordered = True
+
+        self.latest_delta = None
+        self.previous_period = None
+        self._latest_delta_ord = None
+        self.max_increase = None
+        self.max_increase_period = None
+        self._recent = deque(maxlen=window)
+
+        self._x0 = None
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+
+        self._season_sum = [0.0] * 12
+        self._season_count = [0] * 12
+
+        self.income_total = 0.0
+        self.expense_total_with_income = 0.0
+        self.latest_income = None
+
+    def add(self, period: str, ordinal: int, season: Optional[int], value: float,
+            income: Optional[float] = None):
+        """Fold in one bucket; buckets must arrive in either ascending or descending order"""
+        self.count += 1
+        self.total += value
+
+        # Welford's running variance
+        delta_mean = value - self._mean
+        self._mean += delta_mean / self.count
+        self._m2 += delta_mean * (value - self._mean)
+
+        if self._latest_ord is None or ordinal > self._latest_ord:
+            self._latest_ord, self.latest_period, self.latest_value = ordinal, period, value
+            self.latest_income = income
+        if self._earliest_ord is None or ordinal < self._earliest_ord:
+            self._earliest_ord, self.earliest_period = ordinal, period
+
+        self._add_delta(period, ordinal, value)
+
+        # The newest buckets: the last ones seen when ascending, the first ones when descending
+        if self.direction >= 0 or len(self._recent) < self.window:
+            self._recent.append(value)
+
+        # Least squares on x relative to the first ordinal, for numerical stability
+        if self._x0 is None:
+            self._x0 = ordinal
+        x = ordinal - self._x0
+        self._sx += x
+        self._sy += value
+        self._sxx += x * x
+        self._sxy += x * value
+
+        if season is not None:
+            self._season_sum[season] += value
+            self._season_count[season] += 1
+
+        if income is not None:
+            self.income_total += income
+            self.expense_total_with_income += value
+
+    def _add_delta(self, period: str, ordinal: int, value: float):
+        prev_ord, prev_value, prev_period = self._prev_ord, self._prev_value, self._prev_period
+        self._prev_ord, self._prev_value, self._prev_period = ordinal, value, period
+        if prev_ord is None or not self.ordered:
+            return
+
+        step = 1 if ordinal > prev_ord else -1 if ordinal < prev_ord else 0
+        if step == 0 or (self.direction and step != self.direction):
+            # Repeated or out-of-order buckets: deltas no longer mean anything
+            self.ordered = False
+            self.latest_delta = self.previous_period = self.max_increase = self.max_increase_period = None
+            return
+        self.direction = step
+
+        if step > 0:
+            newer_ord, newer_period, change, older_period = ordinal, period, value - prev_value, prev_period
+        else:
+            newer_ord, newer_period, change, older_period = prev_ord, prev_period, prev_value - value, period
+
+        if self._latest_delta_ord is None or newer_ord > self._latest_delta_ord:
+            self._latest_delta_ord = newer_ord
+            self.latest_delta = change
+            self.previous_period = older_period
+        if self.max_increase is None or change > self.max_increase:
+            self.max_increase = change
+            self.max_increase_period = newer_period
+
+    # ----- results -----
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    @property
+    def rolling_mean(self) -> Optional[float]:
+        """Mean of the newest `window` buckets"""
+        return sum(self._recent) / len(self._recent) if self._recent else None
+
+    @property
+    def slope(self) -> Optional[float]:
+        """Least-squares change per bucket, or None with fewer than two buckets"""
+        n = self.count
+        denominator = n * self._sxx - self._sx * self._sx
+        if n < 2 or denominator == 0:
+            return None
+        return (n * self._sxy - self._sx * self._sy) / denominator
+
+    @property
+    def span(self) -> int:
+        """Buckets between the earliest and latest period, inclusive"""
+        return self._latest_ord - self._earliest_ord + 1 if self.count else 0
+
+    @property
+    def years(self) -> Optional[float]:
+        """Years the buckets cover, or None when the bucket kind is unknown"""
+        per_year = BUCKETS_PER_YEAR.get(self.unit)
+        return self.span / per_year if per_year else None
+
+    def seasonality(self) -> Dict[int, float]:
+        """Calendar month index -> mean for that month / overall mean, for months seen in 2+ years"""
+        if not self.count or self._mean == 0:
+            return {}
+        return {
+            month: (self._season_sum[month] / self._season_count[month]) / self._mean
+            for month in range(12) if self._season_count[month] >= 2
+        }
+
+    @property
+    def savings_rate(self) -> Optional[float]:
+        """(income - expenses) / income over buckets that had income"""
+        if self.income_total <= 0:
+            return None
+        return (self.income_total - self.expense_total_with_income) / self.income_total
+
+    @property
+    def latest_savings_rate(self) -> Optional[float]:
+        if not self.latest_income or self.latest_income <= 0:
+            return None
+        return (self.latest_income - self.latest_value) / self.latest_income
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'series': self.name,
+            'unit': self.unit,
+            'buckets': self.count,
+            'earliest_period': self.earliest_period,
+            'latest_period': self.latest_period,
+            'latest_value': self.latest_value,
+            'previous_period': self.previous_period,
+            'latest_delta': self.latest_delta,
+            'mean': self.mean,
+            'stdev': self.stdev,
+            'rolling_mean': self.rolling_mean,
+            'slope': self.slope,
+            'max_increase': self.max_increase,
+            'max_increase_period': self.max_increase_period,
+            'seasonality': self.seasonality(),
+            'savings_rate': self.savings_rate,
+            'latest_savings_rate': self.latest_savings_rate,
+            'ordered': self.ordered,
+        }
+
+
+class TrendEngine:
+    """Per-series running trends over a stream of time-bucketed rows"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.window = window
+        self.series: Dict[str, SeriesTrend] = {}
+        self.period_key = None
+        self.expense_key = None
+        self.income_key = None
+        self.series_key = None
+        self.skipped = 0
+        self._detected = False
+
+    def _detect_columns(self, row: Dict[str, Any]):
+        """Pick the period, amount, income and series columns from the first row"""
+        self.period_key = next((k for k in PERIOD_KEYS if k in row), None)
+        self.expense_key = next((k for k in EXPENSE_KEYS if k in row), None)
+        self.income_key = next((k for k in INCOME_KEYS if k in row), None)
+        self.series_key = next((k for k in SERIES_KEYS if k in row), None)
+        self._detected = True
+
+    @property
+    def usable(self) -> bool:
+        """Whether the rows had a period and an amount column"""
+        return self.period_key is not None and self.expense_key is not None
+
+    def add_row(self, row: Dict[str, Any]):
+        if not self._detected:
+            self._detect_columns(row)
+        if not self.usable:
+            self.skipped += 1
+            return
+
+        parsed = parse_period(row.get(self.period_key))
+        value = row.get(self.expense_key)
+        if parsed is None or not isinstance(value, (int, float)) or isinstance(value, bool):
+            self.skipped += 1
+            return
+
+        income = row.get(self.income_key) if self.income_key else None
+        if not isinstance(income, (int, float)) or isinstance(income, bool):
+            income = None
+
+        ordinal, season, unit = parsed
+        name = str(row.get(self.series_key) or TOTAL_SERIES) if self.series_key else TOTAL_SERIES
+        series = self.series.get(name)
+        if series is None:
+            series = self.series[name] = SeriesTrend(name, self.window, unit)
+
+        period = str(row[self.period_key])
+        series.add(period, ordinal, season, float(value), float(income) if income is not None else None)
+
+    def consume(self, rows: Iterable) -> 'TrendEngine':
+        """Fold in rows (a list, or an iterator of rows or row batches) in one pass"""
+        for row in iter_rows(rows):
+            if isinstance(row, dict):
+                self.add_row(row)
+        return self
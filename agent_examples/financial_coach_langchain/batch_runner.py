@@ -0,0 +1,265 @@
+"""
+Snow Leopard Financial Coach - Batch Runner
+
+Runs a file of questions through the financial coach graph without the REPL.
+Questions are read from JSONL, answered on a thread or process pool, and
+written back as JSONL with per-node timings; a throughput/latency report is
+printed at the end. Intended for nightly regression runs.
+
+Input lines look like {"id": "q1", "question": "Show me my spending by category"}
+("query" is accepted in place of "question"; "id" defaults to the line number).
+A line that is not a JSON object is reported as a failed result instead of
+stopping the run. Each question gets its own conversation memory, so
+answers never depend on, or pile up behind, earlier questions.
+
+Usage:
+    python batch_runner.py questions.jsonl -o results.jsonl --workers 8
+    python batch_runner.py questions.jsonl --mode process --workers 4
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+_worker_app = None
+
+
+def read_questions(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield {'id', 'question'} records from a JSONL file, skipping blank lines
+
+    A malformed line yields {'id', 'question': None, 'error'} so it is
+    reported with the results.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Line {line_number}: invalid JSON ({e})")
+                yield {'id': line_number, 'question': None, 'error': f"Invalid JSON on line {line_number}: {e}"}
+                continue
+            if not isinstance(record, dict):
+                logger.warning(f"Line {line_number}: not a JSON object")
+                yield {'id': line_number, 'question': None,
+                       'error': f"Line {line_number} is a JSON {type(record).__name__}, not an object"}
+                continue
+
+            question = record.get('question') or record.get('query')
+            if not question:
+                logger.warning(f"Line {line_number}: no question, skipping")
+                continue
+
+            yield {'id': record.get('id', line_number), 'question': question}
+
+
+def _init_worker():
+    """Build the coach graph once per worker (forked workers inherit the parent's)"""
+    global _worker_app
+
+    if _worker_app is None:
+        from agents.financial_coach import build_financial_coach_app
+        _worker_app = build_financial_coach_app()
+
+
+def run_question(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer one question and return a JSON-serializable result line"""
+    if record.get('error'):
+        return {
+            'id': record['id'],
+            'question': record['question'],
+            'success': False,
+            'error': record['error'],
+            'total_ms': 0.0,
+            'node_timings_ms': {},
+        }
+
+    from agents.coach_context import CoachContext
+    from agents.financial_coach import invoke_financial_coach
+    from utils.node_timer import NodeTimer
+
+    timer = NodeTimer()
+    start = time.perf_counter()
+
+    try:
+        # No session_id: batch questions are independent and are not persisted.
+        # A fresh context keeps each answer out of the shared default memory.
+        config = CoachContext.for_session(f"batch-{record['id']}").as_config()
+        config['callbacks'] = [timer]
+        result = invoke_financial_coach(
+            _worker_app,
+            user_query=record['question'],
+            session_id=None,
+            conversation_turn=0,
+            config=config
+        )
+        response = result.get('snowleopard_response', {})
+        coaching = result.get('coaching_insights', {})
+
+        return {
+            'id': record['id'],
+            'question': record['question'],
+            'success': bool(response.get('success')),
+            'error': response.get('error'),
+            'query_type': result.get('analysis_context', {}).get('query_type'),
+            'rows_returned': response.get('rows_returned', 0),
+            'sql': response.get('sql', ''),
+            'cached': response.get('cached', False),
+            'source': response.get('source', 'snowleopard'),
+            'insights': coaching.get('insights', []),
+            'recommendations': coaching.get('recommendations', []),
+            'follow_up_questions': coaching.get('follow_up_questions', []),
+            'snowleopard_ms': response.get('execution_time_ms', 0),
+            'total_ms': round((time.perf_counter() - start) * 1000, 2),
+            'node_timings_ms': timer.timings_ms,
+        }
+
+    except Exception as e:
+        return {
+            'id': record['id'],
+            'question': record['question'],
+            'success': False,
+            'error': str(e),
+            'total_ms': round((time.perf_counter() - start) * 1000, 2),
+            'node_timings_ms': timer.timings_ms,
+        }
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(results: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """Throughput, end-to-end latency percentiles and per-node latency for a run"""
+    latencies = sorted(r['total_ms'] for r in results)
+    succeeded = sum(1 for r in results if r.get('success'))
+
+    node_times: Dict[str, List[float]] = {}
+    for r in results:
+        for node, ms in r.get('node_timings_ms', {}).items():
+            node_times.setdefault(node, []).append(ms)
+
+    return {
+        'questions': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'wall_seconds': round(wall_seconds, 2),
+        'throughput_qps': round(len(results) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        'latency_ms': {
+            'p50': _percentile(latencies, 50),
+            'p95': _percentile(latencies, 95),
+            'p99': _percentile(latencies, 99),
+            'max': latencies[-1] if latencies else 0.0,
+        },
+        'nodes_ms': {
+            node: {
+                'mean': round(sum(times) / len(times), 2),
+                'p95': _percentile(sorted(times), 95),
+            }
+            for node, times in node_times.items()
+        },
+    }
+
+
+def print_report(summary: Dict[str, Any]):
+    """Print the run summary as tables"""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+
+    table = Table(title="📈 Batch Run")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="green", justify="right")
+    table.add_row("Questions", str(summary['questions']))
+    table.add_row("Succeeded", str(summary['succeeded']))
+    table.add_row("Failed", str(summary['failed']))
+    table.add_row("Wall time (s)", f"{summary['wall_seconds']:.2f}")
+    table.add_row("Throughput (q/s)", f"{summary['throughput_qps']:.2f}")
+    for name, value in summary['latency_ms'].items():
+        table.add_row(f"Latency {name} (ms)", f"{value:.0f}")
+    console.print(table)
+
+    if summary['nodes_ms']:
+        nodes = Table(title="⏱️  Per-Node Latency")
+        nodes.add_column("Node", style="magenta")
+        nodes.add_column("Mean (ms)", style="green", justify="right")
+        nodes.add_column("p95 (ms)", style="yellow", justify="right")
+        for node, times in summary['nodes_ms'].items():
+            nodes.add_row(node, f"{times['mean']:.1f}", f"{times['p95']:.1f}")
+        console.print(nodes)
+
+
+def run_batch(input_path: str, output_path: str, workers: int, mode: str) -> Dict[str, Any]:
+    """Run every question in input_path and write one JSON line per result to output_path"""
+    records = list(read_questions(input_path))
+    logger.info(f"Running {len(records)} questions with {workers} {mode} workers")
+
+    # Build the graph before starting workers so forked processes don't each import it
+    _init_worker()
+    if mode == 'process':
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+    results = []
+    start = time.perf_counter()
+
+    with executor, open(output_path, 'w', encoding='utf-8') as out:
+        chunksize = max(1, len(records) // (workers * 4)) if mode == 'process' else 1
+        for result in executor.map(run_question, records, chunksize=chunksize):
+            out.write(json.dumps(result, default=str) + "\n")
+            results.append(result)
+
+    return summarize(results, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of questions through the financial coach")
+    parser.add_argument('input', help="JSONL file of questions")
+    parser.add_argument('-o', '--output', default='batch_results.jsonl', help="JSONL file to write results to")
+    parser.add_argument('-w', '--workers', type=int, default=int(os.getenv('BATCH_WORKERS', 4)),
+                        help="Number of concurrent workers")
+    parser.add_argument('--mode', choices=['thread', 'process'], default='thread',
+                        help="Run questions on threads (shared caches) or processes (isolated, CPU-parallel)")
+    parser.add_argument('--report', help="Also write the summary report as JSON to this file")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log every node at INFO")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    summary = run_batch(args.input, args.output, args.workers, args.mode)
+    print_report(summary)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -115,7 +115,7 @@ def transform_csv_to_sqlite(csv_file, db_name='finance_coach.db'):
     
     for idx, merchant in enumerate(unique_merchants, 1):
         # Try to infer category from merchant name and data
-        merchant_category = df[df['Description'] == merchant]['Category'].iloc
+        merchant_category = df[df['Description'] == merchant]['Category'].mode().iloc[0]
         category_id = category_mapping.get(merchant_category, 1)
         
         cursor.execute(
@@ -6,16 +6,21 @@ It provides a CLI interface where users can ask questions about their finances,
 and the app uses Snow Leopard to generate and execute SQL queries.
 """
 
+from utils.startup_profile import startup_profiler
+
+import argparse
 import os
 import sys
 from datetime import datetime
 from dotenv import load_dotenv
 from rich.console import Console
-from utils.memory_manager import memory_manager
 import logging
 
+startup_profiler.mark("import dotenv, rich")
+
 # Load environment variables
 load_dotenv()
+startup_profiler.mark("load .env")
 
 # Setup logging
 logging.basicConfig(
@@ -26,28 +31,95 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Import components
-from agents.financial_coach import build_financial_coach_app, invoke_financial_coach
-from utils.cli_formatter import print_header, print_result, print_error, print_debug_sql
+# LangGraph, LangChain and the Snow Leopard SDK are imported on first use
+# (see get_coach_app), so the prompt appears without waiting for them
+from utils.cli_formatter import print_header, print_section, print_execution_time, print_error, print_debug_sql, print_metrics_table, print_batch_results
 from utils.metrics import MetricsTracker
+from utils.result_cache import get_result_cache
+from utils.session_store import get_session_store
+from utils.result_store import get_result_store
+from tools.warmup import start_warmup, warmup_enabled
+
+startup_profiler.mark("import utils")
 
 console = Console()
 
+
+def _upstream_stats():
+    # Only report once the Snow Leopard tool has actually been loaded
+    if 'tools.snowleopard_tool' not in sys.modules:
+        return {}
+    from tools.snowleopard_tool import get_upstream_stats
+    return get_upstream_stats()
+
+
+def _get_prefetcher():
+    from tools.prefetcher import get_prefetcher
+    return get_prefetcher()
+
+
+def _running_prefetcher():
+    # The prefetcher if a turn already started one; never loads the SDK to find out
+    if 'tools.prefetcher' not in sys.modules:
+        return None
+    from tools.prefetcher import current_prefetcher
+    return current_prefetcher()
+
+
 # Global state
-metrics_tracker = MetricsTracker()
+metrics_tracker = MetricsTracker(upstream_stats=_upstream_stats)
 coach_app = None
-session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+warmup = None
+# Set SESSION_ID to resume a stored conversation across restarts
+session_id = os.getenv('SESSION_ID') or f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 conversation_turn = 0
+last_follow_ups = []
+
+# Example questions shown by 'help' and answered together by 'report'
+EXAMPLE_QUESTIONS = [
+    "Show me my spending by category",
+    "How much did I spend on groceries?",
+    "Show me my spending trends",
+    "Which merchants did I spend the most at?",
+    "Compare my spending this month vs last month",
+    "What's my biggest expense category?",
+    "Break down my spending by category",
+    "Show me transactions from January",
+]
+
+def get_coach_app():
+    """Import and compile the financial coach graph on first use; cached afterwards"""
+    global coach_app
+
+    if coach_app is None:
+        with startup_profiler.phase("import agents.financial_coach"):
+            from agents.financial_coach import build_financial_coach_app
+        with startup_profiler.phase("compile graph"):
+            coach_app = build_financial_coach_app()
+        logger.info("✓ Financial Coach graph compiled")
+
+    return coach_app
 
 def initialize_app():
     """Initialize the financial coach application"""
     print_header("💰 Snow Leopard Financial Coach")
     console.print("[dim]Powered by Snow Leopard, LangGraph, and real personal finance data[/dim]\n")
+    startup_profiler.mark("print header")
 
-    global coach_app
+    global conversation_turn
 
     try:
         logger.info("Initializing Financial Coach...")
-        coach_app = build_financial_coach_app()
+
+        store = get_session_store()
+        if store:
+            stored = store.load(session_id)
+            conversation_turn = stored['next_turn']
+            from utils.memory_manager import get_memory_manager
+            get_memory_manager().restore(stored['messages'])
+            if conversation_turn:
+                console.print(f"[dim]Resuming {session_id} at turn {conversation_turn}[/dim]")
+        startup_profiler.mark("open session store")
         logger.info("✓ Financial Coach initialized")
         console.print("[green]✓ Ready to help with your finances![/green]\n")
         return True
@@ -59,10 +131,12 @@ def initialize_app():
 
 def process_query(user_input: str):
     """Process a user query through the financial coach"""
-    global conversation_turn
+    global conversation_turn, last_follow_ups
 
     # Handle memory commands
     if user_input.lower() in ['memory', 'history', 'summary', 'stats']:
+        from utils.memory_manager import get_memory_manager
+        memory_manager = get_memory_manager()
         if memory_manager and memory_manager.initialized:
             summary = memory_manager.get_summary()
             print("\n" + "="*60)
@@ -78,26 +152,41 @@ def process_query(user_input: str):
             print("❌ Memory not initialized\n")
         return True
 
+    # A bare number picks one of the follow-ups from the last response
+    if user_input.isdigit() and 1 <= int(user_input) <= len(last_follow_ups):
+        user_input = last_follow_ups[int(user_input) - 1]
+        console.print(f"[dim]→ {user_input}[/dim]")
+
     try:
+        app = get_coach_app()
+        from agents.financial_coach import stream_financial_coach
+
+        prefetcher = _get_prefetcher()
+        if prefetcher:
+            prefetcher.on_user_query(user_input)
+
         logger.info(f"[Turn {conversation_turn}] Processing query: {user_input}")
 
-        # Invoke the coach
-        result = invoke_financial_coach(
-            coach_app,
+        # Stream the coach's response, printing each section as it is ready
+        result = {}
+        for event in stream_financial_coach(
+            app,
             user_query=user_input,
             session_id=session_id,
             conversation_turn=conversation_turn
-        )
+        ):
+            if event['event'] == 'section':
+                print_section(event['text'])
+            elif event['event'] == 'done':
+                result = event['result']
 
-        # Get response
-        response = result.get('formatted_response', 'No response generated')
         snowleopard_response = result.get('snowleopard_response', {})
+        print_execution_time(snowleopard_response.get('execution_time_ms'))
 
-        # Print response
-        print_result(
-            response,
-            execution_time_ms=snowleopard_response.get('execution_time_ms')
-        )
+        # Fetch the suggested follow-ups while the user reads
+        last_follow_ups = result.get('coaching_insights', {}).get('follow_up_questions', [])
+        if prefetcher:
+            prefetcher.prefetch(last_follow_ups)
 
         # Record metrics
         metrics_tracker.record_query(
@@ -121,12 +210,29 @@ def process_query(user_input: str):
 
 def main():
     """Main application loop"""
+    parser = argparse.ArgumentParser(description="Snow Leopard Financial Coach")
+    parser.add_argument('--startup-profile', action='store_true',
+                        help="Print import and initialization timings")
+    parser.add_argument('--warmup', action='store_true',
+                        help="Connect and pre-run common questions in the background (or SNOWLEOPARD_WARMUP_ENABLED=True)")
+    args = parser.parse_args()
+
+    # Runs while the banner prints and the user reads it
+    global warmup
+    if args.warmup or warmup_enabled():
+        warmup = start_warmup(EXAMPLE_QUESTIONS)
+
     # Initialize
     if not initialize_app():
         return 1
 
+    if args.startup_profile:
+        startup_profiler.print_report()
+    profile_first_query = args.startup_profile
+
     console.print("Commands:")
     console.print(" • Type your question to ask about your finances")
+    console.print(" • Type a follow-up's number (1, 2, 3) to ask it")
     console.print(" • Type 'memory' or 'summary' to see conversation summary")
     console.print(" • Type 'debug' to see query metrics")
     console.print(" • Type 'quit' or 'exit' to close\n")
@@ -144,26 +250,46 @@ def main():
                 # Handle special commands
                 if user_input.lower() in ['quit', 'exit']:
                     console.print("[yellow]Goodbye![/yellow]")
+                    prefetcher = _running_prefetcher()
+                    if prefetcher:
+                        prefetcher.shutdown()
                     break
 
                 if user_input.lower() == 'debug':
                     metrics_tracker.print_summary()
+                    cache = get_result_cache()
+                    if cache:
+                        print_metrics_table(cache.stats())
+                    prefetcher = _running_prefetcher()
+                    if prefetcher:
+                        print_metrics_table(prefetcher.stats())
+                    store = get_session_store()
+                    if store:
+                        print_metrics_table(store.stats())
+                    print_metrics_table(get_result_store().stats())
+                    if warmup:
+                        print_metrics_table(warmup.stats())
+                    continue
+
+                if user_input.lower() == 'report':
+                    from tools.snowleopard_tool import query_snowleopard_many
+                    results = query_snowleopard_many(EXAMPLE_QUESTIONS)
+                    for result in results:
+                        # Batch results carry their rows rather than a rows_returned count
+                        metrics_tracker.record_query(query=result['query'], response=result,
+                                                     rows_returned=len(result.get('rows') or []))
+                    print_batch_results(results)
                     continue
 
                 if user_input.lower() == 'help':
-                    console.print("""
+                    examples = "\n".join(f'"{q}"' for q in EXAMPLE_QUESTIONS)
+                    console.print(f"""
 [bold cyan]Financial Coach Commands:[/bold cyan]
-"Show me my spending by category"
-"How much did I spend on groceries?"
-"Show me my spending trends"
-"Which merchants did I spend the most at?"
-"Compare my spending this month vs last month"
-"What's my biggest expense category?"
-"Break down my spending by category"
-"Show me transactions from January"
+{examples}
 
 [bold cyan]Special Commands:[/bold cyan]
 debug - Show query metrics
+report - Run all example questions concurrently
 help - Show this help
 quit/exit - Exit the application
 """)
@@ -171,7 +297,14 @@ quit/exit - Exit the application
 
                 # Process query
                 console.print()
-                if not process_query(user_input):
+                if profile_first_query:
+                    with startup_profiler.phase("first query (total)"):
+                        ok = process_query(user_input)
+                    startup_profiler.print_report("🚀 Startup Profile (through first query)")
+                    profile_first_query = False
+                else:
+                    ok = process_query(user_input)
+                if not ok:
                     console.print("[yellow]Try again or type 'help' for assistance[/yellow]")
                 console.print()
 
@@ -0,0 +1,169 @@
+"""
+Columnar representation of query rows.
+
+Instead of one dict per row, each column is stored once as a typed NumPy
+array; string columns are dictionary-encoded (integer codes plus a list of
+distinct values). Rows are still available as dicts, built lazily on
+access, so existing callers that iterate rows keep working. A row read
+back has the same values and types as the row that went in: columns that
+would need a conversion (ints next to nulls or floats) stay object arrays.
+"""
+
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+NULL_CODE = -1
+
+
+class ColumnarResult:
+    """Typed column arrays with lazy row-dict access"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], dictionaries: Optional[Dict[str, List[str]]] = None,
+                 num_rows: int = 0):
+        self.columns = columns
+        self.dictionaries = dictionaries or {}
+        self.num_rows = num_rows
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> 'ColumnarResult':
+        """
+        Build column arrays from a list of row dicts
+
+        Raises:
+            TypeError: If a row is not a dict
+        """
+        rows = list(rows)
+        for index, row in enumerate(rows):
+            if not isinstance(row, dict):
+                raise TypeError(f"Row {index} is a {type(row).__name__}, not a dict")
+
+        names: Dict[str, None] = {}
+        for row in rows:
+            for name in row:
+                names.setdefault(name, None)
+
+        columns = {}
+        dictionaries = {}
+        for name in names:
+            values = [row.get(name) for row in rows]
+            array, dictionary = _encode_column(values)
+            columns[name] = array
+            if dictionary is not None:
+                dictionaries[name] = dictionary
+
+        return cls(columns, dictionaries, len(rows))
+
+    # ----- column access -----
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.columns)
+
+    def is_categorical(self, name: str) -> bool:
+        return name in self.dictionaries
+
+    def codes(self, name: str) -> np.ndarray:
+        """Integer codes of a dictionary-encoded column (-1 for null)"""
+        return self.columns[name]
+
+    def categories(self, name: str) -> List[str]:
+        """Distinct values of a dictionary-encoded column, indexed by code"""
+        return self.dictionaries[name]
+
+    def column(self, name: str) -> np.ndarray:
+        """Column as an array; dictionary-encoded columns are decoded to objects"""
+        array = self.columns[name]
+        if name not in self.dictionaries:
+            return array
+
+        lookup = np.array(self.dictionaries[name] + [None], dtype=object)
+        return lookup[array]
+
+    def numeric(self, name: str) -> np.ndarray:
+        """Column as float64, with NaN for nulls and non-numeric values"""
+        array = self.columns.get(name)
+        if array is None or name in self.dictionaries:
+            return np.full(self.num_rows, np.nan)
+        if array.dtype.kind in 'iufb':
+            return array.astype(np.float64, copy=False)
+
+        return np.array([v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+                         for v in array], dtype=np.float64)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the column arrays and dictionaries"""
+        total = sum(array.nbytes for array in self.columns.values())
+        total += sum(len(value) for values in self.dictionaries.values() for value in values)
+        return total
+
+    # ----- row access for existing callers -----
+
+    def _row(self, index: int) -> Dict[str, Any]:
+        row = {}
+        for name, array in self.columns.items():
+            value = array[index]
+            if name in self.dictionaries:
+                row[name] = self.dictionaries[name][value] if value != NULL_CODE else None
+            elif array.dtype.kind == 'f' and np.isnan(value):
+                row[name] = None
+            else:
+                row[name] = value.item() if isinstance(value, np.generic) else value
+        return row
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(self.num_rows):
+            yield self._row(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self.num_rows))]
+        if index < 0:
+            index += self.num_rows
+        if not 0 <= index < self.num_rows:
+            raise IndexError("row index out of range")
+        return self._row(index)
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Materialize all rows as dicts"""
+        return list(self)
+
+    def __repr__(self) -> str:
+        return f"ColumnarResult(rows={self.num_rows}, columns={self.column_names})"
+
+
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def _encode_column(values: List[Any]):
+    """Pick the narrowest array type for a column; returns (array, dictionary or None)"""
+    present = [v for v in values if v is not None]
+    has_nulls = len(present) != len(values)
+
+    if present and all(isinstance(v, bool) for v in present):
+        if not has_nulls:
+            return np.array(values, dtype=bool), None
+        return np.array(values, dtype=object), None
+
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        if not has_nulls and all(_INT64_MIN <= v <= _INT64_MAX for v in present):
+            return np.array(values, dtype=np.int64), None
+        # A float64 array would hand 5 back as 5.0
+        return np.array(values, dtype=object), None
+
+    if all(isinstance(v, float) for v in present):
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64), None
+
+    if all(isinstance(v, str) for v in present):
+        dictionary: Dict[str, int] = {}
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, v in enumerate(values):
+            codes[i] = NULL_CODE if v is None else dictionary.setdefault(v, len(dictionary))
+        return codes, list(dictionary)
+
+    return np.array(values, dtype=object), None
@@ -0,0 +1,171 @@
+"""
+Snow Leopard Financial Coach - Recurring Charges Report
+
+Scans the transactions table of the local database (built by
+data/transform_personal_finance.py) for recurring charges: subscriptions,
+bills and anything else charged on a weekly, biweekly, monthly, quarterly or
+annual cadence. Writes one JSON line per recurring charge and prints the
+biggest ones with their monthly cost. Transactions are streamed user by
+user, so the run's memory is bounded by the largest single user's history.
+
+Usage:
+    python recurring_report.py -o recurring.jsonl
+    python recurring_report.py --db data/finance_coach.db --user 1 --tolerance 0.05
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from agents.recurring_detector import (
+    DEFAULT_AMOUNT_TOLERANCE, RecurringChargeDetector, summarize_recurring, to_ordinal
+)
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB = os.path.join('data', 'finance_coach.db')
+FETCH_BATCH_SIZE = 10000
+
+TRANSACTIONS_SQL = '''
+SELECT t.user_id, m.merchant_name, t.transaction_date, t.amount
+FROM transactions t
+JOIN merchants m ON t.merchant_id = m.merchant_id
+WHERE t.transaction_type = 'debit' {user_filter}
+ORDER BY t.user_id
+'''
+
+
+def iter_transactions(conn: sqlite3.Connection, user_id: Optional[int] = None) -> Iterator[Tuple]:
+    """Stream (user_id, merchant, date, amount) debits grouped by user"""
+    if user_id is None:
+        cursor = conn.execute(TRANSACTIONS_SQL.format(user_filter=''))
+    else:
+        cursor = conn.execute(TRANSACTIONS_SQL.format(user_filter='AND t.user_id = ?'), (user_id,))
+
+    while True:
+        batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+        if not batch:
+            return
+        yield from batch
+
+
+def run_report(db_path: str, output_path: str, tolerance: float,
+               user_id: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Detect recurring charges in db_path and write one JSON line per charge to output_path"""
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    start = time.perf_counter()
+
+    try:
+        # "Still active" is measured against the newest transaction in the data, not today
+        latest = conn.execute('SELECT MAX(transaction_date) FROM transactions').fetchone()[0]
+        detector = RecurringChargeDetector(amount_tolerance=tolerance, as_of=to_ordinal(latest))
+
+        charges = []
+        with open(output_path, 'w', encoding='utf-8') as out:
+            for charge in detector.detect_stream(iter_transactions(conn, user_id)):
+                out.write(json.dumps(charge) + "\n")
+                charges.append(charge)
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        **detector.stats(),
+        **summarize_recurring(charges),
+        'as_of': latest,
+        'wall_seconds': round(elapsed, 2),
+        'transactions_per_second': round(detector.transactions / elapsed) if elapsed > 0 else 0,
+    }
+    return charges, summary
+
+
+def print_report(charges: List[Dict[str, Any]], summary: Dict[str, Any], top: int):
+    """Print the biggest recurring charges and the run summary as tables"""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+
+    table = Table(title=f"🔁 Top Recurring Charges (as of {summary['as_of']})")
+    table.add_column("User", style="cyan", justify="right")
+    table.add_column("Merchant", style="magenta")
+    table.add_column("Cadence", style="blue")
+    table.add_column("Amount", style="green", justify="right")
+    table.add_column("Per Month", style="green", justify="right")
+    table.add_column("Charges", justify="right")
+    table.add_column("Last", style="yellow")
+    table.add_column("Status")
+
+    for charge in sorted(charges, key=lambda c: (c['active'], c['monthly_cost']), reverse=True)[:top]:
+        amount = f"~${charge['typical_amount']:,.2f}" if charge['amount_varies'] else f"${charge['typical_amount']:,.2f}"
+        table.add_row(
+            str(charge['user_id']),
+            charge['merchant'],
+            charge['cadence'],
+            amount,
+            f"${charge['monthly_cost']:,.2f}",
+            str(charge['charges']),
+            charge['last_charge'],
+            "active" if charge['active'] else "[dim]ended[/dim]",
+        )
+    console.print(table)
+
+    totals = Table(title="📈 Recurring Charges Summary")
+    totals.add_column("Metric", style="cyan")
+    totals.add_column("Value", style="green", justify="right")
+    totals.add_row("Users", str(summary['users']))
+    totals.add_row("Debits scanned", f"{summary['transactions']:,}")
+    totals.add_row("Recurring charges", str(summary['recurring_charges']))
+    totals.add_row("Active / ended", f"{summary['active']} / {summary['ended']}")
+    totals.add_row("Active monthly cost", f"${summary['active_monthly_cost']:,.2f}")
+    for cadence, count in summary['by_cadence'].items():
+        totals.add_row(f"  {cadence}", str(count))
+    totals.add_row("Wall time (s)", f"{summary['wall_seconds']:.2f}")
+    totals.add_row("Debits/s", f"{summary['transactions_per_second']:,}")
+    console.print(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find recurring charges in the local transactions table")
+    parser.add_argument('--db', default=os.getenv('SNOWLEOPARD_LOCAL_DB') or DEFAULT_DB,
+                        help="SQLite database built by data/transform_personal_finance.py")
+    parser.add_argument('-o', '--output', default='recurring_charges.jsonl', help="JSONL file to write charges to")
+    parser.add_argument('--user', type=int, help="Only scan this user_id")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_AMOUNT_TOLERANCE,
+                        help="Relative amount difference that still counts as the same charge")
+    parser.add_argument('--top', type=int, default=20, help="Number of charges to print")
+    parser.add_argument('--report', help="Also write the summary as JSON to this file")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log at INFO")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db} (run data/transform_personal_finance.py first)")
+        return 1
+
+    charges, summary = run_report(args.db, args.output, args.tolerance, args.user)
+    print_report(charges, summary, args.top)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
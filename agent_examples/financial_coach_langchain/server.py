@@ -0,0 +1,462 @@
+"""
+Snow Leopard Financial Coach - HTTP Server
+
+Serves the coach graph to many concurrent sessions from one process. Each
+session gets its own memory, metrics and turn counter; turns within a
+session run one at a time. Blocking work (analysis, local SQLite, the
+session store) runs on a bounded thread pool, and requests beyond the
+concurrency limit wait in a bounded queue; once that is full the server
+answers 503 with Retry-After instead of piling up work. A request takes its
+session's turn before it queues for a slot, so one session's backlog waits
+on its own lock and never holds slots other sessions need.
+
+This is a plain ASGI application. Run it as a single process:
+    python server.py --port 8000
+    uvicorn server:app --port 8000
+
+Sessions (memory, turn lock, turn counter) live in the process that serves
+them. More than one process is only safe behind a load balancer that routes
+every /sessions/{session_id}/... request for a session to the same process;
+without that, one session could run two turns at once and split its
+history between processes. Request bodies over SERVER_MAX_BODY_BYTES get 413.
+
+Endpoints:
+    POST   /sessions/{session_id}/query    {"question": "..."}
+    POST   /sessions/{session_id}/stream   {"question": "..."}  (NDJSON events)
+    GET    /sessions/{session_id}/memory
+    GET    /sessions/{session_id}/metrics
+    DELETE /sessions/{session_id}
+    GET    /health
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from agents.coach_context import CoachContext
+from agents.financial_coach import build_financial_coach_app, ainvoke_financial_coach, astream_financial_coach
+from tools.snowleopard_tool import get_upstream_stats, close_async_client
+from utils.metrics import MetricsTracker
+from utils.session_store import get_session_store
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENT = 16
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_MAX_SESSION_PENDING = 4
+DEFAULT_BLOCKING_WORKERS = 8
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_SESSION_IDLE_SECONDS = 1800
+DEFAULT_MAX_BODY_BYTES = 64 * 1024
+
+_SESSION_PATH = re.compile(r'^/sessions/(?P<session_id>[A-Za-z0-9_.-]{1,128})(?:/(?P<action>query|stream|memory|metrics))?$')
+
+
+class Overloaded(Exception):
+    """Raised when the request queue, or one session's queue, is full"""
+
+
+class BodyTooLarge(Exception):
+    """Raised when a request body exceeds the configured maximum"""
+
+
+class AdmissionControl:
+    """Caps concurrent turns and the number of requests allowed to wait for one"""
+
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for a free slot; raises Overloaded if too many requests are already waiting"""
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded()
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+        try:
+            yield round((time.perf_counter() - queued_at) * 1000, 2)
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'in_flight': self.in_flight,
+            'queued': self.waiting,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+        }
+
+
+class CoachSession:
+    """Per-session coach context (memory, analyzer), metrics and turn counter"""
+
+    def __init__(self, session_id: str, conversation_turn: int = 0):
+        self.session_id = session_id
+        self.conversation_turn = conversation_turn
+        self.context = CoachContext.for_session(session_id)
+        self.metrics = MetricsTracker()
+        self.lock = asyncio.Lock()
+        self.pending = 0
+        self.last_seen = time.time()
+
+    @property
+    def busy(self) -> bool:
+        """Whether a turn is running or waiting; busy sessions are never evicted"""
+        return self.pending > 0
+
+    @asynccontextmanager
+    async def turn(self, max_pending: int = DEFAULT_MAX_SESSION_PENDING):
+        """Run turns one at a time; raises Overloaded if max_pending requests already hold or await the lock"""
+        if self.pending >= max_pending:
+            raise Overloaded()
+
+        self.pending += 1
+        try:
+            async with self.lock:
+                yield
+        finally:
+            self.pending -= 1
+
+
+class SessionRegistry:
+    """Live sessions, evicting idle ones and the least recently used beyond max_sessions"""
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 idle_seconds: float = DEFAULT_SESSION_IDLE_SECONDS):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._sessions: OrderedDict = OrderedDict()
+
+    async def get(self, session_id: str) -> CoachSession:
+        session = self._sessions.get(session_id)
+        if session is None:
+            self._evict()
+
+            # Pick up where a stored conversation left off
+            store = get_session_store()
+            stored = await asyncio.to_thread(store.load, session_id) if store else None
+
+            # Another request may have created it while we were loading
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = CoachSession(session_id, stored['next_turn'] if stored else 0)
+                if stored:
+                    session.context.memory.restore(stored['messages'])
+            self._sessions[session_id] = session
+
+        self._sessions.move_to_end(session_id)
+        session.last_seen = time.time()
+        return session
+
+    def peek(self, session_id: str) -> Optional[CoachSession]:
+        return self._sessions.get(session_id)
+
+    def remove(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def _evict(self):
+        cutoff = time.time() - self.idle_seconds
+        for session_id, session in list(self._sessions.items()):
+            if session.last_seen < cutoff and not session.busy:
+                del self._sessions[session_id]
+
+        # Least recently used first; a session with a turn in flight stays,
+        # or its next request would get a second lock and run concurrently
+        for session_id, session in list(self._sessions.items()):
+            if len(self._sessions) < self.max_sessions:
+                break
+            if not session.busy:
+                del self._sessions[session_id]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class CoachServer:
+    """ASGI application serving the financial coach to concurrent sessions"""
+
+    def __init__(self):
+        self.coach_app = None
+        self.admission = None
+        self.sessions = SessionRegistry(
+            max_sessions=int(os.getenv('SERVER_MAX_SESSIONS', DEFAULT_MAX_SESSIONS)),
+            idle_seconds=float(os.getenv('SERVER_SESSION_IDLE_SECONDS', DEFAULT_SESSION_IDLE_SECONDS)),
+        )
+        self.max_session_pending = int(os.getenv('SERVER_MAX_SESSION_PENDING', DEFAULT_MAX_SESSION_PENDING))
+        self.max_body_bytes = int(os.getenv('SERVER_MAX_BODY_BYTES', DEFAULT_MAX_BODY_BYTES))
+        self._executor = None
+
+    async def startup(self):
+        # Sync graph nodes and asyncio.to_thread run on the loop's default
+        # executor; bound it so blocking work cannot grow without limit
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('SERVER_BLOCKING_WORKERS', DEFAULT_BLOCKING_WORKERS)),
+            thread_name_prefix='coach'
+        )
+        asyncio.get_running_loop().set_default_executor(self._executor)
+
+        self.admission = AdmissionControl(
+            max_concurrent=int(os.getenv('SERVER_MAX_CONCURRENT', DEFAULT_MAX_CONCURRENT)),
+            max_queue=int(os.getenv('SERVER_MAX_QUEUE', DEFAULT_MAX_QUEUE)),
+        )
+        self.coach_app = build_financial_coach_app()
+        logger.info("✓ Financial Coach server ready")
+
+    async def shutdown(self):
+        await close_async_client()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        if self.coach_app is None:
+            await self.startup()
+
+        try:
+            await self._route(scope, receive, send)
+        except Overloaded:
+            await _send_json(send, 503, {'error': 'Server busy, retry shortly'}, headers=[(b'retry-after', b'1')])
+        except BodyTooLarge:
+            await _send_json(send, 413, {'error': f'Request body over {self.max_body_bytes} bytes'})
+        except Exception as e:
+            logger.error(f"Request failed: {e}", exc_info=True)
+            await _send_json(send, 500, {'error': str(e)})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _route(self, scope, receive, send):
+        method, path = scope['method'], scope['path'].rstrip('/')
+
+        if path == '/health' and method == 'GET':
+            await _send_json(send, 200, {
+                'status': 'ok',
+                'sessions': len(self.sessions),
+                'admission': self.admission.stats(),
+                'upstream': get_upstream_stats(),
+            })
+            return
+
+        match = _SESSION_PATH.match(path)
+        if not match:
+            await _send_json(send, 404, {'error': 'Not found'})
+            return
+
+        session_id, action = match.group('session_id'), match.group('action')
+
+        if action in ('query', 'stream') and method == 'POST':
+            body = await _read_json(scope, receive, self.max_body_bytes)
+            question = (body.get('question') or '').strip() if isinstance(body, dict) else ''
+            if not question:
+                await _send_json(send, 400, {'error': "Body must be JSON with a 'question'"})
+                return
+
+            if action == 'query':
+                await self._query(session_id, question, send)
+            else:
+                await self._stream(session_id, question, send)
+            return
+
+        if action in ('memory', 'metrics') and method == 'GET':
+            session = self.sessions.peek(session_id)
+            if session is None:
+                await _send_json(send, 404, {'error': 'Unknown session'})
+            elif action == 'memory':
+                await _send_json(send, 200, session.context.memory.get_summary())
+            else:
+                await _send_json(send, 200, session.metrics.get_stats())
+            return
+
+        if action is None and method == 'DELETE':
+            removed = self.sessions.remove(session_id)
+            store = get_session_store()
+            if store:
+                await asyncio.to_thread(store.delete, session_id)
+            await _send_json(send, 200, {'deleted': removed})
+            return
+
+        await _send_json(send, 405, {'error': 'Method not allowed'})
+
+    async def _query(self, session_id: str, question: str, send):
+        start = time.perf_counter()
+
+        session = await self.sessions.get(session_id)
+        async with session.turn(self.max_session_pending):
+            async with self.admission.slot() as queue_ms:
+                result = await ainvoke_financial_coach(
+                    self.coach_app,
+                    user_query=question,
+                    session_id=session_id,
+                    conversation_turn=session.conversation_turn,
+                    config=session.context.as_config()
+                )
+                session.conversation_turn += 1
+                session.metrics.record_query(
+                    query=question,
+                    response=result.get('snowleopard_response', {}),
+                    context=result.get('analysis_context')
+                )
+
+        await _send_json(send, 200, {
+            'session_id': session_id,
+            'conversation_turn': result.get('conversation_turn'),
+            'formatted_response': result.get('formatted_response', ''),
+            'coaching_insights': result.get('coaching_insights', {}),
+            'snowleopard_response': result.get('snowleopard_response', {}),
+            'queue_ms': queue_ms,
+            'total_ms': round((time.perf_counter() - start) * 1000, 2),
+        })
+
+    async def _stream(self, session_id: str, question: str, send):
+        session = await self.sessions.get(session_id)
+        async with session.turn(self.max_session_pending):
+            async with self.admission.slot() as queue_ms:
+                await send({
+                    'type': 'http.response.start',
+                    'status': 200,
+                    'headers': [(b'content-type', b'application/x-ndjson')],
+                })
+
+                try:
+                    async for event in astream_financial_coach(
+                        self.coach_app,
+                        user_query=question,
+                        session_id=session_id,
+                        conversation_turn=session.conversation_turn,
+                        config=session.context.as_config()
+                    ):
+                        if event['event'] == 'done':
+                            result = event['result']
+                            session.conversation_turn += 1
+                            session.metrics.record_query(
+                                query=question,
+                                response=result.get('snowleopard_response', {}),
+                                context=result.get('analysis_context')
+                            )
+                            event = {'event': 'done', 'queue_ms': queue_ms,
+                                     'conversation_turn': result.get('conversation_turn')}
+
+                        await _send_line(send, event)
+
+                except Exception as e:
+                    # Headers are already sent; report the failure in-band
+                    logger.error(f"Stream failed: {e}", exc_info=True)
+                    await _send_line(send, {'event': 'error', 'error': str(e)})
+
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+async def _read_json(scope, receive, max_bytes: int = DEFAULT_MAX_BODY_BYTES) -> Any:
+    """Parse the request body as JSON (None if invalid); raises BodyTooLarge past max_bytes"""
+    for name, value in scope.get('headers', []):
+        if name == b'content-length' and value.isdigit() and int(value) > max_bytes:
+            raise BodyTooLarge()
+
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > max_bytes:
+            raise BodyTooLarge()
+        if not message.get('more_body'):
+            break
+
+    try:
+        return json.loads(body or b'{}')
+    except ValueError:
+        return None
+
+
+async def _send_line(send, event: Dict[str, Any]):
+    line = json.dumps(event, default=str) + "\n"
+    await send({'type': 'http.response.body', 'body': line.encode('utf-8'), 'more_body': True})
+
+
+async def _send_json(send, status: int, payload: Dict[str, Any], headers=None):
+    body = json.dumps(payload, default=str).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode())] + (headers or []),
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+app = CoachServer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the financial coach over HTTP")
+    parser.add_argument('--host', default=os.getenv('SERVER_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('SERVER_PORT', 8000)))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('SERVER_PROCESSES', 1)),
+                        help="Server processes; more than 1 needs session-sticky routing in front")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if os.getenv('DEBUG') != 'True' else logging.DEBUG,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    if args.workers > 1:
+        logger.warning(f"Running {args.workers} processes: sessions live in one process each, so the load "
+                       f"balancer must route every request of a session to the same process")
+
+    try:
+        import uvicorn
+    except ImportError:
+        logger.error("uvicorn is required for server mode: pip install uvicorn")
+        return 1
+
+    uvicorn.run('server:app', host=args.host, port=args.port, workers=args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
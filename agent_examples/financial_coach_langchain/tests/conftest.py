@@ -0,0 +1,49 @@
+"""Shared fixtures; modules are imported from the project root, as main.py does"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def local_db(tmp_path, monkeypatch):
+    """
+    A small local database in the shape data/transform_personal_finance.py
+    writes, configured through SNOWLEOPARD_LOCAL_DB
+    """
+    import tools.local_sql
+    import tools.merchant_index
+
+    path = tmp_path / 'finance_coach.db'
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+    CREATE TABLE categories (category_id INTEGER PRIMARY KEY, category_name TEXT);
+    CREATE TABLE merchants (merchant_id INTEGER PRIMARY KEY, merchant_name TEXT, category_id INTEGER);
+    CREATE TABLE transactions (
+        transaction_id INTEGER PRIMARY KEY, user_id INTEGER, merchant_id INTEGER, category_id INTEGER,
+        transaction_date TEXT, amount REAL, transaction_type TEXT
+    );
+    INSERT INTO categories VALUES (1, 'Groceries'), (2, 'Television'), (3, 'Utilities');
+    INSERT INTO merchants VALUES (1, 'Whole Foods', 1), (2, 'Netflix', 2), (3, 'Gas Company', 3), (4, 'Top Spend', 1);
+    INSERT INTO transactions VALUES
+        (1, 1, 1, 1, '2019-01-05', 82.10, 'debit'),
+        (2, 1, 2, 2, '2019-01-07', 13.99, 'debit'),
+        (3, 1, 3, 3, '2019-01-15', 61.40, 'debit'),
+        (4, 1, 4, 1, '2019-01-20', 25.00, 'debit');
+    CREATE VIEW vw_monthly_spending AS
+        SELECT substr(transaction_date, 1, 7) AS month, SUM(amount) AS total_expenses,
+               0 AS total_income, COUNT(*) AS transaction_count
+        FROM transactions GROUP BY month ORDER BY month DESC;
+    ''')
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setenv('SNOWLEOPARD_LOCAL_DB', str(path))
+    monkeypatch.setenv('SNOWLEOPARD_PLAN_STORE_PATH', str(tmp_path / 'sql_plans.db'))
+    monkeypatch.setattr(tools.local_sql, '_executor', None)
+    monkeypatch.setattr(tools.merchant_index, '_index', None)
+    return path
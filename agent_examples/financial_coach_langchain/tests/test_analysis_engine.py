@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from agents.analysis_engine import AmountFrame
+from agents.coaching_analyzer import CoachingAnalyzer
+from models.columnar import ColumnarResult
+
+AMOUNT_COLUMNS = {
+    'ints': [120, 80, 45],
+    'floats': [120.5, 80.0, 45.25],
+    'ints with null': [120, None, 45],
+    'floats with null': [120.5, None, 45.25],
+    'strings': ['120.50', '80.00', '45.25'],
+    'strings with null': ['120.50', None, '45.25'],
+    'mixed': [120, '80.00', 45.25],
+    'mixed with null': [None, '80.00', 45],
+    'bools': [True, False, True],
+}
+
+MERCHANTS = ['Shell', 'Chipotle', 'Netflix']
+CATEGORIES = ['Auto & Transport', 'Food & Dining', 'Entertainment']
+
+
+def _frame_values(frame):
+    return [frame.name(i) for i in range(len(frame))], frame.amounts.tolist(), frame.amounts.dtype
+
+
+@pytest.mark.parametrize('as_float', [False, True])
+@pytest.mark.parametrize('kind', AMOUNT_COLUMNS)
+def test_columnar_frame_matches_list_frame(kind, as_float):
+    rows = [{'merchant_name': m, 'total_spent': a} for m, a in zip(MERCHANTS, AMOUNT_COLUMNS[kind])]
+
+    from_list = AmountFrame.from_rows(rows, 'merchant_name', 'total_spent', as_float=as_float)
+    from_columns = AmountFrame.from_rows(ColumnarResult.from_rows(rows), 'merchant_name', 'total_spent',
+                                         as_float=as_float)
+
+    assert _frame_values(from_columns) == _frame_values(from_list)
+
+
+@pytest.mark.parametrize('kind', AMOUNT_COLUMNS)
+def test_columnar_analysis_matches_list_analysis(kind):
+    analyzer = CoachingAnalyzer()
+    merchant_rows = [{'merchant_name': m, 'total_spent': a} for m, a in zip(MERCHANTS, AMOUNT_COLUMNS[kind])]
+    category_rows = [{'category_name': c, 'total_spending': a} for c, a in zip(CATEGORIES, AMOUNT_COLUMNS[kind])]
+
+    assert analyzer.analyze_spending_by_merchant(ColumnarResult.from_rows(merchant_rows)) == \
+        analyzer.analyze_spending_by_merchant(merchant_rows)
+    assert analyzer.analyze_spending_by_category(ColumnarResult.from_rows(category_rows)) == \
+        analyzer.analyze_spending_by_category(category_rows)
+
+
+def test_string_amounts_are_not_read_as_dictionary_codes():
+    rows = [{'merchant_name': 'Shell', 'total_spent': '120.50'}, {'merchant_name': 'Chipotle', 'total_spent': None}]
+    frame = AmountFrame.from_rows(ColumnarResult.from_rows(rows), 'merchant_name', 'total_spent')
+
+    assert len(frame) == 0
+    assert frame.amounts.dtype == np.float64
@@ -0,0 +1,40 @@
+import json
+
+import agents.financial_coach
+import batch_runner
+from agents.coach_context import context_from_config, default_context
+
+
+def test_malformed_lines_become_failed_results(tmp_path):
+    path = tmp_path / 'questions.jsonl'
+    path.write_text('\n'.join([
+        json.dumps({'id': 'q1', 'question': 'Show me my spending by category'}),
+        '{"id": "q2", "question": ',
+        '["not", "an", "object"]',
+        '',
+        json.dumps({'query': 'Top merchants'}),
+    ]))
+
+    records = list(batch_runner.read_questions(str(path)))
+
+    assert [r['id'] for r in records] == ['q1', 2, 3, 5]
+    assert [bool(r.get('error')) for r in records] == [False, True, True, False]
+    failed = batch_runner.run_question(records[1])
+    assert failed['success'] is False and 'line 2' in failed['error']
+
+
+def test_each_question_gets_its_own_memory(monkeypatch):
+    configs = []
+
+    def invoke(app, user_query, session_id, conversation_turn, config=None):
+        configs.append(config)
+        return {}
+
+    monkeypatch.setattr(agents.financial_coach, 'invoke_financial_coach', invoke)
+    for i in range(2):
+        assert batch_runner.run_question({'id': i, 'question': 'Top merchants'})['success'] is False
+
+    contexts = [context_from_config(config) for config in configs]
+    assert all('callbacks' in config for config in configs)
+    assert contexts[0].memory is not contexts[1].memory
+    assert default_context().memory not in [c.memory for c in contexts]
@@ -0,0 +1,37 @@
+import asyncio
+import threading
+
+from snowleopard.models import RetrieveResponse
+
+from tools.cassette import AsyncRecordingClient, ReplayClient
+
+
+class FakeAsyncClient:
+    async def retrieve(self, *, user_query, datafile_id=None):
+        return RetrieveResponse(callId='c1', responseStatus='SUCCESS', data=[])
+
+    async def close(self):
+        pass
+
+
+def test_async_recording_writes_off_the_event_loop(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cassette.jsonl.gz')
+    recorder = AsyncRecordingClient(FakeAsyncClient(), path)
+    write = recorder._write
+    writer_threads = []
+
+    def tracking_write(*args):
+        writer_threads.append(threading.get_ident())
+        write(*args)
+
+    monkeypatch.setattr(recorder, '_write', tracking_write)
+
+    async def record():
+        await recorder.retrieve(user_query='Top merchants', datafile_id='df')
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(record())
+
+    assert writer_threads and writer_threads[0] != loop_thread
+    replay = ReplayClient(path, latency=0)
+    assert replay.retrieve(user_query='top merchants', datafile_id='df').callId == 'c1'
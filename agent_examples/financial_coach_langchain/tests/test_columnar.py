@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from models.columnar import ColumnarResult
+
+
+def test_rows_round_trip_with_their_types():
+    rows = [
+        {'merchant_name': 'Netflix', 'visits': 5, 'total': 13.99, 'refund': None, 'recurring': True},
+        {'merchant_name': None, 'visits': None, 'total': None, 'refund': 2, 'recurring': False},
+        {'merchant_name': 'Gas Company', 'visits': 3, 'total': 61.0, 'refund': 1.5, 'recurring': True},
+    ]
+
+    assert ColumnarResult.from_rows(rows).to_rows() == rows
+    for original, decoded in zip(rows, ColumnarResult.from_rows(rows)):
+        assert [type(v) for v in decoded.values()] == [type(v) for v in original.values()]
+
+
+def test_int_columns_with_nulls_stay_ints():
+    result = ColumnarResult.from_rows([{'count': 5}, {'count': None}])
+
+    assert result[0]['count'] == 5 and isinstance(result[0]['count'], int)
+    assert result[1]['count'] is None
+    assert np.isnan(result.numeric('count')[1]) and result.numeric('count')[0] == 5.0
+
+
+def test_columns_are_typed():
+    result = ColumnarResult.from_rows([{'name': 'a', 'count': 1, 'amount': 1.5}, {'name': 'a', 'count': 2, 'amount': 2.5}])
+
+    assert result.columns['count'].dtype == np.int64
+    assert result.columns['amount'].dtype == np.float64
+    assert result.is_categorical('name') and result.categories('name') == ['a']
+
+
+def test_non_dict_rows_are_rejected():
+    with pytest.raises(TypeError):
+        ColumnarResult.from_rows([{'a': 1}, ('a', 1)])
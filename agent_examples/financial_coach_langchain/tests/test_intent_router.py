@@ -0,0 +1,57 @@
+import pytest
+
+from agents.intent_router import local_intent, route_intent
+
+
+@pytest.fixture(autouse=True)
+def no_local_db(monkeypatch):
+    monkeypatch.delenv('SNOWLEOPARD_LOCAL_DB', raising=False)
+
+
+@pytest.mark.parametrize('query, intent', [
+    ("Show me my spending by category", 'category_analysis'),
+    ("Break down my spending by category", 'category_analysis'),
+    ("Which merchants did I spend the most at?", 'merchant_analysis'),
+    ("What are my top merchants?", 'merchant_analysis'),
+    ("Where did I spend the most?", 'merchant_analysis'),
+    ("Show me my spending trends", 'trend_analysis'),
+    ("How has my spending changed over time?", 'trend_analysis'),
+    ("What's my monthly spending?", 'trend_analysis'),
+])
+def test_canned_questions_are_routed(query, intent):
+    assert route_intent(query) == intent
+
+
+@pytest.mark.parametrize('query', [
+    # Narrowed to a merchant, a category or income
+    "Show my Netflix spending over time",
+    "How has my grocery spending changed over time?",
+    "What's my monthly spending at Amazon?",
+    "Where did I spend the most on groceries?",
+    "What are my top merchants for restaurants?",
+    "Show my income over time",
+    # Narrowed to a period or a comparison
+    "Show my spending by category for March",
+    "What were my spending trends last year?",
+    "Compare my spending by category to 2018",
+    # More than one intent, or none
+    "Show my monthly spending by category",
+    "How much did I spend on coffee?",
+])
+def test_filtered_or_ambiguous_questions_go_to_snowleopard(query):
+    assert route_intent(query) is None
+
+
+def test_names_from_the_local_db_are_filters(local_db):
+    # "Top Spend" is made only of canned words, so only the merchant index catches it
+    assert route_intent("Show me my spending trends") == 'trend_analysis'
+    assert route_intent("Show me my Top Spend spending trends") is None
+
+
+def test_local_intent_needs_a_local_db():
+    assert local_intent("Show me my spending trends") is None
+
+
+def test_local_intent_with_a_local_db(local_db):
+    assert local_intent("Show me my spending trends") == 'trend_analysis'
+    assert local_intent("Show my Netflix spending over time") is None
@@ -0,0 +1,46 @@
+import sqlite3
+
+import pytest
+
+from tools.local_sql import LocalSqlExecutor, SqlPlanStore
+
+
+@pytest.fixture
+def executor(local_db, tmp_path):
+    executor = LocalSqlExecutor(str(local_db), SqlPlanStore(str(tmp_path / 'plans.db')), pool_size=1, pool_timeout=0.1)
+    yield executor
+    executor.pool.close()
+
+
+def test_closing_a_stream_early_returns_its_connection(executor):
+    batches = executor.stream('SELECT * FROM transactions', batch_size=1)
+    next(batches)
+    batches.close()
+
+    assert len(executor.execute('SELECT 1 AS one')) == 1
+
+
+def test_pool_times_out_instead_of_blocking(executor):
+    batches = executor.stream('SELECT * FROM transactions', batch_size=1)
+    next(batches)
+
+    with pytest.raises(sqlite3.OperationalError):
+        executor.execute('SELECT 1 AS one')
+    batches.close()
+
+
+def test_learn_checks_columns_against_the_remote_rows(executor):
+    sql = 'SELECT merchant_name FROM merchants'
+
+    assert not executor.learn('df', 'q', sql, [{'name': 'Netflix'}])
+    assert executor.learn('df', 'q', sql, [{'merchant_name': 'Netflix'}])
+    assert executor.plan_for('df', 'q') == sql
+
+
+def test_learn_refuses_empty_remote_results(executor):
+    assert not executor.learn('df', 'q', 'SELECT 1 AS anything', [])
+    assert executor.plan_for('df', 'q') is None
+
+
+def test_learn_refuses_writes(executor):
+    assert not executor.learn('df', 'q', 'DELETE FROM merchants', [{'merchant_name': 'Netflix'}])
@@ -0,0 +1,9 @@
+from utils.metrics import MetricsTracker
+
+
+def test_record_query_takes_an_explicit_row_count():
+    tracker = MetricsTracker()
+    tracker.record_query('q1', {'success': True, 'rows': [{'a': 1}, {'a': 2}]}, rows_returned=2)
+    tracker.record_query('q2', {'success': True, 'rows_returned': 3})
+
+    assert [call['rows_returned'] for call in tracker.calls] == [2, 3]
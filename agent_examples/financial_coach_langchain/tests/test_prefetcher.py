@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+import tools.prefetcher
+from tools.prefetcher import FollowUpPrefetcher, current_prefetcher, get_prefetcher
+
+
+@pytest.fixture
+def slow_query(monkeypatch):
+    """query_snowleopard that blocks until released"""
+    started, release = threading.Event(), threading.Event()
+    finished = []
+
+    def query(question):
+        started.set()
+        release.wait(5)
+        finished.append(question)
+        return {'success': True}
+
+    monkeypatch.setattr(tools.prefetcher, 'query_snowleopard', query)
+    yield started, release, finished
+    release.set()
+
+
+def test_no_prefetcher_without_result_cache(monkeypatch):
+    monkeypatch.setattr(tools.prefetcher, '_prefetcher', None)
+    monkeypatch.setenv('SNOWLEOPARD_PREFETCH_ENABLED', 'True')
+    monkeypatch.setattr(tools.prefetcher, 'get_result_cache', lambda: None)
+
+    assert get_prefetcher() is None
+
+
+def test_current_prefetcher_never_creates_one(monkeypatch):
+    monkeypatch.setattr(tools.prefetcher, '_prefetcher', None)
+    monkeypatch.setenv('SNOWLEOPARD_PREFETCH_ENABLED', 'True')
+    monkeypatch.setattr(tools.prefetcher, 'get_result_cache', lambda: object())
+
+    assert current_prefetcher() is None
+    prefetcher = get_prefetcher()
+    assert current_prefetcher() is prefetcher
+    prefetcher.shutdown()
+
+
+def test_hits_are_tracked_and_other_prefetches_cancelled(slow_query):
+    _, release, finished = slow_query
+    prefetcher = FollowUpPrefetcher(max_workers=1)
+    prefetcher.prefetch(['Show my groceries', 'Show my rent', 'show my GROCERIES'])
+
+    assert prefetcher.issued == 2
+    assert prefetcher.on_user_query('show my groceries') is True
+    assert prefetcher.stats()['cancelled'] == 1
+
+    release.set()
+    prefetcher.shutdown()
+    assert finished == ['Show my groceries']
+
+
+def test_shutdown_waits_for_running_prefetches(slow_query):
+    started, release, finished = slow_query
+    prefetcher = FollowUpPrefetcher(max_workers=1)
+    prefetcher.prefetch(['Show my groceries', 'Show my rent'])
+    started.wait(5)
+
+    threading.Timer(0.1, release.set).start()
+    prefetcher.shutdown()
+
+    assert finished == ['Show my groceries']
+    assert prefetcher.stats() == {**prefetcher.stats(), 'completed': 1, 'cancelled': 1, 'in_flight': 0}
+    assert prefetcher.prefetch(['Show my rent']) == []
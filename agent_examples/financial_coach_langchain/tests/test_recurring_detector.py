@@ -0,0 +1,79 @@
+import math
+from datetime import date, timedelta
+
+import pytest
+
+from agents.recurring_detector import RecurringChargeDetector, classify_cadence, summarize_recurring
+
+
+def _monthly(merchant, amounts, start=date(2019, 1, 15)):
+    return [(merchant, (start + timedelta(days=30 * i)).isoformat(), amount) for i, amount in enumerate(amounts)]
+
+
+@pytest.mark.parametrize('step, cadence', [(7, 'weekly'), (14, 'biweekly'), (30, 'monthly'),
+                                           (91, 'quarterly'), (365, 'annual')])
+def test_classify_cadence(step, cadence):
+    days = [737000 + step * i for i in range(5)]
+    assert classify_cadence(days) == (cadence, 1.0)
+
+
+def test_classify_cadence_needs_enough_regular_charges():
+    assert classify_cadence([737000, 737030]) is None
+    assert classify_cadence([737000, 737030, 737045, 737100, 737101]) is None
+
+
+def test_detects_monthly_subscription_and_its_cost():
+    detector = RecurringChargeDetector()
+    found = detector.detect_user(1, _monthly('Netflix', [15.99] * 6))
+
+    assert len(found) == 1
+    charge = found[0]
+    assert (charge['merchant'], charge['cadence'], charge['charges']) == ('Netflix', 'monthly', 6)
+    assert charge['amount_varies'] is False
+    assert charge['monthly_cost'] == 15.99
+    assert charge['active'] is True
+
+
+def test_charges_within_tolerance_share_a_series_across_both_grid_boundaries():
+    detector = RecurringChargeDetector(amount_tolerance=0.10)
+    tolerance_step = math.log1p(0.10)
+    # 0.7 tolerances apart: a bucket only one tolerance wide would split
+    # these on both grids (boundaries at 24 and 24.5)
+    low, high = math.exp(23.9 * tolerance_step), math.exp(24.6 * tolerance_step)
+    assert high / low - 1 < 0.10
+
+    found = detector.detect_user(1, _monthly('Gym', [low, high] * 3))
+    assert len(found) == 1
+    assert found[0]['charges'] == 6
+    assert found[0]['amount_varies'] is False
+
+
+def test_varying_bill_falls_back_to_all_amounts():
+    detector = RecurringChargeDetector()
+    found = detector.detect_user(1, _monthly('Gas Company', [40, 95, 60, 130, 75, 52]))
+
+    assert len(found) == 1
+    assert found[0]['amount_varies'] is True
+    assert found[0]['cadence'] == 'monthly'
+
+
+def test_ended_series_is_inactive_and_skipped_rows_are_counted():
+    detector = RecurringChargeDetector(as_of=date(2021, 1, 1).toordinal())
+    rows = _monthly('Old Gym', [30] * 4) + [('Old Gym', 'not a date', 30), ('', '2019-01-01', 5),
+                                            ('Shop', '2019-01-01', -3)]
+    found = detector.detect_user(1, rows)
+
+    assert [c['active'] for c in found] == [False]
+    assert detector.stats()['skipped'] == 3
+    assert summarize_recurring(found)['active_monthly_cost'] == 0
+
+
+def test_detect_stream_groups_by_user():
+    rows = [(user,) + row for user in (1, 2) for row in _monthly('Netflix', [15.99] * 4)]
+    detector = RecurringChargeDetector()
+    found = list(detector.detect_stream(rows))
+
+    assert [c['user_id'] for c in found] == [1, 2]
+    summary = summarize_recurring(found)
+    assert summary['users_with_recurring'] == 2
+    assert summary['by_cadence'] == {'monthly': 2}
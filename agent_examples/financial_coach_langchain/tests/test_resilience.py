@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.resilience import (
+    CircuitBreaker, CircuitOpenError, LatencyTracker, ResilientCaller, RetryPolicy, UpstreamStatusError
+)
+
+
+def _caller(p95: float, workers: int = 1, attempt_timeout: float = 5.0) -> ResilientCaller:
+    latency = LatencyTracker(min_samples=1)
+    latency.record(p95)
+    return ResilientCaller(retry_policy=RetryPolicy(max_retries=0), latency=latency, hedge_workers=workers,
+                           attempt_timeout=attempt_timeout)
+
+
+def test_primary_runs_on_the_calling_thread():
+    caller = _caller(p95=1.0)
+
+    assert caller.call(threading.get_ident) == threading.get_ident()
+    assert caller._executor is None
+
+
+def test_slow_primary_is_hedged_and_its_result_kept():
+    caller = _caller(p95=0.02)
+    caller_thread = threading.get_ident()
+
+    def fn():
+        if threading.get_ident() == caller_thread:
+            time.sleep(0.2)
+            return 'primary'
+        return 'hedge'
+
+    assert caller.call(fn) == 'primary'
+    assert (caller.hedges_launched, caller.hedges_won) == (1, 0)
+
+
+def test_hedge_answers_when_the_slow_primary_fails():
+    caller = _caller(p95=0.02)
+    caller_thread = threading.get_ident()
+
+    def fn():
+        if threading.get_ident() == caller_thread:
+            time.sleep(0.2)
+            raise UpstreamStatusError('INTERNAL_SERVER_ERROR')
+        return 'hedge'
+
+    assert caller.call(fn) == 'hedge'
+    assert (caller.hedges_launched, caller.hedges_won) == (1, 1)
+
+
+def test_hedge_is_skipped_when_the_pool_is_full():
+    caller = _caller(p95=0.02, workers=1)
+    # The only hedge worker is still busy with an earlier call's loser
+    caller._hedge_slots.acquire()
+
+    def fn():
+        time.sleep(0.1)
+        return 'ok'
+
+    assert caller.call(fn) == 'ok'
+    assert (caller.hedges_launched, caller.hedges_skipped) == (0, 1)
+
+
+def test_async_attempt_times_out():
+    caller = _caller(p95=0.01, attempt_timeout=0.1)
+
+    async def hang():
+        await asyncio.sleep(5)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(caller.acall(hang))
+
+
+def test_cancelling_the_caller_cancels_the_primary():
+    caller = _caller(p95=1.0)
+    cancelled = []
+
+    async def hang():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        call = asyncio.ensure_future(caller.acall(hang))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert cancelled == [True]
+
+
+def test_breaker_opens_after_repeated_retryable_failures():
+    caller = ResilientCaller(retry_policy=RetryPolicy(max_retries=0), hedge=False,
+                             breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+    def fail():
+        raise UpstreamStatusError('INTERNAL_SERVER_ERROR')
+
+    for _ in range(2):
+        with pytest.raises(UpstreamStatusError):
+            caller.call(fail)
+
+    with pytest.raises(CircuitOpenError):
+        caller.call(lambda: 'ok')
+    assert caller.breaker.stats()['times_opened'] == 1
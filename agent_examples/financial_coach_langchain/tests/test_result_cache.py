@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+import utils.result_cache
+from utils.result_cache import ResultCache, normalize_query
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(utils.result_cache.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / 'results.db'), ttl_seconds=60, max_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_normalized_queries_share_an_entry(cache):
+    cache.put('df', 'What did I spend on groceries?', {'rows': [1]})
+
+    assert normalize_query('  what did I  spend on GROCERIES ') == 'what did i spend on groceries'
+    assert cache.get('df', 'what did i spend on groceries') == {'rows': [1]}
+    assert cache.get('other', 'what did i spend on groceries') is None
+
+
+def test_entries_expire_after_their_ttl(cache, clock):
+    cache.put('df', 'groceries', {'rows': [1]})
+    cache.put('df', 'rent', {'rows': [2]}, ttl_seconds=300)
+
+    clock.now += 61
+    assert cache.get('df', 'groceries') is None
+    assert cache.get('df', 'rent') == {'rows': [2]}
+    assert cache.stats()['entries'] == 1
+
+
+def test_purge_expired(cache, clock):
+    cache.put('df', 'groceries', {'rows': [1]})
+    clock.now += 61
+
+    assert cache.purge_expired() == 1
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entry_is_evicted(cache, clock):
+    cache.put('df', 'groceries', {'rows': [1]})
+    clock.now += 1
+    cache.put('df', 'rent', {'rows': [2]})
+    clock.now += 1
+    cache.get('df', 'groceries')
+    clock.now += 1
+    cache.put('df', 'travel', {'rows': [3]})
+
+    assert cache.get('df', 'rent') is None
+    assert cache.get('df', 'groceries') == {'rows': [1]}
+    assert cache.get('df', 'travel') == {'rows': [3]}
+
+    stats = cache.stats()
+    assert (stats['evictions'], stats['entries'], stats['hits'], stats['misses']) == (1, 2, 3, 1)
+
+
+def test_result_cache_singleton_is_shared_across_threads(tmp_path, monkeypatch):
+    monkeypatch.setenv('SNOWLEOPARD_CACHE_ENABLED', 'True')
+    monkeypatch.setenv('SNOWLEOPARD_CACHE_PATH', str(tmp_path / 'results.db'))
+    monkeypatch.setattr(utils.result_cache, '_cache', None)
+    barrier = threading.Barrier(8)
+    caches = []
+
+    def open_cache():
+        barrier.wait()
+        caches.append(utils.result_cache.get_result_cache())
+
+    threads = [threading.Thread(target=open_cache) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(cache) for cache in caches}) == 1
+    caches[0].close()
@@ -0,0 +1,53 @@
+import pytest
+
+import utils.result_store
+from agents.financial_coach import FinancialCoachState, analyze_and_coach_node
+from utils.result_store import ResultStore, detach_rows, resolve_rows
+
+ROWS = [{'merchant_name': 'Whole Foods', 'total_spent': 120.0}]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = ResultStore(max_bytes=1)
+    monkeypatch.setattr(utils.result_store, '_store', store)
+    return store
+
+
+def test_pinned_results_survive_the_byte_budget(store):
+    first = store.put(ROWS)
+    second = store.put(ROWS)
+
+    assert store.get(first) == ROWS and store.get(second) == ROWS
+    assert store.evictions == 0
+
+
+def test_results_left_behind_are_evicted_once_unpinned(store):
+    store.pin_seconds = 0
+    first = store.put(ROWS)
+    store.put(ROWS)
+
+    assert store.get(first) is None
+    assert store.evictions == 1
+
+
+def test_missing_rows_resolve_to_none(store):
+    response = detach_rows({'success': True, 'rows': ROWS})
+    store.discard(response['result_handle'])
+
+    assert resolve_rows(response) is None
+    assert resolve_rows({'success': True}) == []
+
+
+def test_analyze_releases_rows_and_reports_missing_ones(store):
+    response = detach_rows({'success': True, 'rows': ROWS})
+    state = FinancialCoachState(current_query='Which merchants did I spend the most at?',
+                                snowleopard_response=response)
+
+    assert analyze_and_coach_node(state)['coaching_insights']
+    assert store.stats()['entries'] == 0
+
+    update = analyze_and_coach_node(state)
+    assert update['coaching_insights'] == {}
+    assert update['snowleopard_response']['success'] is False
+    assert 'expired' in update['snowleopard_response']['error']
@@ -0,0 +1,41 @@
+import asyncio
+import json
+
+import pytest
+
+from server import CoachServer
+
+
+def _request(server, body: bytes, headers=(), chunk: int = 1024):
+    chunks = [body[i:i + chunk] for i in range(0, len(body), chunk)] or [b'']
+    messages = [{'type': 'http.request', 'body': c, 'more_body': i < len(chunks) - 1} for i, c in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/sessions/alice/query', 'headers': list(headers)}
+    asyncio.run(server(scope, receive, send))
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setenv('SERVER_MAX_BODY_BYTES', '100')
+    server = CoachServer()
+    server.coach_app = object()
+    return server
+
+
+def test_oversized_body_is_rejected(server):
+    body = json.dumps({'question': 'x' * 200}).encode()
+
+    assert _request(server, body, chunk=50)[0] == 413
+    assert _request(server, b'{}', headers=[(b'content-length', b'5000')])[0] == 413
+
+
+def test_body_must_have_a_question(server):
+    assert _request(server, b'{"question": ""}') == (400, {'error': "Body must be JSON with a 'question'"})
@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+from utils.memory_manager import MemoryManager
+from utils.session_store import SessionStore
+
+
+def _turn(turn, question):
+    return [
+        {'turn': turn, 'role': 'user', 'content': question},
+        {'turn': turn, 'role': 'assistant', 'content': f"answer to {question}"},
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SessionStore(str(tmp_path / 'sessions.db'), max_messages=4)
+    yield store
+    store.close()
+
+
+def test_messages_round_trip(store):
+    store.append('alice', _turn(0, "q0"))
+    store.append('alice', _turn(1, "q1"))
+
+    session = store.load('alice')
+    assert [m['content'] for m in session['messages']] == ["q0", "answer to q0", "q1", "answer to q1"]
+    assert session['next_turn'] == 2
+    assert session['compacted_messages'] == 0
+
+
+def test_oldest_messages_are_compacted_over_the_cap(store):
+    for turn in range(4):
+        store.append('alice', _turn(turn, f"q{turn}"))
+
+    session = store.load('alice')
+    assert [m['content'] for m in session['messages']] == ["q2", "answer to q2", "q3", "answer to q3"]
+    assert session['compacted_messages'] == 4
+    assert session['next_turn'] == 4
+    assert store.stats()['compacted'] == 4
+
+
+def test_sessions_are_independent(store):
+    store.append('alice', _turn(0, "a"))
+    store.append('bob', _turn(0, "b"))
+    store.delete('alice')
+
+    assert store.load('alice')['messages'] == []
+    assert len(store.load('bob')['messages']) == 2
+
+
+def test_idle_sessions_are_pruned(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    store = SessionStore(path, max_age_seconds=60)
+    store.append('old', _turn(0, "q"))
+    store.append('new', _turn(0, "q"))
+    store._conn.execute('UPDATE sessions SET updated_at = ? WHERE session_id = ?', (time.time() - 120, 'old'))
+    store._conn.commit()
+
+    assert store.prune() == 1
+    assert store.load('old')['messages'] == []
+    assert len(store.load('new')['messages']) == 2
+    store.close()
+
+
+def test_pruning_can_be_disabled(tmp_path):
+    store = SessionStore(str(tmp_path / 'sessions.db'), max_age_seconds=0)
+    store.append('old', _turn(0, "q"))
+    store._conn.execute('UPDATE sessions SET updated_at = 0')
+    store._conn.commit()
+
+    assert store.prune() == 0
+    assert store.load('old')['next_turn'] == 1
+    store.close()
+
+
+def test_memory_is_restored_from_stored_messages(store):
+    store.append('alice', _turn(0, "q0") + _turn(1, "q1"))
+
+    memory = MemoryManager()
+    assert memory.restore(store.load('alice')['messages']) == 2
+    assert [entry['query'] for entry in memory.get_full_history()] == ["q0", "q1"]
+
+
+def test_memory_history_is_capped_but_counts_every_exchange():
+    memory = MemoryManager(max_history=3)
+    for i in range(5):
+        memory.add_message(f"q{i}", f"a{i}")
+
+    assert [entry['query'] for entry in memory.get_full_history()] == ["q2", "q3", "q4"]
+    assert memory.get_summary()['total_messages'] == 5
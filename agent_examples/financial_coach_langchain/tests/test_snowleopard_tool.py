@@ -0,0 +1,174 @@
+import asyncio
+import threading
+import weakref
+
+import pytest
+from snowleopard.models import APIError, ErrorSchemaData, RetrieveResponse, SchemaData
+
+import tools.local_sql
+import tools.snowleopard_tool
+from tools.snowleopard_tool import get_async_client, query_snowleopard
+from utils.result_cache import ResultCache
+
+
+class FakeClient:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def retrieve(self, *, datafile_id, user_query):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+def _rows_response(rows, sql='SELECT merchant_name FROM merchants'):
+    return RetrieveResponse(callId='c1', responseStatus='SUCCESS', data=[SchemaData(
+        schemaId='s', schemaType='sqlite', query=sql, rows=rows, querySummary={}, rowMax=1000, isTrimmed=False
+    )])
+
+
+def _error_response(status='DB_ERROR'):
+    return RetrieveResponse(callId='c1', responseStatus=status, data=[ErrorSchemaData(
+        schemaType='sqlite', schemaId='s', query='SELECT broken', error='database is locked', querySummary={}
+    )])
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / 'results.db'))
+    monkeypatch.setenv('SNOWLEOPARD_DATAFILE_ID', 'df')
+    monkeypatch.delenv('SNOWLEOPARD_LOCAL_DB', raising=False)
+    monkeypatch.setattr(tools.snowleopard_tool, 'get_result_cache', lambda: cache)
+    yield cache
+    cache.close()
+
+
+def _use_client(monkeypatch, client):
+    monkeypatch.setattr(tools.snowleopard_tool, 'get_client', lambda: client)
+
+
+def test_error_schema_data_is_a_failure_and_is_not_cached(cache, monkeypatch):
+    client = FakeClient(_error_response(), _rows_response([{'merchant_name': 'Netflix'}]))
+    _use_client(monkeypatch, client)
+
+    response = query_snowleopard("Which merchants?")
+    assert not response['success']
+    assert 'database is locked' in response['error']
+    assert cache.get('df', "Which merchants?") is None
+
+    # The next ask reaches the upstream again instead of a cached empty answer
+    response = query_snowleopard("Which merchants?")
+    assert response['success'] and response['rows'] == [{'merchant_name': 'Netflix'}]
+    assert client.calls == 2
+
+
+def test_api_error_is_a_failure(cache, monkeypatch):
+    _use_client(monkeypatch, FakeClient(APIError(callId='c1', responseStatus='AUTHORIZATION_FAILED', description='bad key')))
+
+    response = query_snowleopard("Which merchants?")
+    assert not response['success']
+    assert 'AUTHORIZATION_FAILED' in response['error']
+
+
+def test_error_schema_data_is_not_learned(cache, local_db, monkeypatch):
+    _use_client(monkeypatch, FakeClient(_error_response()))
+
+    assert not query_snowleopard("Which merchants?")['success']
+    assert tools.local_sql.get_local_sql().plan_for('df', "Which merchants?") is None
+
+
+def test_successful_results_are_cached(cache, monkeypatch):
+    client = FakeClient(_rows_response([{'merchant_name': 'Netflix'}]))
+    _use_client(monkeypatch, client)
+
+    assert query_snowleopard("Which merchants?")['success']
+    cached = query_snowleopard("which merchants")
+    assert cached['cached'] and cached['rows'] == [{'merchant_name': 'Netflix'}]
+    assert client.calls == 1
+
+
+class FakeAsyncClient:
+    def __init__(self):
+        self.closed_on = None
+
+    async def close(self):
+        self.closed_on = asyncio.get_running_loop()
+
+
+@pytest.fixture
+def async_clients(monkeypatch):
+    created = []
+
+    def wrap(factory, is_async=False):
+        created.append(FakeAsyncClient())
+        return created[-1]
+
+    monkeypatch.setattr(tools.snowleopard_tool, 'wrap_client', wrap)
+    monkeypatch.setattr(tools.snowleopard_tool, '_async_client', None)
+    monkeypatch.setattr(tools.snowleopard_tool, '_async_client_loop', None)
+    return created
+
+
+async def _get_async_client():
+    return get_async_client()
+
+
+def test_async_client_of_a_closed_loop_is_closed_when_replaced(async_clients):
+    async def use_client():
+        client = get_async_client()
+        await asyncio.sleep(0)
+        return client
+
+    first = asyncio.run(use_client())
+    second = asyncio.run(use_client())
+
+    assert first is not second
+    assert first.closed_on is not None
+    assert second.closed_on is None
+
+
+def test_async_client_is_closed_on_its_own_running_loop(async_clients):
+    owner = asyncio.new_event_loop()
+    thread = threading.Thread(target=owner.run_forever)
+    thread.start()
+    try:
+        first = asyncio.run_coroutine_threadsafe(_get_async_client(), owner).result(5)
+        asyncio.run(_get_async_client())
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), owner).result(5)
+
+        assert first.closed_on is owner
+    finally:
+        owner.call_soon_threadsafe(owner.stop)
+        thread.join(5)
+        owner.close()
+
+
+def test_async_flights_are_not_shared_across_loops(monkeypatch):
+    monkeypatch.setattr(tools.snowleopard_tool, '_async_flights', weakref.WeakKeyDictionary())
+    owner = asyncio.new_event_loop()
+    thread = threading.Thread(target=owner.run_forever)
+    thread.start()
+    release = threading.Event()
+
+    async def slow():
+        await asyncio.to_thread(release.wait, 5)
+        return 'owner'
+
+    async def fast():
+        return 'caller'
+
+    async def run(fn):
+        return await tools.snowleopard_tool._get_async_flights().do('key', fn)
+
+    try:
+        pending = asyncio.run_coroutine_threadsafe(run(slow), owner)
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), owner).result(5)
+
+        assert asyncio.run(run(fast)) == ('caller', False)
+        release.set()
+        assert pending.result(5) == ('owner', False)
+    finally:
+        release.set()
+        owner.call_soon_threadsafe(owner.stop)
+        thread.join(5)
+        owner.close()
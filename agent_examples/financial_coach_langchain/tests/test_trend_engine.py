@@ -0,0 +1,91 @@
+import pytest
+
+from agents.coaching_analyzer import CoachingAnalyzer
+from agents.trend_engine import SeriesTrend, TrendEngine, parse_period
+
+
+@pytest.mark.parametrize('earlier, later', [
+    ('2019-12', '2020-01'),
+    ('2019-02-28', '2019-03-01'),
+    ('2019-W52', '2020-W01'),   # 52-week ISO year
+    ('2020-W53', '2021-W01'),   # 53-week ISO year
+    ('2019', '2020'),
+])
+def test_consecutive_periods_have_consecutive_ordinals(earlier, later):
+    assert parse_period(later)[0] - parse_period(earlier)[0] == 1
+
+
+def test_parse_period_kinds_and_seasons():
+    assert parse_period('2019-03') == (2019 * 12 + 2, 2, 'month')
+    assert parse_period('2019-03-15')[1:] == (2, 'day')
+    assert parse_period('2019-W10')[1:] == (None, 'week')
+    assert parse_period(7) == (7, None, None)
+
+
+@pytest.mark.parametrize('label', ['2019-13-01', '2021-W53', 'March', None, True])
+def test_parse_period_rejects_invalid_labels(label):
+    assert parse_period(label) is None
+
+
+def _monthly_rows(values, start_year=2019):
+    return [{'month': f"{start_year + i // 12}-{i % 12 + 1:02d}", 'total_expenses': value, 'total_income': 1000}
+            for i, value in enumerate(values)]
+
+
+def _total(rows) -> SeriesTrend:
+    return TrendEngine().consume(rows).series['Total']
+
+
+def test_series_statistics():
+    series = _total(_monthly_rows([100, 110, 120, 130, 200]))
+
+    assert series.count == 5 and series.span == 5
+    assert series.slope == pytest.approx(22.0)
+    assert series.mean == pytest.approx(132.0)
+    assert series.latest_period == '2019-05' and series.latest_delta == 70
+    assert series.max_increase == 70 and series.max_increase_period == '2019-05'
+    assert series.rolling_mean == pytest.approx(150.0)
+    assert series.savings_rate == pytest.approx(1 - 660 / 5000)
+
+
+def test_descending_rows_give_the_same_statistics():
+    rows = _monthly_rows([100, 110, 120, 130, 200, 90, 95])
+    ascending, descending = _total(rows).summary(), _total(list(reversed(rows))).summary()
+
+    assert descending.pop('seasonality') == ascending.pop('seasonality')
+    assert descending == pytest.approx(ascending)
+
+
+def test_out_of_order_rows_drop_deltas():
+    series = _total(_monthly_rows([100, 110, 120])[::2] + _monthly_rows([100, 110, 120])[1:2])
+
+    assert not series.ordered
+    assert series.latest_delta is None and series.slope is not None
+
+
+def test_category_rows_are_separate_series():
+    rows = [{'month': '2019-01', 'category_name': 'Groceries', 'total_spent': 300},
+            {'month': '2019-01', 'category_name': 'Restaurants', 'total_spent': 150},
+            {'month': '2019-02', 'category_name': 'Groceries', 'total_spent': 320}]
+
+    engine = TrendEngine().consume(rows)
+    assert set(engine.series) == {'Groceries', 'Restaurants'}
+    assert engine.series['Groceries'].latest_delta == 20
+
+
+def test_year_over_year_follow_up_needs_two_years_of_buckets():
+    analyzer = CoachingAnalyzer()
+    daily = [{'date': f"2019-01-{day:02d}", 'amount': 100 + day} for day in range(1, 31)]
+    monthly = _monthly_rows([100 + i for i in range(24)])
+
+    assert "Want to compare this year to last year?" not in analyzer.analyze_trends(daily)['follow_up_questions']
+    assert "Want to compare this year to last year?" in analyzer.analyze_trends(monthly)['follow_up_questions']
+
+
+def test_small_price_changes_are_not_spikes():
+    analyzer = CoachingAnalyzer()
+    subscription = _monthly_rows([13.99] * 12 + [15.99] * 6)
+    spending = _monthly_rows([5000, 5050, 5100] * 2 + [8000] + [5000, 5050, 5100] * 2)
+
+    assert not any('Biggest jump' in insight for insight in analyzer.analyze_trends(subscription)['insights'])
+    assert any('Biggest jump' in insight for insight in analyzer.analyze_trends(spending)['insights'])
@@ -0,0 +1,18 @@
+from tools.merchant_index import get_merchant_index
+from tools.warmup import WarmUp
+
+
+def test_local_index_step_loads_the_merchant_index(local_db):
+    detail = WarmUp([])._load_local_index()
+
+    assert detail.endswith('merchants indexed')
+    index = get_merchant_index()
+    assert index.loads == 1
+    assert index.mentions('how much at whole foods')
+
+
+def test_local_index_step_without_a_database(monkeypatch):
+    monkeypatch.delenv('SNOWLEOPARD_LOCAL_DB', raising=False)
+    monkeypatch.setattr('tools.local_sql._executor', None)
+
+    assert WarmUp([])._load_local_index() == 'no local database'
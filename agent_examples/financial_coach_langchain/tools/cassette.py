@@ -0,0 +1,220 @@
+"""
+Record/replay cassettes for the Snow Leopard client.
+
+Record mode wraps a live client and appends every retrieve response
+(SchemaData rows, SQL, status and latency) to a compact JSON-lines file,
+gzip-compressed when the path ends in .gz. Replay mode serves those
+responses back without the network, optionally re-injecting the recorded
+latency, so our own latency and throughput can be benchmarked offline.
+"""
+
+
+import asyncio
+import dataclasses
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, Union
+
+from snowleopard.models import parse
+
+from utils.result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CASSETTE_PATH = os.path.join('data', 'cassettes', 'snowleopard.jsonl.gz')
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when a query was never recorded"""
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def serialize_result(obj: Any) -> Any:
+    """Convert snowleopard model dataclasses to JSON, tagged so models.parse can rebuild them"""
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        data = {f.name: serialize_result(getattr(obj, f.name)) for f in dataclasses.fields(obj)}
+        obj_type = getattr(obj, 'objType', None)
+        if obj_type:
+            data['__type__'] = obj_type
+        return data
+    if isinstance(obj, list):
+        return [serialize_result(v) for v in obj]
+    if isinstance(obj, dict):
+        return {k: serialize_result(v) for k, v in obj.items()}
+    return obj
+
+
+def _status_of(result: Any) -> str:
+    return str(getattr(result, 'responseStatus', ''))
+
+
+class RecordingClient:
+    """Pass-through client that appends each retrieve response to a cassette"""
+
+    def __init__(self, inner, path: str = DEFAULT_CASSETTE_PATH):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        logger.info(f"[Cassette] Recording Snow Leopard responses to {path}")
+
+    def _write(self, datafile_id: Optional[str], user_query: str, result: Any, latency_ms: float):
+        entry = {
+            'datafile_id': datafile_id,
+            'user_query': user_query,
+            'status': _status_of(result),
+            'latency_ms': round(latency_ms, 1),
+            'recorded_at': time.time(),
+            'response': serialize_result(result),
+        }
+        line = json.dumps(entry, default=str, separators=(',', ':'))
+
+        # Each gzip append is its own member; gzip readers concatenate them
+        with self._lock, _open(self.path, 'a') as f:
+            f.write(line + '\n')
+
+    def retrieve(self, *, user_query: str, datafile_id: Optional[str] = None, **kwargs):
+        start_time = time.time()
+        result = self.inner.retrieve(user_query=user_query, datafile_id=datafile_id, **kwargs)
+        self._write(datafile_id, user_query, result, (time.time() - start_time) * 1000)
+        return result
+
+    def close(self):
+        self.inner.close()
+
+
+class AsyncRecordingClient(RecordingClient):
+    """Async counterpart of RecordingClient; cassette writes run off the event loop"""
+
+    async def retrieve(self, *, user_query: str, datafile_id: Optional[str] = None, **kwargs):
+        start_time = time.time()
+        result = await self.inner.retrieve(user_query=user_query, datafile_id=datafile_id, **kwargs)
+        # Compressing and appending blocks; keep it off the loop
+        await asyncio.to_thread(self._write, datafile_id, user_query, result, (time.time() - start_time) * 1000)
+        return result
+
+    async def close(self):
+        await self.inner.close()
+
+
+class ReplayClient:
+    """
+    Local stand-in for SnowLeopardClient that serves recorded responses.
+
+    Queries are matched on (datafile_id, normalized query text), the same
+    key as the result cache; the latest recording of a query wins.
+
+    Args:
+        path: Cassette file written by RecordingClient
+        latency: 'recorded' to sleep for the recorded latency, or a fixed
+            number of milliseconds (0 disables latency injection)
+        latency_scale: Multiplier applied to the injected latency
+    """
+
+    def __init__(self, path: str = DEFAULT_CASSETTE_PATH,
+                 latency: Union[str, float] = 'recorded', latency_scale: float = 1.0):
+        self.path = path
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+        with _open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                key = ResultCache.make_key(entry.get('datafile_id') or '', entry['user_query'])
+                self.entries[key] = entry
+
+        logger.info(f"[Cassette] Replaying {len(self.entries)} recorded queries from {path}")
+
+    def _lookup(self, user_query: str, datafile_id: Optional[str]) -> Dict[str, Any]:
+        entry = self.entries.get(ResultCache.make_key(datafile_id or '', user_query))
+        if entry is None:
+            self.misses += 1
+            raise CassetteMiss(f"No recorded response for query: {user_query!r}")
+
+        self.hits += 1
+        return entry
+
+    def _delay_seconds(self, entry: Dict[str, Any]) -> float:
+        if self.latency == 'recorded':
+            latency_ms = entry.get('latency_ms', 0)
+        else:
+            latency_ms = float(self.latency)
+        return max(0.0, latency_ms * self.latency_scale / 1000)
+
+    def retrieve(self, *, user_query: str, datafile_id: Optional[str] = None, **kwargs):
+        entry = self._lookup(user_query, datafile_id)
+        delay = self._delay_seconds(entry)
+        if delay:
+            time.sleep(delay)
+        return parse(entry['response'])
+
+    def close(self):
+        pass
+
+
+class AsyncReplayClient(ReplayClient):
+    """Async counterpart of ReplayClient"""
+
+    async def retrieve(self, *, user_query: str, datafile_id: Optional[str] = None, **kwargs):
+        entry = self._lookup(user_query, datafile_id)
+        delay = self._delay_seconds(entry)
+        if delay:
+            await asyncio.sleep(delay)
+        return parse(entry['response'])
+
+    async def close(self):
+        pass
+
+
+def get_cassette_mode() -> str:
+    """Cassette mode from SNOWLEOPARD_CASSETTE_MODE: 'record', 'replay' or '' (live)"""
+    return os.getenv('SNOWLEOPARD_CASSETTE_MODE', '').strip().lower()
+
+
+def _replay_settings() -> Dict[str, Any]:
+    latency = os.getenv('SNOWLEOPARD_REPLAY_LATENCY', 'recorded')
+    return {
+        'path': os.getenv('SNOWLEOPARD_CASSETTE_PATH', DEFAULT_CASSETTE_PATH),
+        'latency': latency if latency == 'recorded' else float(latency),
+        'latency_scale': float(os.getenv('SNOWLEOPARD_REPLAY_LATENCY_SCALE', 1.0)),
+    }
+
+
+def wrap_client(client_factory, is_async: bool = False):
+    """
+    Build the client for the configured cassette mode
+
+    Args:
+        client_factory: Zero-argument callable creating the live client;
+            not called in replay mode, so no API key is needed offline
+        is_async: Whether the async client variants are wanted
+    """
+    mode = get_cassette_mode()
+
+    if mode == 'replay':
+        replay_class = AsyncReplayClient if is_async else ReplayClient
+        return replay_class(**_replay_settings())
+
+    if mode == 'record':
+        record_class = AsyncRecordingClient if is_async else RecordingClient
+        return record_class(client_factory(), os.getenv('SNOWLEOPARD_CASSETTE_PATH', DEFAULT_CASSETTE_PATH))
+
+    return client_factory()
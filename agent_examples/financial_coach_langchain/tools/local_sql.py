@@ -0,0 +1,269 @@
+"""
+Local SQL execution for repeat questions.
+
+After Snow Leopard has translated a question into SQL once, the
+(question, SQL) pair is validated against the local copy of the database
+built by data/transform_personal_finance.py and stored. When the question
+comes back, the stored SQL is re-run locally through a small pool of
+read-only SQLite connections and the remote call is skipped entirely.
+"""
+
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+from utils.result_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCAL_DB = os.path.join('data', 'finance_coach.db')
+DEFAULT_PLAN_STORE_PATH = os.path.join('.cache', 'sql_plans.db')
+DEFAULT_POOL_SIZE = 4
+DEFAULT_POOL_TIMEOUT = 10.0
+
+
+def is_read_only_select(sql: str) -> bool:
+    """Accept a single SELECT/WITH statement and nothing else"""
+    statement = sql.strip().rstrip(';').strip()
+    if not statement or ';' in statement:
+        return False
+
+    first_word = statement.split(None, 1)[0].lower()
+    return first_word in ('select', 'with')
+
+
+class ReadOnlyConnectionPool:
+    """Fixed-size pool of read-only SQLite connections to one database file"""
+
+    def __init__(self, db_path: str, size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_POOL_TIMEOUT):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._pool: queue.Queue = queue.Queue(maxsize=size)
+
+        uri = f"file:{os.path.abspath(db_path)}?mode=ro"
+        for _ in range(size):
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA query_only = ON')
+            self._pool.put(conn)
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Borrow a connection, waiting up to timeout seconds for one to be free
+
+        Raises:
+            sqlite3.OperationalError: If none is returned in time
+        """
+        try:
+            return self._pool.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"No local connection free after {self.timeout}s") from None
+
+    def release(self, conn: sqlite3.Connection):
+        self._pool.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with block"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+class SqlPlanStore:
+    """Persistent map of (datafile_id, normalized question) -> validated SQL"""
+
+    def __init__(self, path: str = DEFAULT_PLAN_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._plans: Dict[tuple, str] = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS sql_plans (
+            datafile_id TEXT NOT NULL,
+            question TEXT NOT NULL,
+            sql TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (datafile_id, question)
+        )
+        ''')
+        self._conn.commit()
+
+        # Plans are small; keep them all in memory for lookups
+        for datafile_id, question, sql in self._conn.execute('SELECT datafile_id, question, sql FROM sql_plans'):
+            self._plans[(datafile_id, question)] = sql
+
+    def get(self, datafile_id: str, question: str) -> Optional[str]:
+        return self._plans.get((datafile_id, normalize_query(question)))
+
+    def put(self, datafile_id: str, question: str, sql: str):
+        key = (datafile_id, normalize_query(question))
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sql_plans (datafile_id, question, sql, created_at) VALUES (?, ?, ?, ?)',
+                (key[0], key[1], sql, time.time())
+            )
+            self._conn.commit()
+            self._plans[key] = sql
+
+    def remove(self, datafile_id: str, question: str):
+        key = (datafile_id, normalize_query(question))
+        with self._lock:
+            self._conn.execute('DELETE FROM sql_plans WHERE datafile_id = ? AND question = ?', key)
+            self._conn.commit()
+            self._plans.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+
+class LocalSqlExecutor:
+    """Answers repeat questions by re-running their stored SQL against the local database"""
+
+    def __init__(self, db_path: str = DEFAULT_LOCAL_DB, plan_store: Optional[SqlPlanStore] = None,
+                 pool_size: int = DEFAULT_POOL_SIZE, pool_timeout: float = DEFAULT_POOL_TIMEOUT):
+        self.db_path = db_path
+        self.plans = plan_store if plan_store is not None else SqlPlanStore()
+        self.pool = ReadOnlyConnectionPool(db_path, pool_size, pool_timeout)
+        self.hits = 0
+        self.learned = 0
+        self.rejected = 0
+
+        logger.info(f"[LocalSQL] Executing stored plans against {db_path} ({len(self.plans)} plans)")
+
+    def execute(self, sql: str) -> List[Dict[str, Any]]:
+        with self.pool.connection() as conn:
+            return [dict(row) for row in conn.execute(sql)]
+
+    def stream(self, sql: str, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield result rows in batches as SQLite produces them
+
+        The generator holds a pooled connection until it is exhausted or
+        closed; callers that may stop early should close() it.
+        """
+        conn = self.pool.acquire()
+        cursor = None
+        try:
+            cursor = conn.execute(sql)
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    return
+                yield [dict(row) for row in batch]
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.pool.release(conn)
+
+    def plan_for(self, datafile_id: str, question: str) -> Optional[str]:
+        return self.plans.get(datafile_id, question)
+
+    def answer(self, datafile_id: str, question: str) -> Optional[Dict[str, Any]]:
+        """Run the stored plan for a question; None if there is none or it no longer runs"""
+        sql = self.plan_for(datafile_id, question)
+        if sql is None:
+            return None
+
+        start_time = time.time()
+        try:
+            rows = self.execute(sql)
+        except sqlite3.Error as e:
+            logger.warning(f"[LocalSQL] Stored plan failed ({e}); dropping it")
+            self.plans.remove(datafile_id, question)
+            return None
+
+        self.hits += 1
+        logger.info(f"[LocalSQL] ✓ Answered locally with {len(rows)} rows")
+        return {
+            'success': True,
+            'rows': rows,
+            'sql': sql,
+            'execution_time_ms': round((time.time() - start_time) * 1000, 2),
+            'cached': False,
+            'source': 'local_sql',
+            'message': ''
+        }
+
+    def learn(self, datafile_id: str, question: str, sql: str, remote_rows: List[Dict[str, Any]]) -> bool:
+        """
+        Validate a (question, SQL) pair from Snow Leopard and store it
+
+        The SQL must be a single read-only statement that runs against the
+        local database and returns the same columns as the remote result.
+        An empty remote result has no columns to compare, so it is never
+        learned from.
+        """
+        if not remote_rows or not sql or not is_read_only_select(sql):
+            self.rejected += 1
+            return False
+
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.execute(sql)
+                local_columns = [d[0] for d in cursor.description or []]
+                cursor.close()
+        except sqlite3.Error as e:
+            logger.debug(f"[LocalSQL] Plan does not run locally: {e}")
+            self.rejected += 1
+            return False
+
+        if not isinstance(remote_rows[0], dict) or list(remote_rows[0].keys()) != local_columns:
+            logger.debug(f"[LocalSQL] Column mismatch: {local_columns} vs {remote_rows[0]!r:.200}")
+            self.rejected += 1
+            return False
+
+        self.plans.put(datafile_id, question, sql)
+        self.learned += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'plans': len(self.plans),
+            'hits': self.hits,
+            'learned': self.learned,
+            'rejected': self.rejected,
+            'db_path': self.db_path,
+        }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_local_sql() -> Optional[LocalSqlExecutor]:
+    """Get the local SQL executor, or None unless SNOWLEOPARD_LOCAL_DB points at an existing file"""
+    global _executor
+
+    db_path = os.getenv('SNOWLEOPARD_LOCAL_DB', '')
+    if not db_path or not os.path.exists(db_path):
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = LocalSqlExecutor(
+                db_path=db_path,
+                plan_store=SqlPlanStore(os.getenv('SNOWLEOPARD_PLAN_STORE_PATH', DEFAULT_PLAN_STORE_PATH)),
+                pool_size=int(os.getenv('SNOWLEOPARD_LOCAL_POOL_SIZE', DEFAULT_POOL_SIZE)),
+                pool_timeout=float(os.getenv('SNOWLEOPARD_LOCAL_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT)),
+            )
+
+    return _executor
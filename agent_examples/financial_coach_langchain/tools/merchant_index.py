@@ -0,0 +1,164 @@
+"""
+Merchant -> category index from the local database.
+
+data/transform_personal_finance.py writes a merchants table next to the
+transactions. This module loads every merchant's category into an
+in-memory, read-only dict so the coaching analyzer can look a merchant up
+in O(1) instead of guessing from its name, and so the intent router can tell
+whether a question names a merchant or category. The index is reloaded
+when the database file (or its WAL) changes on disk.
+"""
+
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A merchant's category is the one most of its transactions are filed under;
+# merchants.category_id is only used for merchants with no transactions
+MERCHANT_CATEGORY_SQL = '''
+SELECT m.merchant_name, c.category_name
+FROM merchants m
+JOIN categories c ON c.category_id = COALESCE(
+    (SELECT t.category_id FROM transactions t
+     WHERE t.merchant_id = m.merchant_id
+     GROUP BY t.category_id
+     ORDER BY COUNT(*) DESC, t.category_id
+     LIMIT 1),
+    m.category_id
+)
+'''
+
+_EMPTY: Mapping[str, str] = MappingProxyType({})
+
+# Matches nothing; used until names are loaded
+_NO_NAMES = re.compile(r'(?!)')
+
+
+def merchant_key(name: str) -> str:
+    """Index key for a merchant name"""
+    return name.strip().lower()
+
+
+class MerchantCategoryIndex:
+    """Read-only merchant -> category map, reloaded when the database file changes"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._categories: Mapping[str, str] = _EMPTY
+        self._names: Pattern = _NO_NAMES
+        self._signature: Optional[Tuple] = None
+        self.loads = 0
+
+    def _file_signature(self) -> Optional[Tuple]:
+        """(mtime, size) of the database and its WAL; None if the file is gone"""
+        try:
+            main = os.stat(self.db_path)
+        except OSError:
+            return None
+
+        try:
+            wal = os.stat(self.db_path + '-wal')
+            wal_signature = (wal.st_mtime_ns, wal.st_size)
+        except OSError:
+            wal_signature = None
+
+        return (main.st_mtime_ns, main.st_size, wal_signature)
+
+    def _refresh(self):
+        """Reload if the database changed since the last load"""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+
+        with self._lock:
+            if signature != self._signature:
+                categories = self._load() if signature else _EMPTY
+                self._names = _names_pattern(categories)
+                self._categories = categories
+                self._signature = signature
+
+    def snapshot(self) -> Mapping[str, str]:
+        """
+        Current merchant -> category map (keys from merchant_key)
+
+        Reloads first if the database changed since the last load. The
+        returned mapping is never modified; a reload swaps in a new one.
+        """
+        self._refresh()
+        return self._categories
+
+    def get(self, merchant_name: str) -> Optional[str]:
+        return self.snapshot().get(merchant_key(merchant_name))
+
+    def mentions(self, text: str) -> bool:
+        """Whether text names any merchant or category, as whole words and ignoring case"""
+        self._refresh()
+        return self._names.search(text.lower()) is not None
+
+    def _load(self) -> Mapping[str, str]:
+        uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+        try:
+            conn = sqlite3.connect(uri, uri=True)
+            try:
+                categories = {merchant_key(name): category
+                              for name, category in conn.execute(MERCHANT_CATEGORY_SQL) if name and category}
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"[MerchantIndex] Could not load merchants from {self.db_path}: {e}")
+            return _EMPTY
+
+        self.loads += 1
+        logger.info(f"[MerchantIndex] ✓ Loaded {len(categories)} merchant categories")
+        return MappingProxyType(categories)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'merchants': len(self._categories),
+            'loads': self.loads,
+            'db_path': self.db_path,
+        }
+
+
+def _names_pattern(categories: Mapping[str, str]) -> Pattern:
+    """One regex over every merchant and category name, longest first"""
+    names = set(categories) | {merchant_key(category) for category in categories.values()}
+    names.discard('')
+    if not names:
+        return _NO_NAMES
+
+    alternatives = '|'.join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+    return re.compile(rf'(?<!\w)(?:{alternatives})(?!\w)')
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_merchant_index() -> Optional[MerchantCategoryIndex]:
+    """
+    Get the merchant index, or None unless SNOWLEOPARD_LOCAL_DB points at an
+    existing file and SNOWLEOPARD_MERCHANT_INDEX_ENABLED is not False
+    """
+    global _index
+
+    if os.getenv('SNOWLEOPARD_MERCHANT_INDEX_ENABLED', 'True').lower() != 'true':
+        return None
+
+    db_path = os.getenv('SNOWLEOPARD_LOCAL_DB', '')
+    if not db_path or not os.path.exists(db_path):
+        return None
+
+    with _index_lock:
+        if _index is None or _index.db_path != db_path:
+            _index = MerchantCategoryIndex(db_path)
+
+    return _index
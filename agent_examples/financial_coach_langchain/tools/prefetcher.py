@@ -0,0 +1,175 @@
+"""
+Speculative prefetch of coaching follow-up questions.
+
+While the user reads a response, the follow-up questions it suggested are
+sent to Snow Leopard on a small worker pool. Answers land in the result
+cache, so picking a follow-up on the next turn is served locally. Anything
+still queued is cancelled as soon as the user asks something else. Without
+the result cache there is nowhere for answers to land, so prefetching is
+off whenever the cache is.
+"""
+
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import Dict, Any, Iterable, List
+
+from tools.snowleopard_tool import query_snowleopard
+from utils.result_cache import get_result_cache, normalize_query
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_QUESTIONS = 3
+
+# Seconds shutdown waits for prefetches that are already running
+DEFAULT_SHUTDOWN_TIMEOUT = 5.0
+
+
+class FollowUpPrefetcher:
+    """Bounded background prefetch of follow-up questions with hit-rate tracking"""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, max_questions: int = DEFAULT_MAX_QUESTIONS):
+        self.max_questions = max_questions
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._prefetched: set = set()
+        self._closed = False
+
+        self.issued = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.hits = 0
+        self.misses = 0
+
+    def prefetch(self, questions: Iterable[str]) -> List[str]:
+        """Start prefetching the given follow-ups, replacing the previous turn's set"""
+        self.cancel_pending()
+
+        started = []
+        with self._lock:
+            self._prefetched = set()
+            if self._closed:
+                return started
+            for question in list(questions)[:self.max_questions]:
+                key = normalize_query(question)
+                if key in self._prefetched:
+                    continue
+
+                self._prefetched.add(key)
+                future = self._executor.submit(self._run, question)
+                self._pending[key] = future
+                self.issued += 1
+                started.append(question)
+
+        if started:
+            logger.info(f"[Prefetch] Prefetching {len(started)} follow-up questions")
+        return started
+
+    def _run(self, question: str):
+        response = query_snowleopard(question)
+
+        with self._lock:
+            self._pending.pop(normalize_query(question), None)
+            if response.get('success'):
+                self.completed += 1
+            else:
+                self.failed += 1
+
+        return response
+
+    def on_user_query(self, query: str) -> bool:
+        """
+        Record whether the user's next question was prefetched and drop the rest
+
+        Queued prefetches are cancelled; one already running for the chosen
+        question is left alone so the turn can join it.
+
+        Returns:
+            True if the query was one of the prefetched follow-ups
+        """
+        key = normalize_query(query)
+
+        with self._lock:
+            hit = key in self._prefetched
+            if hit:
+                self.hits += 1
+            elif self._prefetched:
+                self.misses += 1
+            self._prefetched = set()
+
+        self.cancel_pending(keep=key)
+        return hit
+
+    def cancel_pending(self, keep: str = None):
+        """Cancel queued prefetches that have not started yet"""
+        with self._lock:
+            for key, future in list(self._pending.items()):
+                if key == keep:
+                    continue
+                if future.cancel():
+                    self.cancelled += 1
+                    del self._pending[key]
+
+    def stats(self) -> Dict[str, Any]:
+        judged = self.hits + self.misses
+        return {
+            'issued': self.issued,
+            'completed': self.completed,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+            'in_flight': len(self._pending),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / judged) if judged else 0.0,
+        }
+
+    def shutdown(self, timeout: float = DEFAULT_SHUTDOWN_TIMEOUT):
+        """
+        Stop prefetching: cancel queued prefetches and wait up to timeout
+        seconds for running ones, which cannot be interrupted mid-query
+        """
+        with self._lock:
+            self._closed = True
+        self.cancel_pending()
+
+        with self._lock:
+            running = list(self._pending.values())
+        if running:
+            _, still_running = wait(running, timeout=timeout)
+            if still_running:
+                logger.warning(f"[Prefetch] {len(still_running)} prefetches still running at shutdown")
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher():
+    """Get the follow-up prefetcher, or None if prefetching or the result cache is disabled"""
+    global _prefetcher
+
+    if os.getenv('SNOWLEOPARD_PREFETCH_ENABLED', 'True').lower() != 'true':
+        return None
+    if get_result_cache() is None:
+        return None
+
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = FollowUpPrefetcher(
+                max_workers=int(os.getenv('SNOWLEOPARD_PREFETCH_WORKERS', DEFAULT_MAX_WORKERS)),
+                max_questions=int(os.getenv('SNOWLEOPARD_PREFETCH_MAX_QUESTIONS', DEFAULT_MAX_QUESTIONS)),
+            )
+
+    return _prefetcher
+
+
+def current_prefetcher():
+    """The prefetcher if get_prefetcher already created one; never creates it"""
+    return _prefetcher
@@ -2,95 +2,530 @@
 Snow Leopard Tool - wrapper for Snow Leopard Playground API
 """
 
+import asyncio
 import logging
 import os
+import threading
 import time
-from typing import Dict, Any
+import weakref
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Union
 import json
 
-from snowleopard import SnowLeopardClient
+from snowleopard import SnowLeopardClient, AsyncSnowLeopardClient
+
+from models.columnar import ColumnarResult
+from tools.cassette import wrap_client, get_cassette_mode
+from tools.local_sql import get_local_sql
+from utils.resilience import (
+    DEFAULT_ATTEMPT_TIMEOUT, ResilientCaller, RetryPolicy, CircuitBreaker, LatencyTracker, UpstreamStatusError
+)
+from utils.result_cache import ResultCache, get_result_cache
+from utils.row_stream import iter_batches
+from utils.single_flight import SingleFlight, AsyncSingleFlight
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_BATCH_SIZE = 500
+
+
+class SnowLeopardQueryError(Exception):
+    """Raised by the streaming API when a query fails"""
+
+
 _client = None
+_async_client = None
+_async_client_loop = None
+_client_lock = threading.Lock()
+# Pending closes of replaced async clients, held until they finish
+_retiring = set()
+
+# Identical queries already in flight share one upstream retrieve
+_flights = SingleFlight()
+# Async flights hold tasks of one loop, so each running loop gets its own
+_async_flights: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncSingleFlight]" = \
+    weakref.WeakKeyDictionary()
+
+# Retries, hedged requests and circuit breaker around every upstream retrieve
+_resilience = ResilientCaller(
+    retry_policy=RetryPolicy(
+        max_retries=int(os.getenv('SNOWLEOPARD_MAX_RETRIES', 2)),
+        base_delay=float(os.getenv('SNOWLEOPARD_RETRY_BASE_DELAY', 0.5)),
+    ),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv('SNOWLEOPARD_BREAKER_THRESHOLD', 5)),
+        reset_timeout=float(os.getenv('SNOWLEOPARD_BREAKER_RESET_SECONDS', 30)),
+    ),
+    latency=LatencyTracker(min_samples=int(os.getenv('SNOWLEOPARD_HEDGE_MIN_SAMPLES', 20))),
+    hedge=os.getenv('SNOWLEOPARD_HEDGE_ENABLED', 'True').lower() == 'true',
+    attempt_timeout=float(os.getenv('SNOWLEOPARD_ATTEMPT_TIMEOUT', DEFAULT_ATTEMPT_TIMEOUT)),
+)
+
+
+def _get_api_key() -> str:
+    api_key = os.getenv('SNOWLEOPARD_API_KEY')
+    if not api_key:
+        raise ValueError("SNOWLEOPARD_API_KEY not set")
+
+    return api_key
+
+
+def _mode_suffix() -> str:
+    mode = get_cassette_mode()
+    return f" (cassette {mode})" if mode else ""
 
 
 def get_client() -> SnowLeopardClient:
-    """Get or create Snow Leopard client"""
+    """Get or create Snow Leopard client
+
+    With SNOWLEOPARD_CASSETTE_MODE=record the live client is wrapped to save
+    responses; with replay, a local stand-in serves them back offline.
+    """
     global _client
 
-    if _client is None:
-        api_key = os.getenv('SNOWLEOPARD_API_KEY')
-        if not api_key:
-            raise ValueError("SNOWLEOPARD_API_KEY not set")
+    # Lock-free once created; the lock only stops two threads both building one
+    client = _client
+    if client is not None:
+        return client
 
-        _client = SnowLeopardClient(api_key=api_key)
-        logger.info("[Snow Leopard] Client initialized")
+    with _client_lock:
+        if _client is None:
+            _client = wrap_client(lambda: SnowLeopardClient(api_key=_get_api_key()))
+            logger.info(f"[Snow Leopard] Client initialized{_mode_suffix()}")
 
     return _client
 
 
-def query_snowleopard(query: str) -> Dict[str, Any]:
+def get_async_client() -> AsyncSnowLeopardClient:
+    """Get or create the async Snow Leopard client for the running event loop
+
+    The client wraps a single httpx.AsyncClient, so every coroutine on the
+    loop shares one pool of keep-alive connections to the API. httpx pools
+    are bound to the loop that created them, so a new loop gets a new client
+    and the previous one is closed.
+    """
+    global _async_client, _async_client_loop
+
+    loop = asyncio.get_running_loop()
+
+    if _async_client is not None and _async_client_loop is loop:
+        return _async_client
+
+    with _client_lock:
+        if _async_client is None or _async_client_loop is not loop:
+            if _async_client is not None:
+                _retire_async_client(_async_client, _async_client_loop)
+            _async_client = wrap_client(lambda: AsyncSnowLeopardClient(api_key=_get_api_key()), is_async=True)
+            _async_client_loop = loop
+            logger.info(f"[Snow Leopard] Async client initialized{_mode_suffix()}")
+
+        return _async_client
+
+
+def _get_async_flights() -> AsyncSingleFlight:
+    """Get or create the single-flight group for the running event loop
+
+    Followers await the leader's task, which only works on the loop that
+    created it, so flights are never shared across loops.
+    """
+    loop = asyncio.get_running_loop()
+
+    flights = _async_flights.get(loop)
+    if flights is not None:
+        return flights
+
+    with _client_lock:
+        return _async_flights.setdefault(loop, AsyncSingleFlight())
+
+
+def _retire_async_client(client, owner: asyncio.AbstractEventLoop):
+    """Close a client replaced for a new loop, on its own loop while that still runs"""
+    if owner.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(client.close(), owner)
+            return
+        except RuntimeError:
+            pass  # The loop closed in the meantime
+
+    task = asyncio.get_running_loop().create_task(_close_quietly(client))
+    _retiring.add(task)
+    task.add_done_callback(_retiring.discard)
+
+
+async def _close_quietly(client):
+    try:
+        await client.close()
+    except Exception as e:
+        # Connections of a closed loop cannot shut down cleanly; they are dropped
+        logger.debug(f"[Snow Leopard] Closing replaced async client: {e}")
+
+
+async def close_async_client():
+    """Close the pooled async client and its connections"""
+    global _async_client, _async_client_loop
+
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+        _async_client_loop = None
+
+
+def _get_datafile_id() -> str:
+    datafile_id = os.getenv('SNOWLEOPARD_DATAFILE_ID')
+
+    if not datafile_id:
+        raise ValueError("SNOWLEOPARD_DATAFILE_ID not set")
+
+    return datafile_id
+
+
+def _lookup_cache(cache, datafile_id: str, query: str, start_time: float) -> Optional[Dict[str, Any]]:
+    """Return a cached response for the query, or None on a miss"""
+    if not cache:
+        return None
+
+    cached = cache.get(datafile_id, query)
+    if cached is None:
+        return None
+
+    cached['cached'] = True
+    cached['execution_time_ms'] = round((time.time() - start_time) * 1000)
+    logger.info(f"[Snow Leopard] ✓ Cache hit for: {query[:80]}")
+    return cached
+
+
+def _check_result(result):
+    """
+    Raise for API error objects so they can be retried and counted by the breaker
+
+    That covers an APIError, a response without data and one whose schema
+    data is an ErrorSchemaData. Only results that pass are cached or learned
+    from, so a transient upstream error is never stored as an empty answer.
+    """
+    if not hasattr(result, 'data'):
+        raise UpstreamStatusError(getattr(result, 'responseStatus', 'UNKNOWN'),
+                                  getattr(result, 'description', ''))
+
+    status = getattr(result, 'responseStatus', '') or 'UNKNOWN'
+    if status == 'SUCCESS':
+        # An error payload under a SUCCESS status: treat it as unexplained
+        status = 'UNKNOWN'
+
+    if not result.data:
+        raise UpstreamStatusError(status, 'response has no data')
+
+    schema_data = result.data[0]
+    if getattr(schema_data, 'objType', None) == 'errorSchemaData' or not hasattr(schema_data, 'rows'):
+        raise UpstreamStatusError(status, getattr(schema_data, 'error', '') or 'response has no rows')
+
+    return result
+
+
+def _build_response(result, start_time: float) -> Dict[str, Any]:
+    """Convert a retrieve result into the tool's response dict"""
+    # Extract SchemaData object attributes cleanly
+    # Result is guaranteed to be a SchemaData object from Snow Leopard API
+    # Use getattr() to safely extract attributes with fallbacks
+
+    response_status = getattr(result, 'responseStatus', '')
+    rows = getattr(result.data[0], 'rows', [])
+    sql = getattr(result.data[0], 'query', '')
+    execution_time = round((time.time() - start_time) * 1000)
+
+    logger.info(f"[Snow Leopard] ✓ Extracted {len(rows)} rows from SchemaData")
+
+    # Debug logging: Show structure of first row if data present
+    if rows:
+        logger.debug(f"[Snow Leopard] Response type: {type(rows)}")
+        first_row = rows[0] if isinstance(rows, list) and rows else None
+
+        if first_row and isinstance(first_row, dict):
+            logger.debug(f"[Snow Leopard] Row keys: {list(first_row.keys())}")
+            logger.debug(f"[Snow Leopard] Sample row: {json.dumps(first_row, indent=2, default=str)}")
+        elif first_row:
+            logger.debug(f"[Snow Leopard] Row content: {first_row}")
+
+    return {
+        'success': True,
+        'rows': rows,
+        'sql': sql,
+        'execution_time_ms': execution_time,
+        'cached': False,
+        'message': ''
+    }
+
+
+def _share_response(response: Dict[str, Any], shared: bool) -> Dict[str, Any]:
+    """Give coalesced callers their own copy of the leader's response dict"""
+    if not shared:
+        return response
+
+    return {**response, 'coalesced': True}
+
+
+def _async_flight_stats() -> Dict[str, int]:
+    with _client_lock:
+        groups = list(_async_flights.values())
+
+    totals = {'in_flight': 0, 'leaders': 0, 'followers': 0}
+    for flights in groups:
+        for name, value in flights.stats().items():
+            totals[name] += value
+    return totals
+
+
+def get_flight_stats() -> Dict[str, Dict[str, int]]:
+    """Get single-flight counters for the sync and async paths"""
+    return {
+        'sync': _flights.stats(),
+        'async': _async_flight_stats(),
+    }
+
+
+def get_upstream_stats() -> Dict[str, Any]:
+    """Get retry, hedge and circuit breaker counters for the Snow Leopard upstream"""
+    return _resilience.stats()
+
+
+def _build_error_response(e: Exception) -> Dict[str, Any]:
+    logger.error(f"[Snow Leopard] ❌ Failed: {str(e)}")
+    import traceback
+    logger.error(f"[Snow Leopard] Traceback: {traceback.format_exc()}")
+
+    return {
+        'success': False,
+        'error': str(e),
+        'rows': [],
+        'sql': '',
+        'execution_time_ms': 0,
+        'cached': False
+    }
+
+
+def _to_columnar(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of the response with rows converted to a ColumnarResult (unchanged if they are not dicts)"""
+    if not response.get('success'):
+        return response
+
+    try:
+        return {**response, 'rows': ColumnarResult.from_rows(response.get('rows', []))}
+    except TypeError as e:
+        logger.warning(f"[Snow Leopard] Keeping rows as a list: {e}")
+        return response
+
+
+def query_snowleopard(query: str, use_cache: bool = True, columnar: bool = False) -> Dict[str, Any]:
     """Query Snow Leopard for financial data
-    
+
     Args:
         query: User's natural language query
-        
+        use_cache: Serve repeat questions locally (stored SQL plans, then the result cache)
+        columnar: Return rows as a ColumnarResult (typed column arrays that
+            still iterate as dicts) instead of a list of dicts
+
     Returns:
-        Dict with keys: success, rows, sql, execution_time_ms, message/error
+        Dict with keys: success, rows, sql, execution_time_ms, cached, message/error
     """
+    response = _query_snowleopard(query, use_cache)
+    return _to_columnar(response) if columnar else response
+
+
+def _query_snowleopard(query: str, use_cache: bool) -> Dict[str, Any]:
     try:
         start_time = time.time()
-        client = get_client()
-        datafile_id = os.getenv('SNOWLEOPARD_DATAFILE_ID')
-        
-        if not datafile_id:
-            raise ValueError("SNOWLEOPARD_DATAFILE_ID not set")
-        
-        logger.info(f"[Snowleopard] Query: {query[:80]}...")
-        
-        # Call Snow Leopard API with correct parameter names
-        result = client.retrieve(datafile_id=datafile_id, user_query=query)
-        
-        # Extract SchemaData object attributes cleanly
-        # Result is guaranteed to be a SchemaData object from Snow Leopard API
-        # Use getattr() to safely extract attributes with fallbacks
-        
-        response_status = getattr(result, 'responseStatus', '')
-        rows = getattr(result.data[0], 'rows', [])
-        sql = getattr(result.data[0], 'query', '')
-        execution_time = round((time.time() - start_time) * 1000)
-        
-        logger.info(f"[Snow Leopard] ✓ Extracted {len(rows)} rows from SchemaData")
-        
-        # Debug logging: Show structure of first row if data present
-        if rows:
-            logger.debug(f"[Snow Leopard] Response type: {type(rows)}")
-            first_row = rows[0] if isinstance(rows, list) and rows else None
-            
-            if first_row and isinstance(first_row, dict):
-                logger.debug(f"[Snow Leopard] Row keys: {list(first_row.keys())}")
-                logger.debug(f"[Snow Leopard] Sample row: {json.dumps(first_row, indent=2, default=str)}")
-            elif first_row:
-                logger.debug(f"[Snow Leopard] Row content: {first_row}")
-        
-        return {
-            'success': True,
-            'rows': rows,
-            'sql': sql,
-            'execution_time_ms': execution_time,
-            'message': ''
-        }
-    
+        datafile_id = _get_datafile_id()
+
+        local = get_local_sql() if use_cache else None
+        if local:
+            answered = local.answer(datafile_id, query)
+            if answered is not None:
+                return answered
+
+        cache = get_result_cache() if use_cache else None
+        cached = _lookup_cache(cache, datafile_id, query, start_time)
+        if cached is not None:
+            return cached
+
+        def fetch() -> Dict[str, Any]:
+            client = get_client()
+            logger.info(f"[Snowleopard] Query: {query[:80]}...")
+
+            # Call Snow Leopard API with correct parameter names
+            result = _resilience.call(
+                lambda: _check_result(client.retrieve(datafile_id=datafile_id, user_query=query))
+            )
+            response = _build_response(result, start_time)
+
+            if cache:
+                cache.put(datafile_id, query, response)
+            if local:
+                local.learn(datafile_id, query, response['sql'], response['rows'])
+
+            return response
+
+        response, shared = _flights.do(ResultCache.make_key(datafile_id, query), fetch)
+        return _share_response(response, shared)
+
+    except Exception as e:
+        return _build_error_response(e)
+
+
+async def query_snowleopard_async(query: str, use_cache: bool = True, columnar: bool = False) -> Dict[str, Any]:
+    """Query Snow Leopard for financial data without blocking the event loop
+
+    Same contract as query_snowleopard, but awaits the pooled async client so
+    many sessions can wait on the network concurrently.
+
+    Args:
+        query: User's natural language query
+        use_cache: Serve repeat questions locally (stored SQL plans, then the result cache)
+        columnar: Return rows as a ColumnarResult instead of a list of dicts
+
+    Returns:
+        Dict with keys: success, rows, sql, execution_time_ms, cached, message/error
+    """
+    response = await _query_snowleopard_async(query, use_cache)
+    return _to_columnar(response) if columnar else response
+
+
+async def _query_snowleopard_async(query: str, use_cache: bool) -> Dict[str, Any]:
+    try:
+        start_time = time.time()
+        datafile_id = _get_datafile_id()
+
+        local = get_local_sql() if use_cache else None
+        if local and local.plan_for(datafile_id, query):
+            answered = await asyncio.to_thread(local.answer, datafile_id, query)
+            if answered is not None:
+                return answered
+
+        cache = get_result_cache() if use_cache else None
+        cached = _lookup_cache(cache, datafile_id, query, start_time)
+        if cached is not None:
+            return cached
+
+        async def fetch() -> Dict[str, Any]:
+            client = get_async_client()
+            logger.info(f"[Snowleopard] Async query: {query[:80]}...")
+
+            async def retrieve():
+                return _check_result(await client.retrieve(datafile_id=datafile_id, user_query=query))
+
+            result = await _resilience.acall(retrieve)
+            response = _build_response(result, start_time)
+
+            if cache:
+                cache.put(datafile_id, query, response)
+            if local:
+                await asyncio.to_thread(local.learn, datafile_id, query, response['sql'], response['rows'])
+
+            return response
+
+        response, shared = await _get_async_flights().do(ResultCache.make_key(datafile_id, query), fetch)
+        return _share_response(response, shared)
+
     except Exception as e:
-        logger.error(f"[Snow Leopard] ❌ Failed: {str(e)}")
-        import traceback
-        logger.error(f"[Snow Leopard] Traceback: {traceback.format_exc()}")
-        
-        return {
-            'success': False,
-            'error': str(e),
-            'rows': [],
-            'sql': '',
-            'execution_time_ms': 0
-        }
+        return _build_error_response(e)
+
+
+def stream_snowleopard_rows(query: str, batch_size: Optional[int] = DEFAULT_BATCH_SIZE,
+                            use_cache: bool = True) -> Iterator[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+    """Stream the rows answering a query instead of returning one list
+
+    When the question has a stored local SQL plan, rows are fetched from
+    SQLite batch by batch as they are produced. Otherwise the retrieve
+    endpoint answers with a single JSON document (capped at the datafile's
+    rowMax), so rows are handed out as soon as it is decoded and the
+    generator keeps no copy of its own. Downstream consumers such as
+    CoachingAnalyzer walk them once, so their working memory is bounded by
+    the batch size rather than the result size.
+
+    Args:
+        query: User's natural language query
+        batch_size: Rows per yielded list, or None to yield rows one at a time
+        use_cache: Serve repeat questions locally (stored SQL plans, then the result cache)
+
+    Raises:
+        SnowLeopardQueryError: If the query fails
+    """
+    local = get_local_sql() if use_cache else None
+    sql = local.plan_for(_get_datafile_id(), query) if local else None
+    if sql:
+        # Closing this generator early closes the local one and frees its connection
+        batches = local.stream(sql, batch_size or DEFAULT_BATCH_SIZE)
+        try:
+            if batch_size is None:
+                for batch in batches:
+                    yield from batch
+            else:
+                yield from batches
+        finally:
+            batches.close()
+        return
+
+    response = query_snowleopard(query, use_cache=use_cache)
+    if not response.get('success'):
+        raise SnowLeopardQueryError(response.get('error', 'Snow Leopard query failed'))
+
+    rows = response.get('rows', [])
+    del response
+
+    if batch_size is None:
+        yield from rows
+    else:
+        yield from iter_batches(rows, batch_size)
+
+
+async def query_snowleopard_many_async(queries: Iterable[str],
+                                       max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                                       use_cache: bool = True) -> List[Dict[str, Any]]:
+    """Run many Snow Leopard queries concurrently, at most max_concurrency in flight
+
+    Args:
+        queries: Natural language queries
+        max_concurrency: Upper bound on simultaneous retrieve calls
+        use_cache: Serve repeat questions locally (stored SQL plans, then the result cache)
+
+    Returns:
+        One response dict per query, in input order. Each has the usual
+        query_snowleopard keys plus query, index and queue_time_ms (time
+        spent waiting for a concurrency slot).
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_one(index: int, query: str) -> Dict[str, Any]:
+        queued_at = time.time()
+        async with semaphore:
+            started_at = time.time()
+            response = await query_snowleopard_async(query, use_cache=use_cache)
+
+        response['query'] = query
+        response['index'] = index
+        response['queue_time_ms'] = round((started_at - queued_at) * 1000)
+        return response
+
+    return list(await asyncio.gather(*(run_one(i, q) for i, q in enumerate(queries))))
+
+
+def query_snowleopard_many(queries: Iterable[str],
+                           max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                           use_cache: bool = True) -> List[Dict[str, Any]]:
+    """Blocking wrapper around query_snowleopard_many_async
+
+    Runs the batch on a private event loop, so wall-clock time is close to
+    the slowest query rather than the sum. Call the async version instead
+    from code that already has a running loop.
+    """
+    async def run_batch():
+        try:
+            return await query_snowleopard_many_async(queries, max_concurrency, use_cache)
+        finally:
+            await close_async_client()
+
+    start_time = time.time()
+    results = asyncio.run(run_batch())
+
+    failed = sum(1 for r in results if not r.get('success'))
+    logger.info(f"[Snow Leopard] Batch of {len(results)} queries finished in "
+                f"{round((time.time() - start_time) * 1000)}ms ({failed} failed)")
+    return results
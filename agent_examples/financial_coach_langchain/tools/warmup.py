@@ -0,0 +1,148 @@
+"""
+Background warm-up for a fresh CLI session.
+
+While the banner prints and the user types, a daemon thread compiles the
+coach graph, builds the Snow Leopard client and opens its pooled connection
+(TCP + TLS), opens a local database connection and loads the merchant
+index that intent routing and merchant analysis read on every turn, and
+pre-runs a list of common questions into the result cache. Every step is best-effort: a
+failure is logged and recorded, never raised.
+"""
+
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+
+
+class WarmUp:
+    """Runs the warm-up steps once on a background thread and records their timings"""
+
+    def __init__(self, questions: List[str], concurrency: int = DEFAULT_CONCURRENCY):
+        self.questions = list(questions)
+        self.concurrency = concurrency
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.questions_warmed = 0
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'WarmUp':
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='warmup', daemon=True)
+            self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until warm-up finishes; returns False on timeout"""
+        return self._done.wait(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def _run(self):
+        try:
+            self._step('compile graph', self._compile_graph)
+            self._step('connect', self._connect)
+            self._step('local index', self._load_local_index)
+            self._step('questions', self._prerun_questions)
+        finally:
+            self._done.set()
+            logger.info(f"[WarmUp] ✓ Finished in {sum(s['ms'] for s in self.steps.values()):.0f}ms")
+
+    def _step(self, name: str, fn):
+        start = time.perf_counter()
+        try:
+            detail = fn()
+            self.steps[name] = {'ok': True, 'ms': round((time.perf_counter() - start) * 1000, 1), 'detail': detail}
+        except Exception as e:
+            logger.warning(f"[WarmUp] {name} failed: {e}")
+            self.steps[name] = {'ok': False, 'ms': round((time.perf_counter() - start) * 1000, 1), 'detail': str(e)}
+
+    def _compile_graph(self):
+        from agents.financial_coach import get_coach_graph
+        get_coach_graph()
+
+    def _connect(self):
+        """Build the client and open a keep-alive connection in its pool"""
+        from tools.snowleopard_tool import get_client
+
+        client = get_client()
+
+        # The SDK client keeps its httpx.Client on .client; recording wraps it
+        # as .inner. Replay clients have no connection to open.
+        http = getattr(client, 'client', None) or getattr(getattr(client, 'inner', None), 'client', None)
+        if http is None:
+            return 'no connection (replay)'
+
+        import httpx
+        try:
+            http.head('/')
+        except httpx.HTTPError as e:
+            return f'connect failed: {e}'
+        return 'connected'
+
+    def _load_local_index(self):
+        """Open a pooled local connection and load the merchant index the first turn would build"""
+        from tools.local_sql import get_local_sql
+        from tools.merchant_index import get_merchant_index
+
+        local = get_local_sql()
+        if local is None:
+            return 'no local database'
+
+        local.execute('SELECT 1')
+        index = get_merchant_index()
+        if index is None:
+            return 'connected (merchant index disabled)'
+        return f'{len(index.snapshot())} merchants indexed'
+
+    def _prerun_questions(self):
+        """Answer the common questions into the result cache, a few at a time"""
+        from tools.snowleopard_tool import query_snowleopard
+        from utils.result_cache import get_result_cache
+
+        if get_result_cache() is None or not self.questions:
+            return 'skipped (result cache disabled)' if self.questions else 'no questions'
+
+        # Through the sync path so a user asking the same question meanwhile
+        # joins the in-flight call instead of sending another
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='warmup') as pool:
+            responses = list(pool.map(query_snowleopard, self.questions))
+
+        self.questions_warmed = sum(1 for r in responses if r.get('success'))
+        return f'{self.questions_warmed}/{len(self.questions)} cached'
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {'done': self.done, 'questions_warmed': self.questions_warmed}
+        for name, step in self.steps.items():
+            stats[f'{name}_ms'] = step['ms']
+            stats[name] = step['detail'] if step['ok'] else f"failed: {step['detail']}"
+        return stats
+
+
+def warmup_enabled() -> bool:
+    return os.getenv('SNOWLEOPARD_WARMUP_ENABLED', 'False').lower() == 'true'
+
+
+def warmup_questions(default: List[str]) -> List[str]:
+    """Questions to pre-run: SNOWLEOPARD_WARMUP_QUESTIONS ('|'-separated) or the given default"""
+    configured = os.getenv('SNOWLEOPARD_WARMUP_QUESTIONS', '')
+    if configured:
+        return [q.strip() for q in configured.split('|') if q.strip()]
+    return list(default)
+
+
+def start_warmup(default_questions: List[str]) -> WarmUp:
+    """Start warm-up in the background and return its handle"""
+    return WarmUp(
+        questions=warmup_questions(default_questions),
+        concurrency=int(os.getenv('SNOWLEOPARD_WARMUP_CONCURRENCY', DEFAULT_CONCURRENCY)),
+    ).start()
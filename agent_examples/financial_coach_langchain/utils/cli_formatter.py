@@ -7,7 +7,10 @@ from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.syntax import Syntax
-from typing import List, Dict, Any
+from itertools import islice
+from typing import List, Dict, Any, Iterable
+
+from utils.row_stream import iter_rows
 
 console = Console()
 
@@ -19,10 +22,17 @@ def print_header(text: str):
 def print_result(response_text: str, execution_time_ms: float = None):
     """Print query result"""
     console.print(response_text, style="green")
-    
+    print_execution_time(execution_time_ms)
+
+def print_execution_time(execution_time_ms: float = None):
+    """Print query execution time, if known"""
     if execution_time_ms:
         console.print(f"⏱️  Executed in {execution_time_ms:.2f}ms", style="dim yellow")
 
+def print_section(section_text: str):
+    """Print one section of a streamed response as soon as it arrives"""
+    console.print(section_text, style="green")
+
 def print_error(error_text: str):
     """Print error message"""
     console.print(f"❌ {error_text}", style="red")
@@ -53,10 +63,15 @@ def print_metrics_table(metrics: Dict[str, Any]):
     
     console.print(table)
 
-def print_transactions_table(transactions: List[Dict]):
-    """Print transactions in a table"""
+def print_transactions_table(transactions: Iterable):
+    """Print transactions in a table
+    
+    Accepts a list, or a stream of rows or row batches; only the rows
+    that are displayed are pulled from the stream.
+    """
     
-    if not transactions:
+    first_rows = list(islice(iter_rows(transactions), 10))  # Show first 10
+    if not first_rows:
         console.print("No transactions found", style="yellow")
         return
     
@@ -66,7 +81,7 @@ def print_transactions_table(transactions: List[Dict]):
     table.add_column("Category", style="blue")
     table.add_column("Amount", style="green", justify="right")
     
-    for tx in transactions[:10]:  # Show first 10
+    for tx in first_rows:
         table.add_row(
             tx.get('transaction_date', 'N/A'),
             tx.get('merchant_name', 'N/A'),
@@ -75,3 +90,27 @@ def print_transactions_table(transactions: List[Dict]):
         )
     
     console.print(table)
+
+def print_batch_results(results: List[Dict]):
+    """Print per-query timing and status for a batch of Snow Leopard queries"""
+
+    table = Table(title="📋 Batch Results")
+    table.add_column("#", style="cyan")
+    table.add_column("Query", style="magenta")
+    table.add_column("Time (ms)", style="green", justify="right")
+    table.add_column("Queued (ms)", style="dim", justify="right")
+    table.add_column("Rows", style="blue", justify="right")
+    table.add_column("Status")
+
+    for result in results:
+        status = "[green]ok[/green]" if result.get('success') else f"[red]{result.get('error', 'failed')[:40]}[/red]"
+        table.add_row(
+            str(result.get('index', '')),
+            result.get('query', '')[:40],
+            f"{result.get('execution_time_ms', 0):.0f}",
+            f"{result.get('queue_time_ms', 0):.0f}",
+            str(len(result.get('rows', []))),
+            status
+        )
+
+    console.print(table)
@@ -0,0 +1,59 @@
+"""
+Precompiled keyword classification.
+
+A KeywordMatcher is built once from named keyword lists ("classes") and
+compiles one regex per class. Classifying a string lowercases it and runs
+each class's regex once, which matches exactly when
+any(keyword in text.lower() for keyword in keywords) would. Results are
+memoized per distinct string, so classifying a column of merchant names
+costs one pass per distinct name rather than rows x keywords.
+"""
+
+
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Sequence
+
+DEFAULT_CACHE_SIZE = 65536
+
+
+class KeywordMatcher:
+    """Substring keyword classes compiled to one regex per class, memoized per string"""
+
+    def __init__(self, classes: Dict[str, Sequence[str]], cache_size: int = DEFAULT_CACHE_SIZE):
+        self.class_names = list(classes)
+        self.bits = {name: 1 << i for i, name in enumerate(self.class_names)}
+
+        self._patterns = [
+            (self.bits[name], re.compile('|'.join(re.escape(keyword) for keyword in keywords)))
+            for name, keywords in classes.items() if keywords
+        ]
+        self.classify_bits = lru_cache(maxsize=cache_size)(self._classify_bits)
+
+    def _classify_bits(self, text: str) -> int:
+        text = text.lower()
+        bits = 0
+        for bit, pattern in self._patterns:
+            if pattern.search(text):
+                bits |= bit
+        return bits
+
+    def classify(self, text: str) -> FrozenSet[str]:
+        """Names of every class with a keyword in text"""
+        bits = self.classify_bits(text)
+        return frozenset(name for name in self.class_names if bits & self.bits[name])
+
+    def matches(self, text: str, name: str) -> bool:
+        """Whether text contains any keyword of the class"""
+        return bool(self.classify_bits(text) & self.bits[name])
+
+    def first_match(self, text: str):
+        """The first class, in definition order, with a keyword in text, or None"""
+        bits = self.classify_bits(text)
+        for name in self.class_names:
+            if bits & self.bits[name]:
+                return name
+        return None
+
+    def cache_info(self):
+        return self.classify_bits.cache_info()
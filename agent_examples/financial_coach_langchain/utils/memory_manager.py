@@ -7,26 +7,37 @@ Simply tracks conversation history and preferences.
 
 
 import logging
+import threading
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Exchanges kept in memory; enrichment only reads the last few
+DEFAULT_MAX_HISTORY = 50
+
+
 class MemoryManager:
     """
     Simple memory manager using state-based approach (LangGraph pattern).
     No deprecated ConversationSummaryMemory - just pure conversation tracking.
+    
+    Safe to share across threads: writers take a lock and swap in new
+    history/preference objects, so readers never lock and always see a
+    consistent snapshot. History keeps the last max_history exchanges, so
+    each copy-on-write append is bounded however long the session runs.
     """
     
-    def __init__(self, memory_type: str = 'state'):
+    def __init__(self, memory_type: str = 'state', max_history: int = DEFAULT_MAX_HISTORY):
         self.memory_type = memory_type  # 'state' (no LangChain memory objects)
+        self.max_history = max_history
         self.user_preferences = {}
         self.conversation_history = []
+        self.total_messages = 0
         self.initialized = True  # Always initialized (no external deps)
+        self._write_lock = threading.Lock()
         
-        logger.info("="*60)
-        logger.info("[MemoryManager] Initialized (state-based, no ConversationSummaryMemory)")
-        logger.info("="*60)
+        logger.debug("[MemoryManager] Initialized (state-based, no ConversationSummaryMemory)")
     
     def add_message(self, query: str, response: str, metadata: Optional[Dict] = None) -> bool:
         """
@@ -36,61 +47,96 @@ class MemoryManager:
         No LLM calls, no deprecation warnings.
         """
         try:
-            # Store message
-            self.conversation_history.append({
+            entry = {
                 'timestamp': datetime.now().isoformat(),
                 'query': query,
                 'response': response,
                 'metadata': metadata or {}
-            })
+            }
             
-            # Extract and cache user preferences
-            if metadata:
-                self._update_preferences(metadata)
+            with self._write_lock:
+                # Store message (copy-on-write, so readers keep their snapshot)
+                self.conversation_history = (self.conversation_history + [entry])[-self.max_history:]
+                self.total_messages += 1
+                
+                # Extract and cache user preferences
+                if metadata:
+                    self._update_preferences(metadata)
             
-            logger.debug(f"[add_message] ✓ Message #{len(self.conversation_history)} added")
+            logger.debug(f"[add_message] ✓ Message #{self.total_messages} added")
             return True
         
         except Exception as e:
             logger.error(f"[add_message] ❌ Error: {e}")
             return False
     
+    def restore(self, messages: List[Dict[str, Any]]) -> int:
+        """
+        Rebuild history from stored session messages (SessionStore.load)
+
+        Each user message is paired with the assistant message of the same
+        turn; returns how many exchanges were restored.
+        """
+        history = []
+        pending = {}
+        for message in messages:
+            if message.get('role') == 'user':
+                pending[message.get('turn')] = message.get('content', '')
+            elif message.get('role') == 'assistant' and message.get('turn') in pending:
+                history.append({
+                    'timestamp': None,
+                    'query': pending.pop(message.get('turn')),
+                    'response': message.get('content', ''),
+                    'metadata': {}
+                })
+
+        with self._write_lock:
+            self.conversation_history = (history + self.conversation_history)[-self.max_history:]
+            self.total_messages += len(history)
+
+        logger.debug(f"[restore] ✓ Restored {len(history)} messages")
+        return len(history)
+    
     def get_context(self) -> Dict[str, Any]:
         """
         Get context from recent messages for query enrichment.
         
         Returns the last few messages for context.
         """
-        if not self.conversation_history:
+        history = self.conversation_history
+        if not history:
             return {}
         
         # Get last 3 messages for context
-        recent = self.conversation_history[-3:] if len(self.conversation_history) >= 3 else self.conversation_history
+        recent = history[-3:] if len(history) >= 3 else history
         
         return {
             'recent_messages': recent,
-            'total_messages': len(self.conversation_history),
+            'total_messages': self.total_messages,
             'user_preferences': self.user_preferences
         }
     
     def get_summary(self) -> Dict[str, Any]:
         """Get conversation summary for display"""
         
+        history = self.conversation_history
+        user_preferences = self.user_preferences
+        
         # Calculate unique merchants
         unique_merchants = set()
-        for msg in self.conversation_history:
+        for msg in history:
             if 'merchants' in msg.get('metadata', {}):
                 for m in msg['metadata'].get('merchants', []):
                     unique_merchants.add(m)
         
         return {
-            'total_messages': len(self.conversation_history),
+            'total_messages': self.total_messages,
             'unique_merchants': len(unique_merchants),
             'user_preferences': dict(sorted(
-                self.user_preferences.items(),
+                user_preferences.items(),
                 key=lambda x: x,
                 reverse=True
-            )[:5]) if self.user_preferences else {},
+            )[:5]) if user_preferences else {},
             'memory_initialized': self.initialized,
             'memory_type': self.memory_type,
             'recent_topics': self._get_recent_topics()
@@ -101,17 +147,21 @@ class MemoryManager:
         return self.conversation_history
     
     def _update_preferences(self, metadata: Dict):
-        """Extract and cache user preferences from metadata"""
+        """Extract and cache user preferences from metadata (caller holds the write lock)"""
         try:
+            preferences = dict(self.user_preferences)
+            
             # Track frequently mentioned categories
             if 'category' in metadata:
                 category = metadata['category']
-                self.user_preferences[category] = self.user_preferences.get(category, 0) + 1
+                preferences[category] = preferences.get(category, 0) + 1
             
             # Track frequently mentioned merchants
             if 'merchants' in metadata:
                 for merchant in metadata['merchants']:
-                    self.user_preferences[merchant] = self.user_preferences.get(merchant, 0) + 1
+                    preferences[merchant] = preferences.get(merchant, 0) + 1
+            
+            self.user_preferences = preferences
         
         except Exception as e:
             logger.debug(f"[_update_preferences] Error: {e}")
@@ -128,6 +178,28 @@ class MemoryManager:
 
 # ===== GLOBAL SINGLETON INSTANCE =====
 
-logger.info("[MAIN] Creating global memory_manager instance...")
-memory_manager = MemoryManager(memory_type='state')
-logger.info(f"[MAIN] memory_manager initialized: {memory_manager.initialized}")
+_memory_manager = None
+_memory_manager_lock = threading.Lock()
+
+
+def get_memory_manager() -> MemoryManager:
+    """Get the process-wide memory manager, creating it on first use"""
+    global _memory_manager
+
+    # Lock-free once created; the lock only stops two threads both building one
+    manager = _memory_manager
+    if manager is not None:
+        return manager
+
+    with _memory_manager_lock:
+        if _memory_manager is None:
+            _memory_manager = MemoryManager(memory_type='state')
+
+    return _memory_manager
+
+
+def __getattr__(name):
+    # Keep `from utils.memory_manager import memory_manager` working
+    if name == 'memory_manager':
+        return get_memory_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,7 +4,7 @@ Metrics tracking for debugging and performance analysis.
 
 
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
 from rich.table import Table
 from rich.console import Console
 import statistics
@@ -14,12 +14,23 @@ console = Console()
 class MetricsTracker:
     """Track API calls, execution times, and query performance."""
     
-    def __init__(self):
+    def __init__(self, upstream_stats: Optional[Callable[[], Dict[str, Any]]] = None):
         self.calls: List[Dict[str, Any]] = []
         self.call_count = 0
+        self.upstream_stats = upstream_stats
     
-    def record_query(self, query: str, response: Dict, context: Dict = None):
-        """Record a single query execution"""
+    def get_upstream_health(self) -> Dict[str, Any]:
+        """Get retry/hedge counters and circuit breaker state from the upstream provider"""
+        if not self.upstream_stats:
+            return {}
+        
+        try:
+            return self.upstream_stats()
+        except Exception:
+            return {}
+    
+    def record_query(self, query: str, response: Dict, context: Dict = None, rows_returned: Optional[int] = None):
+        """Record a single query execution (rows_returned defaults to the response's own count)"""
         
         self.call_count += 1
         
@@ -29,7 +40,7 @@ class MetricsTracker:
             'query': query,
             'context': context or {},
             'execution_time_ms': response.get('execution_time_ms', 0),
-            'rows_returned': response.get('rows_returned', 0),
+            'rows_returned': response.get('rows_returned', 0) if rows_returned is None else rows_returned,
             'sql_generated': response.get('sql', ''),
             'success': response.get('success', True),
             'response_preview': response.get('response', '')[:100]
@@ -37,11 +48,48 @@ class MetricsTracker:
         
         self.calls.append(call_entry)
     
+    def get_stats(self) -> Dict[str, Any]:
+        """Get query counts, execution time statistics and rows retrieved"""
+        successful = [c for c in self.calls if c['success']]
+        times = [c['execution_time_ms'] for c in successful]
+        
+        return {
+            'total_queries': self.call_count,
+            'successful': len(successful),
+            'failed': self.call_count - len(successful),
+            'min_ms': min(times) if times else 0,
+            'max_ms': max(times) if times else 0,
+            'avg_ms': round(statistics.mean(times), 2) if times else 0,
+            'median_ms': round(statistics.median(times), 2) if times else 0,
+            'total_rows': sum(c.get('rows_returned', 0) for c in successful),
+        }
+    
+    def print_upstream_health(self):
+        """Print circuit breaker state and resilience counters"""
+        
+        health = self.get_upstream_health()
+        if not health:
+            return
+        
+        circuit = health.get('circuit', {})
+        state = circuit.get('state', 'unknown')
+        style = {'closed': 'green', 'half_open': 'yellow', 'open': 'red'}.get(state, 'white')
+        
+        console.print("\nUpstream Health:")
+        console.print(f"  • Circuit: {state}", style=style)
+        console.print(f"  • Times opened: {circuit.get('times_opened', 0)} (rejected {circuit.get('rejected', 0)} calls)")
+        console.print(f"  • Calls: {health.get('calls', 0)}, retries: {health.get('retries', 0)}, failures: {health.get('failures', 0)}")
+        console.print(f"  • Hedges: {health.get('hedges_launched', 0)} launched, {health.get('hedges_won', 0)} won, "
+                      f"{health.get('hedges_skipped', 0)} skipped")
+        if health.get('hedge_threshold_ms') is not None:
+            console.print(f"  • Hedge threshold (p95): {health['hedge_threshold_ms']}ms")
+    
     def print_summary(self):
         """Print summary of all queries"""
         
         if not self.calls:
             console.print("No queries recorded", style="yellow")
+            self.print_upstream_health()
             return
         
         console.print("\n" + "="*80)
@@ -67,6 +115,8 @@ class MetricsTracker:
         total_rows = sum(c.get('rows_returned', 0) for c in successful)
         console.print(f"\nTotal Rows Retrieved: {total_rows}")
         
+        self.print_upstream_health()
+        
         # Table of recent queries
         console.print("\n" + "="*80)
         console.print("Recent Queries:", style="bold")
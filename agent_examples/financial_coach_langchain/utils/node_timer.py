@@ -0,0 +1,40 @@
+"""
+Per-node wall time for LangGraph runs.
+
+Kept apart from utils.metrics so importing the metrics tracker does not pull
+in langchain_core.
+"""
+
+
+import time
+from typing import Dict, Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class NodeTimer(BaseCallbackHandler):
+    """
+    Callback handler that records wall time per LangGraph node
+
+    Pass a fresh instance per invocation: app.invoke(state, config={'callbacks': [timer]})
+    """
+
+    def __init__(self):
+        self.timings_ms: Dict[str, float] = {}
+        self._started: Dict[Any, tuple] = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        node = (metadata or {}).get('langgraph_node')
+        # Only the node's own run; nested runnables inside it carry the same metadata
+        if (node and not node.startswith('__') and kwargs.get('name') == node
+                and any(tag.startswith('graph:step:') for tag in tags or [])):
+            self._started[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started:
+            node, start = started
+            self.timings_ms[node] = round((time.perf_counter() - start) * 1000, 2)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self.on_chain_end(None, run_id=run_id)
@@ -0,0 +1,414 @@
+"""
+Resilience helpers for upstream API calls.
+
+Wraps a call with:
+- retries with exponential backoff and full jitter
+- a hedged duplicate request once the call outlives the observed p95 latency
+- a circuit breaker that fails fast while the upstream keeps failing
+
+Blocking calls run on the caller's thread; only hedges use the small hedge
+pool, and a hedge is skipped rather than queued when the pool is full, so a
+hung upstream cannot make unrelated callers wait for a worker.
+"""
+
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Upstream responseStatus values worth another attempt
+RETRYABLE_STATUSES = {'INTERNAL_SERVER_ERROR', 'LLM_ERROR', 'DB_CONNECTION_ERROR', 'UNKNOWN'}
+
+# Longest an attempt (with its hedge) is waited for before it counts as timed out
+DEFAULT_ATTEMPT_TIMEOUT = 120.0
+
+
+class UpstreamStatusError(Exception):
+    """Raised when the upstream answers with an error status instead of data"""
+
+    def __init__(self, status: str, description: str = ''):
+        self.status = str(status)
+        super().__init__(f"{self.status}: {description}" if description else self.status)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the circuit is open"""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transport failures, timeouts, 429/5xx and transient upstream statuses are retryable"""
+    if isinstance(error, (httpx.TransportError, TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+
+    if isinstance(error, UpstreamStatusError):
+        return error.status in RETRYABLE_STATUSES
+
+    status_code = getattr(error, 'status_code', None)
+    if isinstance(status_code, int):
+        return status_code == 429 or status_code >= 500
+
+    return False
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, max_retries: int = 2, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, retry: int) -> float:
+        """Seconds to sleep before the given retry (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (retry - 1))))
+
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker.
+
+    Opens after `failure_threshold` consecutive failures, rejects calls for
+    `reset_timeout` seconds, then lets a single probe through. A successful
+    probe closes the circuit; a failed one opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go to the upstream right now"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.time() - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    return False
+                self._probe_in_flight = True
+
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("[CircuitBreaker] Upstream recovered, closing circuit")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"[CircuitBreaker] Opening circuit after {self.consecutive_failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'times_opened': self.times_opened,
+            'rejected': self.rejected,
+        }
+
+
+class LatencyTracker:
+    """Rolling window of recent latencies for percentile estimates"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency at the given percentile, or None until min_samples are recorded"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class _PendingHedge:
+    """A blocking call's hedge, launched by a timer unless the primary finishes first"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._closed = False
+        self.future: Optional[Future] = None
+
+    def launch(self, submit: Callable[[], Future]) -> bool:
+        with self._lock:
+            if self._closed:
+                return False
+            self.future = submit()
+            return True
+
+    def close(self) -> Optional[Future]:
+        """Stop any later launch; returns the hedge if one was launched"""
+        with self._lock:
+            self._closed = True
+            return self.future
+
+
+class ResilientCaller:
+    """Run upstream calls with retries, hedging and a circuit breaker"""
+
+    def __init__(self, retry_policy: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 latency: Optional[LatencyTracker] = None,
+                 hedge: bool = True, hedge_percentile: float = 95,
+                 hedge_workers: int = 8, attempt_timeout: float = DEFAULT_ATTEMPT_TIMEOUT):
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = latency or LatencyTracker()
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.attempt_timeout = attempt_timeout
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.hedges_launched = 0
+        self.hedges_skipped = 0
+        self.hedges_won = 0
+        self._hedge_workers = hedge_workers
+        self._hedge_slots = threading.BoundedSemaphore(hedge_workers)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _hedge_delay(self) -> Optional[float]:
+        return self.latency.percentile(self.hedge_percentile) if self.hedge else None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._hedge_workers,
+                                                    thread_name_prefix='hedge')
+            return self._executor
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """Call fn (blocking) under the retry, hedge and breaker policies"""
+        self._count('calls')
+        retry = 0
+
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError("Snow Leopard circuit is open - failing fast while the upstream recovers")
+
+            try:
+                result = self._attempt(fn)
+                self.breaker.record_success()
+                return result
+            except Exception as e:
+                self._count('failures')
+                retryable = is_retryable(e)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    # The upstream answered; a bad request says nothing about its health
+                    self.breaker.record_success()
+
+                if retry >= self.retry_policy.max_retries or not retryable:
+                    raise
+
+                retry += 1
+                self._count('retries')
+                delay = self.retry_policy.backoff(retry)
+                logger.warning(f"[Resilience] Attempt failed ({e}); retry {retry} in {delay:.2f}s")
+                time.sleep(delay)
+
+    def _timed(self, fn: Callable[[], Any]) -> Any:
+        start = time.time()
+        result = fn()
+        self.latency.record(time.time() - start)
+        return result
+
+    def _attempt(self, fn: Callable[[], Any]) -> Any:
+        """
+        One blocking attempt, run on the caller's thread
+
+        A blocking call cannot be abandoned, so the caller always waits for
+        its own primary (bounded by the client's timeouts). A hedge pays off
+        when that slow primary then fails: its answer is already on the way
+        instead of a retry starting from scratch.
+        """
+        hedge_after = self._hedge_delay()
+        if hedge_after is None:
+            return self._timed(fn)
+
+        pending = _PendingHedge()
+        timer = threading.Timer(hedge_after, self._launch_hedge, (fn, hedge_after, pending))
+        timer.daemon = True
+        timer.start()
+
+        try:
+            result = self._timed(fn)
+        except Exception as error:
+            timer.cancel()
+            hedge = pending.close()
+            if hedge is None:
+                raise
+            try:
+                result = hedge.result(timeout=self.attempt_timeout)
+            except FutureTimeoutError:
+                hedge.cancel()
+                raise error
+            except Exception:
+                raise error
+            self._count('hedges_won')
+            return result
+
+        timer.cancel()
+        hedge = pending.close()
+        if hedge is not None:
+            # A running loser finishes in its worker and frees its slot then
+            hedge.cancel()
+        return result
+
+    def _launch_hedge(self, fn: Callable[[], Any], hedge_after: float, pending: _PendingHedge):
+        if not self._hedge_slots.acquire(blocking=False):
+            self._count('hedges_skipped')
+            logger.debug("[Resilience] All hedge workers busy, not hedging")
+            return
+
+        def submit() -> Future:
+            self._count('hedges_launched')
+            logger.info(f"[Resilience] Call exceeded p{self.hedge_percentile:.0f} ({hedge_after * 1000:.0f}ms), hedging")
+            future = self._get_executor().submit(self._timed, fn)
+            future.add_done_callback(lambda _: self._hedge_slots.release())
+            return future
+
+        if not pending.launch(submit):
+            self._hedge_slots.release()
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn under the retry, hedge and breaker policies"""
+        self._count('calls')
+        retry = 0
+
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError("Snow Leopard circuit is open - failing fast while the upstream recovers")
+
+            try:
+                result = await self._aattempt(fn)
+                self.breaker.record_success()
+                return result
+            except Exception as e:
+                self._count('failures')
+                retryable = is_retryable(e)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    # The upstream answered; a bad request says nothing about its health
+                    self.breaker.record_success()
+
+                if retry >= self.retry_policy.max_retries or not retryable:
+                    raise
+
+                retry += 1
+                self._count('retries')
+                delay = self.retry_policy.backoff(retry)
+                logger.warning(f"[Resilience] Attempt failed ({e}); retry {retry} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def _atimed(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.time()
+        result = await fn()
+        self.latency.record(time.time() - start)
+        return result
+
+    async def _aattempt(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.attempt_timeout
+        hedge_after = self._hedge_delay()
+
+        primary = asyncio.ensure_future(self._atimed(fn))
+        hedge = None
+        try:
+            first_wait = self.attempt_timeout if hedge_after is None else min(hedge_after, self.attempt_timeout)
+            done, _ = await asyncio.wait({primary}, timeout=first_wait)
+            if done:
+                return primary.result()
+            if hedge_after is None:
+                raise TimeoutError(f"Upstream call still running after {self.attempt_timeout:.0f}s")
+
+            self._count('hedges_launched')
+            logger.info(f"[Resilience] Call exceeded p{self.hedge_percentile:.0f} ({hedge_after * 1000:.0f}ms), hedging")
+            hedge = asyncio.ensure_future(self._atimed(fn))
+
+            pending = {primary, hedge}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, deadline - loop.time()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise TimeoutError(f"Upstream call still running after {self.attempt_timeout:.0f}s")
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count('hedges_won')
+                        return task.result()
+                    error = task.exception()
+
+            raise error
+        finally:
+            # Losers, timed-out calls and calls whose caller was cancelled
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus breaker state and current hedge threshold"""
+        p95 = self.latency.percentile(self.hedge_percentile)
+        return {
+            'calls': self.calls,
+            'retries': self.retries,
+            'failures': self.failures,
+            'hedges_launched': self.hedges_launched,
+            'hedges_skipped': self.hedges_skipped,
+            'hedges_won': self.hedges_won,
+            'hedge_threshold_ms': round(p95 * 1000) if p95 is not None else None,
+            'circuit': self.breaker.stats(),
+        }
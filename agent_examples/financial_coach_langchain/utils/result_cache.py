@@ -0,0 +1,197 @@
+"""
+Persistent result cache for Snow Leopard queries.
+
+Stores successful query responses in a local SQLite file keyed on
+(datafile_id, normalized query text), with per-entry TTL and
+size-bounded LRU eviction.
+"""
+
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'snowleopard_results.db')
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MAX_ENTRIES = 1000
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query text so trivially different phrasings share a cache entry"""
+    text = re.sub(r'\s+', ' ', query.strip().lower())
+    return text.rstrip('?!. ')
+
+
+class ResultCache:
+    """
+    SQLite-backed LRU cache with per-entry TTL.
+
+    Each entry records when it expires and when it was last read; once the
+    cache holds more than `max_entries` rows, the least recently used ones
+    are evicted.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS query_cache (
+            cache_key TEXT PRIMARY KEY,
+            datafile_id TEXT NOT NULL,
+            query TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_access ON query_cache(last_access)')
+        self._conn.commit()
+
+        logger.info(f"[ResultCache] Using {path} (ttl={ttl_seconds}s, max_entries={max_entries})")
+
+    @staticmethod
+    def make_key(datafile_id: str, query: str) -> str:
+        """Build the cache key for a (datafile_id, query) pair"""
+        raw = f"{datafile_id}\x00{normalize_query(query)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, datafile_id: str, query: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response, or None if missing or expired"""
+        key = self.make_key(datafile_id, query)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT response, expires_at FROM query_cache WHERE cache_key = ?', (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, expires_at = row
+            if expires_at <= now:
+                self._conn.execute('DELETE FROM query_cache WHERE cache_key = ?', (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute('UPDATE query_cache SET last_access = ? WHERE cache_key = ?', (now, key))
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(response)
+
+    def put(self, datafile_id: str, query: str, response: Dict[str, Any],
+            ttl_seconds: Optional[float] = None) -> None:
+        """Store a response and evict least recently used entries over the size bound"""
+        key = self.make_key(datafile_id, query)
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        payload = json.dumps(response, default=str, separators=(',', ':'))
+
+        with self._lock:
+            self._conn.execute('''
+            INSERT OR REPLACE INTO query_cache
+            (cache_key, datafile_id, query, response, created_at, expires_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (key, datafile_id, normalize_query(query), payload, now, now + ttl, now))
+
+            count = self._conn.execute('SELECT COUNT(*) FROM query_cache').fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute('''
+                DELETE FROM query_cache WHERE cache_key IN (
+                    SELECT cache_key FROM query_cache ORDER BY last_access ASC LIMIT ?
+                )
+                ''', (overflow,))
+                self.evictions += overflow
+
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete all expired entries, returning how many were removed"""
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM query_cache WHERE expires_at <= ?', (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        """Remove every entry and reset counters"""
+        with self._lock:
+            self._conn.execute('DELETE FROM query_cache')
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            size = self._conn.execute('SELECT COUNT(*) FROM query_cache').fetchone()[0]
+
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'entries': size,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'path': self.path,
+        }
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection"""
+        with self._lock:
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Get or create the result cache, or None if disabled via SNOWLEOPARD_CACHE_ENABLED"""
+    global _cache
+
+    if os.getenv('SNOWLEOPARD_CACHE_ENABLED', 'True').lower() != 'true':
+        return None
+
+    # Lock-free once created; the lock only stops two threads both opening one
+    cache = _cache
+    if cache is not None:
+        return cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(
+                path=os.getenv('SNOWLEOPARD_CACHE_PATH', DEFAULT_CACHE_PATH),
+                ttl_seconds=float(os.getenv('SNOWLEOPARD_CACHE_TTL', DEFAULT_TTL_SECONDS)),
+                max_entries=int(os.getenv('SNOWLEOPARD_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+            )
+
+    return _cache
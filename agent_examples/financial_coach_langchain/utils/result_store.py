@@ -0,0 +1,174 @@
+"""
+Process-local store for query rows.
+
+Graph state carries a small handle and summary stats instead of the rows
+themselves, so LangGraph's per-node validation and copying stays cheap no
+matter how large a result is. Rows are kept once, here; nodes resolve the
+handle when they need them, and the analyze node discards it once the turn
+is done with the rows.
+
+A new result is pinned for PIN_SECONDS, so concurrent turns going over the
+byte budget cannot evict rows another turn has yet to read. Only results
+left behind by turns that never discarded them (a failed run) are evicted,
+least recently used first.
+"""
+
+
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# How long a result is protected from eviction; far longer than any turn
+PIN_SECONDS = 300
+
+
+def estimate_nbytes(rows: Any) -> int:
+    """Approximate memory held by a result (a ColumnarResult or a list of row dicts)"""
+    nbytes = getattr(rows, 'nbytes', None)
+    if nbytes is not None:
+        return nbytes
+
+    total = sys.getsizeof(rows)
+    for row in rows:
+        total += sys.getsizeof(row)
+        if isinstance(row, dict):
+            total += sum(sys.getsizeof(value) for value in row.values())
+    return total
+
+
+class ResultStore:
+    """Thread-safe LRU of query results keyed by opaque handles, bounded by bytes"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, pin_seconds: float = PIN_SECONDS):
+        self.max_bytes = max_bytes
+        self.pin_seconds = pin_seconds
+        self.current_bytes = 0
+        self.evictions = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, rows: Any) -> str:
+        """Store a result, pinned for pin_seconds, and return its handle"""
+        handle = uuid.uuid4().hex
+        nbytes = estimate_nbytes(rows)
+        now = time.monotonic()
+
+        with self._lock:
+            self._entries[handle] = (rows, nbytes, now)
+            self.current_bytes += nbytes
+
+            if self.current_bytes > self.max_bytes:
+                for old in list(self._entries):
+                    if self.current_bytes <= self.max_bytes:
+                        break
+                    _, evicted_bytes, stored_at = self._entries[old]
+                    if old == handle or now - stored_at < self.pin_seconds:
+                        continue
+                    del self._entries[old]
+                    self.current_bytes -= evicted_bytes
+                    self.evictions += 1
+
+        return handle
+
+    def get(self, handle: str) -> Optional[Any]:
+        """Return the rows for a handle, or None if it was evicted or never existed"""
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(handle)
+            return entry[0]
+
+    def discard(self, handle: str) -> None:
+        """Drop a result once its turn no longer needs the rows"""
+        with self._lock:
+            entry = self._entries.pop(handle, None)
+            if entry is not None:
+                self.current_bytes -= entry[1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'evictions': self.evictions,
+            'misses': self.misses,
+            'pin_seconds': self.pin_seconds,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """Get or create the process-wide result store (budget from RESULT_STORE_MAX_BYTES)"""
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore(max_bytes=int(os.getenv('RESULT_STORE_MAX_BYTES', DEFAULT_MAX_BYTES)))
+
+    return _store
+
+
+def detach_rows(response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Move a response's rows into the result store
+
+    Returns:
+        A copy of the response with 'rows' replaced by 'result_handle',
+        'rows_returned' and 'columns'; the original dict is left untouched
+    """
+    rows = response.get('rows')
+    detached = {key: value for key, value in response.items() if key != 'rows'}
+    if rows is None:
+        return detached
+
+    columns = getattr(rows, 'column_names', None)
+    if columns is None:
+        columns = list(rows[0].keys()) if rows and isinstance(rows[0], dict) else []
+
+    detached['result_handle'] = get_result_store().put(rows)
+    detached['rows_returned'] = len(rows)
+    detached['columns'] = columns
+    return detached
+
+
+def resolve_rows(response: Dict[str, Any]) -> Any:
+    """
+    Get a response's rows, whether inline or behind a result handle
+
+    Returns:
+        The rows, or None if the handle's rows are gone (evicted or discarded)
+    """
+    if 'rows' in response:
+        return response['rows']
+
+    handle = response.get('result_handle')
+    if not handle:
+        return []
+
+    rows = get_result_store().get(handle)
+    if rows is None:
+        logger.warning(f"[ResultStore] Result {handle} was evicted before it was read")
+    return rows
+
+
+def release_rows(response: Dict[str, Any]) -> None:
+    """Discard a response's stored rows, if it has any"""
+    handle = response.get('result_handle')
+    if handle:
+        get_result_store().discard(handle)
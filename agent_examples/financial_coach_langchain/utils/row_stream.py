@@ -0,0 +1,33 @@
+"""
+Helpers for consuming query rows incrementally.
+
+Producers may hand over a list of rows, an iterator of rows, or an
+iterator of row batches; consumers call iter_rows() and walk the rows once
+without materializing the whole result.
+"""
+
+
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List
+
+
+def iter_batches(rows: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Group rows into lists of at most batch_size"""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_rows(rows: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+    """Yield individual rows from rows or row batches"""
+    if rows is None:
+        return
+
+    for item in rows:
+        if isinstance(item, list):
+            yield from item
+        else:
+            yield item
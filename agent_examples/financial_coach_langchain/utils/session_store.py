@@ -0,0 +1,237 @@
+"""
+Persistent conversation sessions for the financial coach.
+
+Each session's messages live in a local SQLite file (WAL mode) keyed by
+session_id, so a conversation survives restarts. A turn only appends its
+own new messages; nothing already stored is rewritten. Once a session holds
+more than `max_messages`, the oldest messages are compacted: they are
+deleted and folded into a running count. Sessions not updated for
+`max_age_seconds` are pruned when the store opens and then at most once
+per prune interval as turns are appended, so the file does not grow with
+every CLI launch.
+"""
+
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_PATH = os.path.join('.cache', 'sessions.db')
+DEFAULT_MAX_MESSAGES = 20
+DEFAULT_MAX_AGE_DAYS = 30
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+class SessionStore:
+    """SQLite-backed, per-session message log with a retention cap and age-based pruning"""
+
+    def __init__(self, path: str = DEFAULT_SESSION_PATH, max_messages: int = DEFAULT_MAX_MESSAGES,
+                 max_age_seconds: Optional[float] = DEFAULT_MAX_AGE_DAYS * 86400):
+        """
+        Args:
+            max_messages: Messages kept per session before the oldest are compacted
+            max_age_seconds: Sessions idle longer than this are deleted (None or 0 keeps them forever)
+        """
+        self.path = path
+        self.max_messages = max_messages
+        self.max_age_seconds = max_age_seconds
+        self.compacted = 0
+        self.pruned = 0
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            next_turn INTEGER NOT NULL DEFAULT 0,
+            compacted_messages INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        ''')
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS session_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            turn INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_session_messages ON session_messages(session_id, id)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at)')
+        self._conn.commit()
+
+        logger.info(f"[SessionStore] Using {path} (max_messages={max_messages}, max_age_seconds={max_age_seconds})")
+        self.prune()
+
+    def load(self, session_id: str) -> Dict[str, Any]:
+        """
+        Load a session's retained messages and bookkeeping
+
+        Returns:
+            Dict with messages (oldest first), next_turn and
+            compacted_messages; an unknown session comes back empty
+        """
+        with self._lock:
+            session = self._conn.execute(
+                'SELECT next_turn, compacted_messages FROM sessions WHERE session_id = ?',
+                (session_id,)
+            ).fetchone()
+            rows = self._conn.execute(
+                'SELECT turn, role, content FROM session_messages WHERE session_id = ? ORDER BY id',
+                (session_id,)
+            ).fetchall()
+
+        next_turn, compacted_messages = session or (0, 0)
+        return {
+            'session_id': session_id,
+            'messages': [{'turn': turn, 'role': role, 'content': content} for turn, role, content in rows],
+            'next_turn': next_turn,
+            'compacted_messages': compacted_messages,
+        }
+
+    def append(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Append new messages to a session, compacting the oldest ones over the cap"""
+        if not messages:
+            return
+
+        now = time.time()
+        next_turn = max(int(m.get('turn', 0)) for m in messages) + 1
+
+        with self._lock:
+            self._conn.execute('''
+            INSERT INTO sessions (session_id, next_turn, created_at, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                next_turn = MAX(next_turn, excluded.next_turn),
+                updated_at = excluded.updated_at
+            ''', (session_id, next_turn, now, now))
+
+            self._conn.executemany(
+                'INSERT INTO session_messages (session_id, turn, role, content, created_at) VALUES (?, ?, ?, ?, ?)',
+                [(session_id, int(m.get('turn', 0)), m.get('role', ''), str(m.get('content', '')), now)
+                 for m in messages]
+            )
+
+            self._compact(session_id)
+            self._conn.commit()
+
+        if now - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+            self.prune()
+
+    def _compact(self, session_id: str) -> None:
+        """Fold messages beyond max_messages into the session summary (caller holds the lock)"""
+        count = self._conn.execute(
+            'SELECT COUNT(*) FROM session_messages WHERE session_id = ?', (session_id,)
+        ).fetchone()[0]
+        overflow = count - self.max_messages
+        if overflow <= 0:
+            return
+
+        last_id = self._conn.execute(
+            'SELECT id FROM session_messages WHERE session_id = ? ORDER BY id LIMIT 1 OFFSET ?',
+            (session_id, overflow - 1)
+        ).fetchone()[0]
+
+        self._conn.execute(
+            'DELETE FROM session_messages WHERE session_id = ? AND id <= ?', (session_id, last_id)
+        )
+        self._conn.execute(
+            'UPDATE sessions SET compacted_messages = compacted_messages + ? WHERE session_id = ?',
+            (overflow, session_id)
+        )
+        self.compacted += overflow
+
+    def prune(self) -> int:
+        """Delete sessions not updated within max_age_seconds, returning how many were removed"""
+        self._last_prune = time.time()
+        if not self.max_age_seconds:
+            return 0
+
+        cutoff = self._last_prune - self.max_age_seconds
+        with self._lock:
+            self._conn.execute('''
+            DELETE FROM session_messages WHERE session_id IN (
+                SELECT session_id FROM sessions WHERE updated_at < ?
+            )
+            ''', (cutoff,))
+            removed = self._conn.execute('DELETE FROM sessions WHERE updated_at < ?', (cutoff,)).rowcount
+            self._conn.commit()
+
+        if removed:
+            self.pruned += removed
+            logger.info(f"[SessionStore] Pruned {removed} sessions idle for over {self.max_age_seconds:.0f}s")
+        return removed
+
+    def delete(self, session_id: str) -> None:
+        """Forget a session entirely"""
+        with self._lock:
+            self._conn.execute('DELETE FROM session_messages WHERE session_id = ?', (session_id,))
+            self._conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+            self._conn.commit()
+
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        """List stored sessions, most recently updated first"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT session_id, next_turn, updated_at FROM sessions ORDER BY updated_at DESC'
+            ).fetchall()
+
+        return [{'session_id': session_id, 'turns': next_turn, 'updated_at': updated_at}
+                for session_id, next_turn, updated_at in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get session and message counts"""
+        with self._lock:
+            sessions = self._conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+            messages = self._conn.execute('SELECT COUNT(*) FROM session_messages').fetchone()[0]
+
+        return {
+            'sessions': sessions,
+            'messages': messages,
+            'compacted': self.compacted,
+            'pruned': self.pruned,
+            'max_messages': self.max_messages,
+            'max_age_seconds': self.max_age_seconds,
+            'path': self.path,
+        }
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection"""
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """Get or create the session store, or None if disabled via SESSION_STORE_ENABLED"""
+    global _store
+
+    if os.getenv('SESSION_STORE_ENABLED', 'True').lower() != 'true':
+        return None
+
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore(
+                path=os.getenv('SESSION_STORE_PATH', DEFAULT_SESSION_PATH),
+                max_messages=int(os.getenv('SESSION_MAX_MESSAGES', DEFAULT_MAX_MESSAGES)),
+                max_age_seconds=float(os.getenv('SESSION_MAX_AGE_DAYS', DEFAULT_MAX_AGE_DAYS)) * 86400,
+            )
+
+    return _store
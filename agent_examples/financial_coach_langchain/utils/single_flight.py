@@ -0,0 +1,109 @@
+"""
+Single-flight call coalescing.
+
+While a call for a key is in flight, further callers with the same key wait
+for that call and share its result instead of starting their own.
+"""
+
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls made from threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn once per key at a time
+
+        Returns:
+            (result, shared) where shared is True if the result came from
+            another caller's in-flight call. Exceptions raised by fn are
+            re-raised in every waiting caller.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            logger.debug(f"[SingleFlight] Joining in-flight call {key[:12]}")
+            return future.result(), True
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Get leader/follower counters"""
+        return {
+            'in_flight': len(self._calls),
+            'leaders': self.leaders,
+            'followers': self.followers,
+        }
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent identical calls made from coroutines on one event loop"""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await fn once per key at a time
+
+        The shared call runs as its own task and is shielded, so a waiter
+        being cancelled does not cancel the call for everyone else.
+
+        Returns:
+            (result, shared) where shared is True if the result came from
+            another caller's in-flight call.
+        """
+        task = self._calls.get(key)
+        leader = task is None
+
+        if leader:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.leaders += 1
+        else:
+            self.followers += 1
+            logger.debug(f"[SingleFlight] Joining in-flight call {key[:12]}")
+
+        return await asyncio.shield(task), not leader
+
+    def stats(self) -> Dict[str, int]:
+        """Get leader/follower counters"""
+        return {
+            'in_flight': len(self._calls),
+            'leaders': self.leaders,
+            'followers': self.followers,
+        }
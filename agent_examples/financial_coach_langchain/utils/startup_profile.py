@@ -0,0 +1,72 @@
+"""
+Startup timing for the CLI.
+
+Records how long each import and initialization step takes, and how many
+modules it loaded, so `python main.py --startup-profile` can show where cold
+start goes. Recording is always on and costs a perf_counter call per step;
+nothing is printed unless asked.
+"""
+
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+
+class StartupProfiler:
+    """Ordered list of named startup steps with wall time and modules loaded"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.steps: List[Dict[str, Any]] = []
+        self._last_mark = self.started_at
+        self._last_modules = len(sys.modules)
+
+    def mark(self, name: str):
+        """Record the time since the previous mark as one step"""
+        now = time.perf_counter()
+        modules = len(sys.modules)
+        self.steps.append({
+            'step': name,
+            'ms': round((now - self._last_mark) * 1000, 1),
+            'modules': modules - self._last_modules,
+        })
+        self._last_mark = now
+        self._last_modules = modules
+
+    @contextmanager
+    def phase(self, name: str):
+        """Record a block that may run later than startup (e.g. a lazy import on first use)"""
+        start = time.perf_counter()
+        modules = len(sys.modules)
+        try:
+            yield
+        finally:
+            self.steps.append({
+                'step': name,
+                'ms': round((time.perf_counter() - start) * 1000, 1),
+                'modules': len(sys.modules) - modules,
+            })
+            self._last_mark = time.perf_counter()
+            self._last_modules = len(sys.modules)
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started_at) * 1000, 1)
+
+    def print_report(self, title: str = "🚀 Startup Profile"):
+        from rich.console import Console
+        from rich.table import Table
+
+        table = Table(title=title)
+        table.add_column("Step", style="magenta")
+        table.add_column("Time (ms)", style="green", justify="right")
+        table.add_column("Modules", style="blue", justify="right")
+        for step in self.steps:
+            table.add_row(step['step'], f"{step['ms']:.1f}", str(step['modules']))
+        table.add_row("[bold]Since profiler start[/bold]", f"[bold]{self.elapsed_ms():.1f}[/bold]", str(len(sys.modules)))
+
+        Console().print(table)
+
+
+startup_profiler = StartupProfiler()